@@ -0,0 +1,217 @@
+"""
+Local stand-in for the Binance Futures REST API
+
+Serves the /fapi endpoints the bot uses (ping, time, exchangeInfo, order,
+batchOrders, ticker/price) from memory, with a configurable response delay and
+share of failed order requests. Signatures are not checked.
+
+    with FakeFuturesAPI(latency_ms=20, error_rate=0.01) as api:
+        settings.base_url = api.base_url
+"""
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+SYMBOLS = {
+    "BTCUSDT": {"price": "95000.00", "tickSize": "0.10", "stepSize": "0.001", "minQty": "0.001"},
+    "ETHUSDT": {"price": "3500.00", "tickSize": "0.01", "stepSize": "0.001", "minQty": "0.001"},
+}
+
+RATE_LIMITS = [
+    {"rateLimitType": "REQUEST_WEIGHT", "interval": "MINUTE", "intervalNum": 1, "limit": 2400},
+    {"rateLimitType": "ORDERS", "interval": "MINUTE", "intervalNum": 1, "limit": 1200},
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 300},
+]
+
+ORDER_PATHS = ("/fapi/v1/order", "/fapi/v1/batchOrders")
+
+def exchange_info() -> Dict[str, Any]:
+    return {
+        "timezone": "UTC",
+        "rateLimits": RATE_LIMITS,
+        "symbols": [{
+            "symbol": symbol,
+            "status": "TRADING",
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": spec["tickSize"], "maxPrice": "1000000",
+                 "tickSize": spec["tickSize"]},
+                {"filterType": "LOT_SIZE", "minQty": spec["minQty"], "maxQty": "1000",
+                 "stepSize": spec["stepSize"]},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": spec["minQty"], "maxQty": "120",
+                 "stepSize": spec["stepSize"]},
+                {"filterType": "MIN_NOTIONAL", "notional": "5"},
+            ],
+        } for symbol, spec in SYMBOLS.items()],
+    }
+
+class FakeFuturesAPI:
+    """In-memory order book keeper behind a threaded HTTP/1.1 server on localhost"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_code: int = -1001, seed: Optional[int] = None, port: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.port = port
+        self.orders: Dict[int, Dict[str, Any]] = {}
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self._ids = itertools.count(1)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "FakeFuturesAPI":
+        handler = type("Handler", (_Handler,), {"api": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="fake-fapi", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": dict(self.requests), "errors_injected": self.errors, "orders": len(self.orders)}
+
+    # Request handling, called from the server threads
+
+    def _delay(self):
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _inject_error(self, path: str) -> bool:
+        if path not in ORDER_PATHS or self.error_rate <= 0:
+            return False
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return False
+            self.errors += 1
+        return True
+
+    def handle(self, method: str, path: str, params: Dict[str, str]):
+        """(status, body) for one request"""
+        with self._lock:
+            key = f"{method} {path}"
+            self.requests[key] = self.requests.get(key, 0) + 1
+        self._delay()
+        if self._inject_error(path):
+            return 503, {"code": self.error_code, "msg": "Injected failure"}
+
+        if path == "/fapi/v1/ping":
+            return 200, {}
+        if path == "/fapi/v1/time":
+            return 200, {"serverTime": int(time.time() * 1000)}
+        if path == "/fapi/v1/exchangeInfo":
+            return 200, exchange_info()
+        if path == "/fapi/v2/ticker/price":
+            symbol = params.get("symbol", "BTCUSDT")
+            return 200, {"symbol": symbol, "price": SYMBOLS.get(symbol, SYMBOLS["BTCUSDT"])["price"],
+                         "time": int(time.time() * 1000)}
+        if path == "/fapi/v1/order":
+            if method == "POST":
+                return self._new_order(params)
+            return self._existing_order(params, cancel=method == "DELETE")
+        if path == "/fapi/v1/batchOrders" and method == "POST":
+            batch = json.loads(params.get("batchOrders", "[]"))
+            return 200, [self._new_order(order)[1] for order in batch]
+        return 404, {"code": -1000, "msg": f"Unknown path {method} {path}"}
+
+    def _new_order(self, params: Dict[str, Any]):
+        if params.get("symbol") not in SYMBOLS:
+            return 400, {"code": -1121, "msg": "Invalid symbol."}
+        now = int(time.time() * 1000)
+        is_market = params.get("type") == "MARKET"
+        order = {
+            "orderId": next(self._ids),
+            "symbol": params["symbol"],
+            "clientOrderId": params.get("newClientOrderId", ""),
+            "side": params.get("side"),
+            "type": params.get("type"),
+            "timeInForce": params.get("timeInForce", "GTC"),
+            "price": str(params.get("price", "0")),
+            "stopPrice": str(params.get("stopPrice", "0")),
+            "origQty": str(params.get("quantity", "0")),
+            "executedQty": str(params.get("quantity", "0")) if is_market else "0",
+            "avgPrice": SYMBOLS[params["symbol"]]["price"] if is_market else "0.00",
+            "reduceOnly": str(params.get("reduceOnly", "false")).lower() == "true",
+            "status": "FILLED" if is_market else "NEW",
+            "updateTime": now,
+        }
+        with self._lock:
+            self.orders[order["orderId"]] = order
+        return 200, order
+
+    def _existing_order(self, params: Dict[str, str], cancel: bool):
+        with self._lock:
+            order = None
+            if "orderId" in params:
+                order = self.orders.get(int(params["orderId"]))
+            elif "origClientOrderId" in params:
+                order = next((o for o in self.orders.values()
+                              if o["clientOrderId"] == params["origClientOrderId"]), None)
+            if order is None:
+                return 400, {"code": -2013, "msg": "Order does not exist."}
+            if cancel:
+                if order["status"] in ("FILLED", "CANCELED"):
+                    return 400, {"code": -2011, "msg": "Unknown order sent."}
+                order["status"] = "CANCELED"
+                order["updateTime"] = int(time.time() * 1000)
+            return 200, dict(order)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # Headers and body are written separately, Nagle plus delayed ACKs would add ~40 ms to each
+    disable_nagle_algorithm = True
+    api: FakeFuturesAPI
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+        status, body = self.api.handle(method, url.path, params)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def log_message(self, format, *args):
+        pass
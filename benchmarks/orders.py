@@ -0,0 +1,210 @@
+"""
+End-to-end order path benchmark
+
+Starts a local fake Futures API (see benchmarks.fake_exchange) and places
+orders through OrderService, the Flask web UI routes and the CLI at a fixed
+concurrency, reporting orders/s and p50/p99/p999 latency. Everything runs in a
+temporary directory, so the database, logs and exchange info cache of the
+checkout are left alone.
+
+    python -m benchmarks.orders --orders 500 --concurrency 8 --latency-ms 20 --json orders.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks.fake_exchange import FakeFuturesAPI
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ("service", "web", "cli")
+
+def order_payload(index: int) -> Dict[str, object]:
+    """Alternating MARKET and marketable LIMIT orders on one symbol.
+
+    LIMIT prices cross the simulated exchange's default 95000 price, so no
+    order is left resting there to hit the open order limit.
+    """
+    buy = bool(index % 2)
+    payload = {
+        "symbol": "BTCUSDT",
+        "side": "BUY" if buy else "SELL",
+        "type": "LIMIT" if index % 4 < 2 else "MARKET",
+        "quantity": 0.002,
+    }
+    if payload["type"] == "LIMIT":
+        offset = (index % 50) * 0.1
+        payload["price"] = round(95000 + offset if buy else 95000 - offset, 1)
+        payload["timeInForce"] = "GTC"
+    return payload
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "orders": len(ordered),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "orders_per_s": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ordered), 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "p999_ms": round(percentile(ordered, 0.999), 2),
+    }
+
+def run_load(call: Callable[[int], None], count: int, concurrency: int, warmup: int = 0) -> Dict[str, float]:
+    """Run call(0..count-1) on `concurrency` threads, timing each call.
+
+    `warmup` untimed calls go first, so one-off costs (clock sync, opening the
+    database) are not counted as order latency.
+    """
+    for index in range(warmup):
+        try:
+            call(-1 - index)
+        except Exception:
+            pass
+
+    def timed(index: int):
+        started = time.perf_counter()
+        try:
+            call(index)
+            ok = True
+        except Exception:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(count)))
+    elapsed = time.perf_counter() - started
+    return summarize([ms for ms, _ in outcomes], sum(1 for _, ok in outcomes if not ok), elapsed)
+
+def bench_service(count: int, concurrency: int, warmup: int) -> Dict[str, float]:
+    from src.bot.client import create_exchange_client
+    from src.bot.models import OrderInput
+    from src.bot.services.orders import OrderService
+    from src.bot.services.symbols import SymbolService
+
+    client = create_exchange_client()
+    service = OrderService(client, SymbolService(client))
+    service.symbol_service.get_parsed_filters("BTCUSDT")  # exchange info is not part of the order path
+
+    def call(index: int):
+        service.place_order(OrderInput(**order_payload(index)), user_interface="benchmark")
+
+    return run_load(call, count, concurrency, warmup)
+
+def bench_web(count: int, concurrency: int, warmup: int) -> Dict[str, float]:
+    from src.web_ui import app
+
+    client = app.test_client()
+    client.get("/api/symbol/BTCUSDT")  # builds the services and loads exchange info
+
+    def call(index: int):
+        response = client.post("/api/order", json=order_payload(index))
+        if response.status_code != 200:
+            raise RuntimeError(response.get_json().get("error"))
+
+    return run_load(call, count, concurrency, warmup)
+
+def bench_cli(count: int, concurrency: int, env: Dict[str, str], cwd: str) -> Dict[str, float]:
+    def call(index: int):
+        command = [sys.executable, "-m", "src.main", "order"]
+        for name, value in order_payload(index).items():
+            command += [f"--{name}", str(value)]
+        output = subprocess.run(command, env=env, cwd=cwd, capture_output=True, text=True, check=True).stdout
+        # The CLI reports failures on stdout and still exits 0
+        if "Error:" in output:
+            raise RuntimeError(output)
+
+    return run_load(call, count, concurrency)
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end order path benchmark against a fake Futures API")
+    parser.add_argument("--target", action="append", choices=TARGETS, help="Run only these targets")
+    parser.add_argument("--orders", type=int, default=200, help="Orders per in-process target")
+    parser.add_argument("--cli-orders", type=int, default=20, help="Orders for the cli target, one process each")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed orders before each in-process target")
+    parser.add_argument("--concurrency", type=int, default=8, help="Orders in flight at once")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Fake API response delay")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random delay, uniform in [0, jitter]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of order requests that fail")
+    parser.add_argument("--simulated", action="store_true",
+                        help="Use the in-process simulated exchange instead of the fake HTTP API")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the client-side rate-limit governor on")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for injected latency and errors")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    api = FakeFuturesAPI(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="ctbot-bench-")
+    os.environ.update({
+        "BINANCE_API_KEY": os.environ.get("BINANCE_API_KEY", "benchmark"),
+        "BINANCE_API_SECRET": os.environ.get("BINANCE_API_SECRET", "benchmark"),
+        "BINANCE_FUTURES_BASE_URL": api.base_url,
+        "EXCHANGE_INFO_CACHE_FILE": os.path.join(workdir, "exchange_info.json"),
+        "VERIFY_CONNECTIVITY": "false",
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limit else "false",
+        "EXCHANGE": "simulated" if args.simulated else "binance",
+    })
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+
+    # The database and log files are relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+    logging.basicConfig(filename=os.path.join(workdir, "benchmark.log"), level=logging.INFO)
+
+    results = {}
+    try:
+        for target in args.target or TARGETS:
+            if target == "service":
+                results[target] = bench_service(args.orders, args.concurrency, args.warmup)
+            elif target == "web":
+                results[target] = bench_web(args.orders, args.concurrency, args.warmup)
+            else:
+                results[target] = bench_cli(args.cli_orders, args.concurrency, env, workdir)
+            r = results[target]
+            print(f"{target:8} {r['orders_per_s']:8.1f} orders/s   p50 {r['p50_ms']:8.2f} ms   "
+                  f"p99 {r['p99_ms']:8.2f} ms   p999 {r['p999_ms']:8.2f} ms   errors {r['errors']}")
+    finally:
+        api.stop()
+        logging.shutdown()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({
+                "benchmark": "orders",
+                "commit": git_commit(),
+                "python": sys.version.split()[0],
+                "config": {k: v for k, v in vars(args).items() if k != "json"},
+                "results": results,
+                "server": api.stats(),
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
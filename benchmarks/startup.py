@@ -0,0 +1,87 @@
+"""
+CLI startup benchmark
+
+Runs short CLI invocations in fresh interpreters and reports wall time.
+No network access is needed: `symbols` is served from a temporary
+exchange info cache and no command verifies connectivity.
+
+    python -m benchmarks.startup --runs 20 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXCHANGE_INFO = {
+    "symbols": [{
+        "symbol": "BTCUSDT",
+        "status": "TRADING",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "1000000", "tickSize": "0.10"},
+            {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+        ],
+    }]
+}
+
+CASES = {
+    "interpreter": [sys.executable, "-c", "pass"],
+    "eager-imports": [sys.executable, "-c",
+                      "import rich.console, src.bot.client, src.bot.database, src.bot.models, "
+                      "src.bot.services.orders"],
+    "help": [sys.executable, "-m", "src.main", "--help"],
+    "order-help": [sys.executable, "-m", "src.main", "order", "--help"],
+    "symbols-cached": [sys.executable, "-m", "src.main", "symbols", "--symbol", "BTCUSDT"],
+}
+
+def run_case(command, env, cwd, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs": runs,
+        "min_ms": round(min(timings), 1),
+        "median_ms": round(statistics.median(timings), 1),
+        "max_ms": round(max(timings), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Invocations per case")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only these cases")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_file = os.path.join(workdir, "exchange_info.json")
+        with open(cache_file, "w") as f:
+            json.dump(EXCHANGE_INFO, f)
+
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": REPO_ROOT,
+            "BINANCE_API_KEY": env.get("BINANCE_API_KEY", "benchmark"),
+            "BINANCE_API_SECRET": env.get("BINANCE_API_SECRET", "benchmark"),
+            "EXCHANGE_INFO_CACHE_FILE": cache_file,
+            "VERIFY_CONNECTIVITY": "false",
+        })
+
+        results = {}
+        for name in args.case or CASES:
+            results[name] = run_case(CASES[name], env, workdir, args.runs)
+            print(f"{name:16} median {results[name]['median_ms']:8.1f} ms   "
+                  f"min {results[name]['min_ms']:8.1f} ms   max {results[name]['max_ms']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "startup", "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
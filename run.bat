@@ -15,6 +15,8 @@ if "%1"=="order-stop" goto order-stop
 if "%1"=="db-history" goto db-history
 if "%1"=="db-logs" goto db-logs
 if "%1"=="db-stats" goto db-stats
+if "%1"=="db-retention" goto db-retention
+if "%1"=="db-migrate" goto db-migrate
 if "%1"=="lint" goto lint
 if "%1"=="fmt" goto fmt
 if "%1"=="help" goto help
@@ -78,6 +80,16 @@ echo Viewing trading statistics...
 poetry run python -m src.db_viewer stats
 goto end
 
+:db-retention
+echo Rolling up old activity logs...
+poetry run python -m src.db_viewer retention
+goto end
+
+:db-migrate
+echo Upgrading the database schema...
+poetry run python -m src.db_viewer migrate
+goto end
+
 :lint
 echo Linting code...
 poetry run ruff check .
@@ -111,6 +123,8 @@ echo Database:
 echo   db-history       View order history
 echo   db-logs          View activity logs
 echo   db-stats         View trading statistics
+echo   db-retention     Roll up and delete old activity logs
+echo   db-migrate       Upgrade a database written by an older version
 echo.
 echo Development:
 echo   lint             Lint code
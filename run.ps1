@@ -51,6 +51,14 @@ switch ($Command) {
         Write-Host "Viewing trading statistics..." -ForegroundColor Cyan
         poetry run python -m src.db_viewer stats
     }
+    "db-retention" {
+        Write-Host "Rolling up old activity logs..." -ForegroundColor Cyan
+        poetry run python -m src.db_viewer retention
+    }
+    "db-migrate" {
+        Write-Host "Upgrading the database schema..." -ForegroundColor Cyan
+        poetry run python -m src.db_viewer migrate
+    }
     "lint" {
         Write-Host "Linting code..." -ForegroundColor Cyan
         poetry run ruff check .
@@ -83,6 +91,8 @@ Database:
   db-history       View order history
   db-logs          View activity logs
   db-stats         View trading statistics
+  db-retention     Roll up and delete old activity logs
+  db-migrate       Upgrade a database written by an older version
 
 Development:
   lint             Lint code
@@ -1,72 +1,544 @@
+import asyncio
+import inspect
 import logging
+import threading
+import time
+from decimal import Decimal
 from functools import wraps
-from binance import Client
-from binance.exceptions import BinanceAPIException, BinanceRequestException
+from typing import Any, Callable, Dict, Optional
+from binance import AsyncClient, Client
+from binance.exceptions import BinanceAPIException
+from src.bot.clock import TIMESTAMP_ERROR, ServerClock
 from src.bot.config import settings
+from src.bot.metrics import EXCHANGE_RETRIES
+from src.bot.ratelimit import (
+    PRIORITY_CANCEL, PRIORITY_ORDER, RateLimitGovernor, get_rate_limit_governor, governed, record_response,
+    response_trace_config,
+)
+from src.bot.retry import (
+    DUPLICATE_CLIENT_ORDER_ID, EXECUTION_STATUS_UNKNOWN, ORDER_NOT_FOUND, TRANSIENT_CODES, backoff_delay,
+    is_transient, new_client_order_id,
+)
+from src.bot.tracing import traced
+from src.bot.transport import TransportConfig, aiohttp_transport, configure_session, connection_stats
 
 logger = logging.getLogger(__name__)
 
-def log_io(func):
+def clock_synced(func):
+    """Signed call: re-sync a stale server time offset, and on -1021 re-sync and retry once.
+
+    A -1021 rejection happens before the request is processed, so the retry
+    cannot duplicate an order.
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            if self.clock.stale:
+                await self.sync_time()
+            try:
+                return await func(self, *args, **kwargs)
+            except BinanceAPIException as e:
+                if e.code != TIMESTAMP_ERROR:
+                    raise
+                logger.warning(f"{func.__name__} rejected with -1021, re-syncing server time and retrying")
+                EXCHANGE_RETRIES.inc(func.__name__, 'timestamp')
+                await self.sync_time()
+                return await func(self, *args, **kwargs)
+        return async_wrapper
+
     @wraps(func)
-    def wrapper(*args, **kwargs):
+    def wrapper(self, *args, **kwargs):
+        if self.clock.synced_at is None:
+            self.sync_time()  # first signed call of the process
+        elif self.clock.stale:
+            self.sync_time_in_background()
         try:
-            logger.debug(f"Calling {func.__name__} with args={args}, kwargs={kwargs}")
-            result = func(*args, **kwargs)
-            logger.debug(f"{func.__name__} returned {result}")
-            return result
-        except (BinanceAPIException, BinanceRequestException) as e:
-            logger.error(f"API Error in {func.__name__}: {e}")
-            raise
+            return func(self, *args, **kwargs)
+        except BinanceAPIException as e:
+            if e.code != TIMESTAMP_ERROR:
+                raise
+            logger.warning(f"{func.__name__} rejected with -1021, re-syncing server time and retrying")
+            EXCHANGE_RETRIES.inc(func.__name__, 'timestamp')
+            self.sync_time()
+            return func(self, *args, **kwargs)
     return wrapper
 
-@log_io
-def create_client(api_key: str, api_secret: str) -> Client:
-    client = Client(api_key, api_secret)
-    
+def _retry_reason(error: Exception, attempt: int) -> Optional[str]:
+    if is_transient(error):
+        return 'transient'
+    if attempt and getattr(error, 'code', None) == DUPLICATE_CLIENT_ORDER_ID:
+        # An earlier attempt landed after the lookup missed it
+        return 'duplicate'
+    return None
+
+def idempotent_order(func):
+    """Order submission tagged with a client order ID and retried on transient failures.
+
+    After an ambiguous failure (timeout, 5xx, -1001/-1007) the order is looked
+    up by origClientOrderId first and only resent when the exchange reports it
+    does not exist, so a retry cannot duplicate it.
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, **params):
+            params.setdefault('newClientOrderId', new_client_order_id())
+            attempts = max(1, settings.order_retry_attempts)
+            unresolved = False
+            for attempt in range(attempts):
+                if attempt:
+                    await asyncio.sleep(backoff_delay(attempt, settings.order_retry_backoff))
+                try:
+                    if unresolved:
+                        try:
+                            return await self.futures_get_order(symbol=params['symbol'],
+                                                                origClientOrderId=params['newClientOrderId'])
+                        except BinanceAPIException as e:
+                            if e.code != ORDER_NOT_FOUND:
+                                raise
+                        unresolved = False
+                    return await func(self, **params)
+                except Exception as e:
+                    reason = _retry_reason(e, attempt)
+                    if reason is None or attempt == attempts - 1:
+                        raise
+                    logger.warning(f"{func.__name__} {params['newClientOrderId']} failed ({e}), "
+                                   f"looking it up before retrying")
+                    EXCHANGE_RETRIES.inc(func.__name__, reason)
+                    unresolved = True
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, **params):
+        params.setdefault('newClientOrderId', new_client_order_id())
+        attempts = max(1, settings.order_retry_attempts)
+        unresolved = False
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(backoff_delay(attempt, settings.order_retry_backoff))
+            try:
+                if unresolved:
+                    try:
+                        return self.futures_get_order(symbol=params['symbol'],
+                                                      origClientOrderId=params['newClientOrderId'])
+                    except BinanceAPIException as e:
+                        if e.code != ORDER_NOT_FOUND:
+                            raise
+                    unresolved = False
+                return func(self, **params)
+            except Exception as e:
+                reason = _retry_reason(e, attempt)
+                if reason is None or attempt == attempts - 1:
+                    raise
+                logger.warning(f"{func.__name__} {params['newClientOrderId']} failed ({e}), "
+                               f"looking it up before retrying")
+                EXCHANGE_RETRIES.inc(func.__name__, reason)
+                unresolved = True
+    return wrapper
+
+class _PendingBatch:
+    """Which orders of a batch are settled, to be looked up, or to be (re)sent"""
+
+    def __init__(self, batch_orders: list):
+        self.batch = batch_orders
+        for params in batch_orders:
+            params.setdefault('newClientOrderId', new_client_order_id())
+        self.results: list = [None] * len(batch_orders)
+        self.to_send = list(range(len(batch_orders)))
+        self.unresolved: list = []
+        self.error: Any = None
+
+    def take(self):
+        indexes, self.to_send = sorted(self.to_send), []
+        return indexes, [self.batch[index] for index in indexes]
+
+    def sent(self, indexes: list, response: list, attempt: int):
+        for index, item in zip(indexes, response):
+            self.results[index] = item
+            code = None if 'orderId' in item else item.get('code')
+            # A duplicate on a resend means an earlier attempt landed after the lookup missed it
+            if code in TRANSIENT_CODES or (attempt and code == DUPLICATE_CLIENT_ORDER_ID):
+                self.unresolved.append(index)
+                self.error = item.get('msg')
+
+    def send_failed(self, indexes: list, error: Exception) -> bool:
+        """Record a failed request, False when the error should propagate"""
+        if is_transient(error):
+            self.unresolved.extend(indexes)
+            self.error = error
+            return True
+        if isinstance(error, BinanceAPIException):
+            # Rejected as a whole before any order was placed
+            for index in indexes:
+                self.results[index] = {'code': error.code, 'msg': error.message}
+            return True
+        return False
+
+    def found(self, index: int, order: Dict[str, Any]):
+        self.results[index] = order
+        self.unresolved.remove(index)
+
+    def lookup_failed(self, index: int, error: Exception):
+        if getattr(error, 'code', None) == ORDER_NOT_FOUND:
+            self.unresolved.remove(index)
+            self.to_send.append(index)
+        else:
+            self.error = error  # still unknown, looked up again on the next attempt
+
+    def finish(self) -> list:
+        for index in self.unresolved:
+            self.results[index] = {'code': EXECUTION_STATUS_UNKNOWN, 'msg': f"Execution status unknown: {self.error}"}
+        return self.results
+
+def idempotent_batch(func):
+    """batchOrders submission with the lookups of idempotent_order, per order.
+
+    After an ambiguous failure each order is looked up by origClientOrderId,
+    found ones are kept and only those the exchange does not know are resent.
+    Returns one entry per order; orders still unresolved when the attempts run
+    out are -1007 (execution status unknown) entries, never rejections.
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(self, batch_orders: list):
+            state = _PendingBatch(batch_orders)
+            for attempt in range(max(1, settings.order_retry_attempts)):
+                if attempt:
+                    if not state.unresolved:
+                        break
+                    logger.warning(f"{func.__name__}: {len(state.unresolved)} orders unresolved "
+                                   f"({state.error}), looking them up before retrying")
+                    EXCHANGE_RETRIES.inc(func.__name__, 'transient')
+                    await asyncio.sleep(backoff_delay(attempt, settings.order_retry_backoff))
+                    for index in list(state.unresolved):
+                        params = state.batch[index]
+                        try:
+                            state.found(index, await self.futures_get_order(
+                                symbol=params['symbol'], origClientOrderId=params['newClientOrderId']))
+                        except Exception as e:
+                            state.lookup_failed(index, e)
+                if state.to_send:
+                    indexes, orders = state.take()
+                    try:
+                        state.sent(indexes, await func(self, orders), attempt)
+                    except Exception as e:
+                        if not state.send_failed(indexes, e):
+                            raise
+            return state.finish()
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, batch_orders: list):
+        state = _PendingBatch(batch_orders)
+        for attempt in range(max(1, settings.order_retry_attempts)):
+            if attempt:
+                if not state.unresolved:
+                    break
+                logger.warning(f"{func.__name__}: {len(state.unresolved)} orders unresolved "
+                               f"({state.error}), looking them up before retrying")
+                EXCHANGE_RETRIES.inc(func.__name__, 'transient')
+                time.sleep(backoff_delay(attempt, settings.order_retry_backoff))
+                for index in list(state.unresolved):
+                    params = state.batch[index]
+                    try:
+                        state.found(index, self.futures_get_order(
+                            symbol=params['symbol'], origClientOrderId=params['newClientOrderId']))
+                    except Exception as e:
+                        state.lookup_failed(index, e)
+            if state.to_send:
+                indexes, orders = state.take()
+                try:
+                    state.sent(indexes, func(self, orders), attempt)
+                except Exception as e:
+                    if not state.send_failed(indexes, e):
+                        raise
+        return state.finish()
+    return wrapper
+
+def futures_base_url() -> str:
     # Try with /fapi suffix first as it's required for most endpoints
     base_url = settings.base_url
     if not base_url.endswith('/fapi'):
         base_url = f"{base_url}/fapi"
-    
-    client.FUTURES_URL = base_url
-    
-    # Verify connectivity
+    return base_url
+
+def sync_server_time(client: Client, clock: ServerClock,
+                     futures_time: Optional[Callable[[], dict]] = None) -> int:
+    """Measure the exchange clock offset and apply it to the client's signed requests.
+
+    `futures_time` replaces the raw client call, BinanceClient passes its
+    governed method so the request counts against the weight budget.
+    """
+    sent_ms = time.time() * 1000
+    server_time = (futures_time or client.futures_time)()['serverTime']
+    offset = clock.record(server_time, sent_ms, time.time() * 1000)
+    client.timestamp_offset = offset
+    return offset
+
+async def sync_server_time_async(client: AsyncClient, clock: ServerClock,
+                                 futures_time: Optional[Callable[[], Any]] = None) -> int:
+    sent_ms = time.time() * 1000
+    server_time = (await (futures_time or client.futures_time)())['serverTime']
+    offset = clock.record(server_time, sent_ms, time.time() * 1000)
+    client.timestamp_offset = offset
+    return offset
+
+def verify_connectivity(client: Client, clock: ServerClock,
+                        futures_time: Optional[Callable[[], dict]] = None) -> int:
+    """The server time call verifies connectivity and measures the clock offset in one round trip"""
     try:
-        client.futures_ping()
-        logger.info(f"Connected to Binance Futures at {base_url}")
+        offset = sync_server_time(client, clock, futures_time)
+        logger.info(f"Connected to Binance Futures at {client.FUTURES_URL} (clock offset {offset} ms)")
+        return offset
     except BinanceAPIException as e:
-        if e.code == -1021:  # Timestamp error, but means endpoint is correct
-            logger.warning("Timestamp error, but endpoint is reachable")
-        else:
-            logger.error(f"Failed to connect: {e}")
-            raise
+        logger.error(f"Failed to connect: {e}")
+        raise
+
+async def verify_connectivity_async(client: AsyncClient, clock: ServerClock,
+                                    futures_time: Optional[Callable[[], Any]] = None) -> int:
+    try:
+        offset = await sync_server_time_async(client, clock, futures_time)
+        logger.info(f"Connected to Binance Futures at {client.FUTURES_URL} (async, clock offset {offset} ms)")
+        return offset
+    except Exception as e:
+        logger.error(f"Failed to connect: {e}")
+        await client.close_connection()
+        raise
+
+@traced
+def create_client(api_key: str, api_secret: str, transport: Optional[TransportConfig] = None,
+                  clock: Optional[ServerClock] = None, verify: Optional[bool] = None) -> Client:
+    """Futures client over the tuned session, with no network round trip unless `verify`"""
+    transport = transport or TransportConfig.from_settings(settings)
+    # Client() pings spot on construction, skip it and verify futures below over the tuned session
+    client = Client(api_key, api_secret, requests_params={'timeout': transport.timeout}, ping=False)
+    configure_session(client.session, transport)
+    client.session.hooks['response'].append(record_response)
+    client.REQUEST_RECVWINDOW = settings.recv_window
 
+    base_url = futures_base_url()
+    client.FUTURES_URL = base_url
+
+    if settings.verify_connectivity if verify is None else verify:
+        verify_connectivity(client, clock or ServerClock(settings.time_sync_interval))
+    # Otherwise the clock offset is measured by the first signed call
     return client
 
+@traced
+async def create_async_client(api_key: str, api_secret: str, transport: Optional[TransportConfig] = None,
+                              clock: Optional[ServerClock] = None, verify: Optional[bool] = None) -> AsyncClient:
+    transport = transport or TransportConfig.from_settings(settings)
+    requests_params, session_params = aiohttp_transport(transport)
+    session_params['trace_configs'] = [response_trace_config()]
+    # AsyncClient.create() pings the spot API, so build it directly and check futures instead
+    client = AsyncClient(api_key, api_secret, requests_params=requests_params, session_params=session_params)
+    client.REQUEST_RECVWINDOW = settings.recv_window
+
+    base_url = futures_base_url()
+    client.FUTURES_URL = base_url
+
+    if settings.verify_connectivity if verify is None else verify:
+        await verify_connectivity_async(client, clock or ServerClock(settings.time_sync_interval))
+    return client
+
+def batch_order_payload(params: dict) -> dict:
+    """The batchOrders endpoint expects every value as a string"""
+    payload = {}
+    for key, value in params.items():
+        if isinstance(value, bool):
+            payload[key] = 'true' if value else 'false'
+        elif isinstance(value, float):
+            # Avoid scientific notation such as 1e-05
+            payload[key] = f"{Decimal(repr(value)):f}"
+        else:
+            payload[key] = str(value)
+    return payload
+
+def _batch_size(batch_orders: list) -> int:
+    return len(batch_orders)
+
+def _default_governor() -> Optional[RateLimitGovernor]:
+    return get_rate_limit_governor() if settings.rate_limit_enabled else None
+
+def _configure_rate_limits(governor: Optional[RateLimitGovernor], exchange_info):
+    if governor is not None and isinstance(exchange_info, dict) and exchange_info.get('rateLimits'):
+        governor.configure(exchange_info['rateLimits'])
+
 class BinanceClient:
-    def __init__(self, api_key: str, api_secret: str):
-        self.client = create_client(api_key, api_secret)
+    def __init__(self, api_key: str, api_secret: str, transport: Optional[TransportConfig] = None,
+                 governor: Optional[RateLimitGovernor] = None, verify: Optional[bool] = None):
+        self.clock = ServerClock(settings.time_sync_interval)
+        self.governor = governor or _default_governor()
+        self.client = create_client(api_key, api_secret, transport, self.clock, verify=False)
+        if settings.verify_connectivity if verify is None else verify:
+            verify_connectivity(self.client, self.clock, self.futures_time)
+
+    def sync_time(self) -> int:
+        """Re-measure the server time offset now"""
+        return sync_server_time(self.client, self.clock, self.futures_time)
 
-    @log_io
+    def sync_time_in_background(self):
+        """Re-sync on a daemon thread, signed calls keep using the current offset meanwhile"""
+        if not self.clock.begin_sync():
+            return
+
+        def run():
+            try:
+                self.sync_time()
+            except Exception as e:
+                logger.warning(f"Server time re-sync failed: {e}")
+            finally:
+                self.clock.end_sync()
+
+        threading.Thread(target=run, name="time-sync", daemon=True).start()
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """Connections opened vs requests served per host, a low reuse ratio means TLS handshakes"""
+        return connection_stats(self.client.session)
+
+    @traced
+    @governed(weight=1)
+    def futures_time(self):
+        return self.client.futures_time()
+
+    @traced
+    @governed(weight=1)
     def futures_exchange_info(self):
         result = self.client.futures_exchange_info()
-        logger.debug(f"Exchange info result type: {type(result)}")
-        if isinstance(result, dict):
-            logger.debug(f"Exchange info keys: {list(result.keys())}")
+        _configure_rate_limits(self.governor, result)
         return result
 
-    @log_io
+    @traced
+    @idempotent_order
+    @clock_synced
+    @governed(weight=0, orders=1, priority=PRIORITY_ORDER)
     def futures_create_order(self, **params):
         return self.client.futures_create_order(**params)
 
-    @log_io
+    @traced
+    @idempotent_batch
+    @clock_synced
+    @governed(weight=5, orders=_batch_size, priority=PRIORITY_ORDER)
+    def futures_place_batch_order(self, batch_orders: list):
+        return self.client.futures_place_batch_order(
+            batchOrders=[batch_order_payload(p) for p in batch_orders]
+        )
+
+    @traced
+    @clock_synced
+    @governed(weight=1)
     def futures_get_order(self, **params):
         return self.client.futures_get_order(**params)
 
-    @log_io
+    @traced
+    @clock_synced
+    @governed(weight=1, priority=PRIORITY_CANCEL)
     def futures_cancel_order(self, **params):
         return self.client.futures_cancel_order(**params)
 
-    @log_io
+    @traced
+    @governed(weight=1)
     def futures_ping(self):
         return self.client.futures_ping()
+
+    @traced
+    @governed(weight=1)
+    def futures_symbol_ticker(self, **params):
+        return self.client.futures_symbol_ticker(**params)
+
+    @traced
+    @governed(weight=1)
+    def futures_stream_get_listen_key(self) -> str:
+        return self.client.futures_stream_get_listen_key()
+
+    @traced
+    @governed(weight=1)
+    def futures_stream_keepalive(self, listen_key: str):
+        return self.client.futures_stream_keepalive(listenKey=listen_key)
+
+def create_exchange_client(verify: Optional[bool] = None):
+    """BinanceClient, or the in-process paper-trading exchange when settings.exchange is "simulated" """
+    if settings.exchange == 'simulated':
+        if settings.user_data_stream:
+            raise ValueError("USER_DATA_STREAM needs EXCHANGE=binance, the simulated exchange has no user data stream")
+        from src.bot.simulator import SimulatedBinanceClient
+        return SimulatedBinanceClient.from_settings()
+    if settings.exchange != 'binance':
+        raise ValueError(f"Unknown exchange {settings.exchange!r}, expected 'binance' or 'simulated'")
+    return BinanceClient(settings.api_key, settings.api_secret, verify=verify)
+
+class AsyncBinanceClient:
+    """Asyncio counterpart of BinanceClient, use `await AsyncBinanceClient.create(...)`"""
+
+    def __init__(self, client: AsyncClient, governor: Optional[RateLimitGovernor] = None,
+                 clock: Optional[ServerClock] = None):
+        self.client = client
+        self.governor = governor or _default_governor()
+        self.clock = clock or ServerClock(settings.time_sync_interval)
+
+    @classmethod
+    async def create(cls, api_key: str, api_secret: str, transport: Optional[TransportConfig] = None,
+                     governor: Optional[RateLimitGovernor] = None,
+                     verify: Optional[bool] = None) -> "AsyncBinanceClient":
+        clock = ServerClock(settings.time_sync_interval)
+        client = cls(await create_async_client(api_key, api_secret, transport, clock, verify=False), governor, clock)
+        if settings.verify_connectivity if verify is None else verify:
+            await verify_connectivity_async(client.client, clock, client.futures_time)
+        return client
+
+    async def sync_time(self) -> int:
+        """Re-measure the server time offset now"""
+        return await sync_server_time_async(self.client, self.clock, self.futures_time)
+
+    async def close(self):
+        await self.client.close_connection()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @traced
+    @governed(weight=1)
+    async def futures_time(self):
+        return await self.client.futures_time()
+
+    @traced
+    @governed(weight=1)
+    async def futures_exchange_info(self):
+        result = await self.client.futures_exchange_info()
+        _configure_rate_limits(self.governor, result)
+        return result
+
+    @traced
+    @idempotent_order
+    @clock_synced
+    @governed(weight=0, orders=1, priority=PRIORITY_ORDER)
+    async def futures_create_order(self, **params):
+        return await self.client.futures_create_order(**params)
+
+    @traced
+    @idempotent_batch
+    @clock_synced
+    @governed(weight=5, orders=_batch_size, priority=PRIORITY_ORDER)
+    async def futures_place_batch_order(self, batch_orders: list):
+        return await self.client.futures_place_batch_order(
+            batchOrders=[batch_order_payload(p) for p in batch_orders]
+        )
+
+    @traced
+    @clock_synced
+    @governed(weight=1)
+    async def futures_get_order(self, **params):
+        return await self.client.futures_get_order(**params)
+
+    @traced
+    @clock_synced
+    @governed(weight=1, priority=PRIORITY_CANCEL)
+    async def futures_cancel_order(self, **params):
+        return await self.client.futures_cancel_order(**params)
+
+    @traced
+    @governed(weight=1)
+    async def futures_ping(self):
+        return await self.client.futures_ping()
@@ -0,0 +1,53 @@
+"""
+Exchange clock tracking for signed requests
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_ERROR = -1021  # timestamp outside recvWindow or ahead of the server
+DEFAULT_RESYNC_INTERVAL = 300.0
+
+class ServerClock:
+    """Offset between the local clock and the exchange clock, in milliseconds.
+
+    The offset is measured against the midpoint of the round trip, so half of
+    the latency is not counted as drift.
+    """
+
+    def __init__(self, resync_interval: float = DEFAULT_RESYNC_INTERVAL):
+        self.resync_interval = resync_interval
+        self.offset_ms = 0
+        self.round_trip_ms: Optional[float] = None
+        self.synced_at: Optional[float] = None  # monotonic seconds
+        self._lock = threading.Lock()
+        self._syncing = False
+
+    @property
+    def stale(self) -> bool:
+        return self.synced_at is None or time.monotonic() - self.synced_at > self.resync_interval
+
+    def record(self, server_time_ms: int, sent_ms: float, received_ms: float) -> int:
+        """Store the offset from one server time response and return it"""
+        offset = int(round(server_time_ms - (sent_ms + received_ms) / 2))
+        with self._lock:
+            self.offset_ms = offset
+            self.round_trip_ms = received_ms - sent_ms
+            self.synced_at = time.monotonic()
+        logger.debug(f"Server time offset {offset} ms (round trip {self.round_trip_ms:.0f} ms)")
+        return offset
+
+    def begin_sync(self) -> bool:
+        """Claim the next background re-sync, False when one is already running"""
+        with self._lock:
+            if self._syncing:
+                return False
+            self._syncing = True
+            return True
+
+    def end_sync(self):
+        with self._lock:
+            self._syncing = False
@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
+from typing import Dict
 
 load_dotenv()
 
@@ -16,9 +17,57 @@ class Settings(BaseSettings):
     base_url: str = Field(
         default="https://testnet.binancefuture.com", alias="BINANCE_FUTURES_BASE_URL"
     )
-    recv_window: int = 5000
+    ws_url: str = Field(
+        default="wss://fstream.binancefuture.com", alias="BINANCE_FUTURES_WS_URL"
+    )
+    # "binance" for the REST API, "simulated" for the in-process paper-trading exchange
+    exchange: str = "binance"
+    simulator_prices: Dict[str, float] = {}  # starting prices, e.g. {"BTCUSDT": 95000}
+    # Client call tracing: share of calls whose payload is kept for DEBUG logs, and its max length
+    trace_sample_rate: float = 0.0
+    trace_payload_limit: int = 2000
+
+    # Check connectivity when a client is created, otherwise the first request does
+    verify_connectivity: bool = False
+
+    recv_window: int = 5000  # ms a signed request stays valid, sent with every signed call
+    time_sync_interval: int = 300  # seconds between server time offset re-syncs
     default_symbol: str = "BTCUSDT"
 
+    # REST transport: connections kept per host, timeouts in seconds, TCP keep-alive
+    http_pool_maxsize: int = 16
+    http_pool_block: bool = False
+    http_connect_timeout: float = 3.05
+    http_read_timeout: float = 10.0
+    http_connect_retries: int = 2
+    http_tcp_keepalive: bool = True
+
+    # New orders are retried after timeouts and 5xx, looked up by client order ID first
+    order_retry_attempts: int = 3
+    order_retry_backoff: float = 0.25  # seconds before the first retry, doubled after each
+
+    # Client-side rate limiting, requests are delayed before reaching this share of each limit
+    rate_limit_enabled: bool = True
+    rate_limit_headroom: float = 0.9
+
+    # Exchange info cache shared by all processes on this host
+    exchange_info_cache_file: str = "exchange_info.json"
+    exchange_info_max_age: int = 3600  # seconds before a background refresh
+
+    # Write-behind persistence for order history and activity log
+    db_write_behind: bool = False
+    db_write_batch_size: int = 200
+    db_write_interval_ms: int = 5
+    db_write_queue_size: int = 10000
+
+    # Push order updates from the user-data stream into the database (web UI)
+    user_data_stream: bool = False
+
+    # Streamed price cache behind /api/price: "markPrice@1s" or "bookTicker"
+    price_stream: str = "markPrice@1s"
+    price_max_age: float = 10.0  # seconds before falling back to a REST ticker
+    price_stream_max_symbols: int = 100  # streamed symbols, Binance allows 200 streams per connection
+
 
 def get_settings() -> Settings:
     return Settings()
@@ -1,23 +1,233 @@
 """
 Database module for storing order history and logs
 """
+import ast
+import atexit
+import base64
+import json
 import logging
-from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+import os
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import (create_engine, event, func, select, tuple_, update, Boolean, Column, Integer, String, Float, DateTime,
+                        Text, Index, LargeBinary)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, StaticPool
+
+try:
+    import msgpack
+except ImportError:  # optional, JSON is the default codec
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+# Production profile applied to every connection. WAL lets readers run
+# alongside the writer, and NORMAL sync is durable in WAL mode except for
+# the last commits on power loss.
+SQLITE_PRAGMAS: Dict[str, object] = {
+    'auto_vacuum': 'INCREMENTAL',  # new databases only, freed pages are returned by incremental_vacuum
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,       # KiB, ~64 MB page cache
+    'mmap_size': 268435456,     # 256 MB memory-mapped I/O
+    'busy_timeout': 5000,       # ms to wait on a locked database
+    'temp_store': 'MEMORY',
+}
+DEFAULT_DB_PATH = "trading_bot.db"
+SQLITE_POOL_SIZE = 5
+SQLITE_MAX_OVERFLOW = 10
+ACTIVITY_RETENTION_DAYS = 30  # raw activity_log rows older than this are rolled up and deleted
+RETENTION_BATCH_SIZE = 500
+STATISTICS_DAYS = 30  # days of per-day statistics returned by default
+
+# Stored API responses are one tag byte followed by the payload: j/m for
+# compact JSON or msgpack, J/M for the same compressed with zlib against a
+# preset dictionary of the keys Binance order responses repeat in every row.
+# Rows written before this format are the repr() text and still decode.
+RESPONSE_CODECS = ('json', 'msgpack')
+RESPONSE_COMPRESS_MIN = 64  # bytes, smaller payloads are stored as is
+_RESPONSE_ZDICT = (
+    b'"updateTime":"goodTillDate":0,"selfTradePreventionMode":"NONE","priceMatch":"NONE",'
+    b'"origType":"LIMIT","priceProtect":false,"workingType":"CONTRACT_PRICE","stopPrice":"0.00",'
+    b'"positionSide":"BOTH","side":"BUY","closePosition":false,"reduceOnly":false,"type":"MARKET",'
+    b'"timeInForce":"GTC","cumQuote":"0.00000","cumQty":"0","executedQty":"0","origQty":"0",'
+    b'"avgPrice":"0.00","price":"0","clientOrderId":"ctb-","status":"NEW","symbol":"BTCUSDT","orderId":'
+)
+
+def pack_response(data: Optional[dict], codec: str = 'json') -> Optional[bytes]:
+    """Encode an API response for the response_data column"""
+    if not data:
+        return None
+    if codec == 'msgpack':
+        tag, payload = b'm', msgpack.packb(data, use_bin_type=True)
+    else:
+        tag, payload = b'j', json.dumps(data, separators=(',', ':'), default=str).encode()
+    if len(payload) < RESPONSE_COMPRESS_MIN:
+        return tag + payload
+    compressor = zlib.compressobj(6, zdict=_RESPONSE_ZDICT)
+    return tag.upper() + compressor.compress(payload) + compressor.flush()
+
+def unpack_response(raw: Any) -> Optional[dict]:
+    """Decode a response_data value, None when empty or unreadable"""
+    if not raw:
+        return None
+    try:
+        if isinstance(raw, str):
+            # Written as str(dict) before responses were encoded
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return ast.literal_eval(raw)
+        raw = bytes(raw)
+        tag, payload = raw[:1], raw[1:]
+        if tag in (b'J', b'M'):
+            payload = zlib.decompressobj(zdict=_RESPONSE_ZDICT).decompress(payload)
+        if tag in (b'm', b'M'):
+            if msgpack is None:
+                raise ValueError("msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload)
+    except (ValueError, TypeError, SyntaxError, zlib.error) as e:
+        logger.warning(f"Unreadable response_data: {e}")
+        return None
+
+def _is_stale(order: "OrderHistory", status_data: dict) -> bool:
+    """True when `status_data` is older than what the row holds, by updateTime then executedQty"""
+    update_time = status_data.get('updateTime')
+    if not update_time or not order.exchange_update_time:
+        return False
+    executed_qty = float(status_data.get('executedQty', order.executed_qty or 0))
+    return (int(update_time), executed_qty) < (order.exchange_update_time, order.executed_qty or 0)
+
+def _order_data_from_status(status_data: dict) -> dict:
+    """Order fields of a REST order, for recording one first seen through an update"""
+    def positive(key):
+        value = float(status_data.get(key) or 0)
+        return value or None
+
+    return {
+        'symbol': status_data.get('symbol'),
+        'side': status_data.get('side'),
+        'type': status_data.get('type'),
+        'quantity': float(status_data.get('origQty') or 0),
+        'price': positive('price'),
+        'stopPrice': positive('stopPrice'),
+        'timeInForce': status_data.get('timeInForce'),
+        'newClientOrderId': status_data.get('clientOrderId'),
+    }
+
+# Response fields copied into their own columns so they can be filtered in SQL
+def _response_columns(data: dict) -> Dict[str, Any]:
+    columns = {}
+    if data.get('cumQuote') is not None:
+        columns['cum_quote'] = float(data['cumQuote'])
+    if data.get('positionSide'):
+        columns['position_side'] = data['positionSide']
+    if data.get('reduceOnly') is not None:
+        columns['reduce_only'] = bool(data['reduceOnly'])
+    if data.get('updateTime'):
+        columns['exchange_update_time'] = int(data['updateTime'])
+    return columns
+
+def _apply_pragmas(engine: Engine, pragmas: Dict[str, object]):
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def create_sqlite_engine(db_path: str, read_only: bool = False,
+                         pragmas: Optional[Dict[str, object]] = None) -> Engine:
+    """Engine with the tuned pragma profile and a thread-safe connection pool"""
+    pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+    busy_timeout = float(pragmas.get('busy_timeout', 5000)) / 1000
+
+    if db_path == ':memory:':
+        # One shared connection, WAL and read-only mode do not apply
+        pragmas.pop('journal_mode', None)
+        engine = create_engine(
+            'sqlite://', echo=False, poolclass=StaticPool,
+            connect_args={'check_same_thread': False},
+        )
+    elif read_only:
+        # Only the journal and vacuum modes are writes, they are already set by the writer
+        pragmas.pop('journal_mode', None)
+        pragmas.pop('auto_vacuum', None)
+        pragmas['query_only'] = 'ON'
+        engine = create_engine(
+            f'sqlite:///file:{os.path.abspath(db_path)}?mode=ro&uri=true', echo=False,
+            poolclass=QueuePool, pool_size=SQLITE_POOL_SIZE, max_overflow=SQLITE_MAX_OVERFLOW,
+            connect_args={'check_same_thread': False, 'timeout': busy_timeout},
+        )
+    else:
+        engine = create_engine(
+            f'sqlite:///{db_path}', echo=False,
+            poolclass=QueuePool, pool_size=SQLITE_POOL_SIZE, max_overflow=SQLITE_MAX_OVERFLOW,
+            connect_args={'check_same_thread': False, 'timeout': busy_timeout},
+        )
+
+    _apply_pragmas(engine, pragmas)
+    return engine
+
 Base = declarative_base()
 
+class DatabaseSchemaError(RuntimeError):
+    """Read-only database file is missing or was written by an older version"""
+
+def encode_cursor(timestamp: Optional[datetime], row_id: int) -> str:
+    """Opaque pagination cursor for the row a page ended on"""
+    raw = f"{timestamp.isoformat() if timestamp else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _keyset_page(query, time_column, id_column, limit: int, cursor: Optional[str]):
+    """Newest-first page seeking past the cursor instead of using OFFSET"""
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(time_column, id_column) < tuple_(timestamp, row_id))
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_column.key), last.id)
+    return rows, next_cursor
+
 class OrderHistory(Base):
     """Order history table"""
     __tablename__ = 'order_history'
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest first, optionally per symbol
+        Index('ix_order_history_created_at_id', 'created_at', 'id'),
+        Index('ix_order_history_symbol_created_at_id', 'symbol', 'created_at', 'id'),
+        Index('ix_order_history_status', 'status'),
+        # Live feeds walk the change version forward from a resume cursor
+        Index('ix_order_history_version', 'version'),
+        # One row per submitted order, rows from before client IDs were generated stay NULL
+        Index('ux_order_history_client_order_id', 'client_order_id', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     order_id = Column(String, nullable=False, index=True)
+    client_order_id = Column(String, nullable=True)  # newClientOrderId sent with the order
     symbol = Column(String, nullable=False, index=True)
     side = Column(String, nullable=False)
     order_type = Column(String, nullable=False)
@@ -28,16 +238,38 @@ class OrderHistory(Base):
     status = Column(String, nullable=False)
     executed_qty = Column(Float, default=0.0)
     avg_price = Column(Float, nullable=True)
+    cum_quote = Column(Float, nullable=True)
+    position_side = Column(String, nullable=True)
+    reduce_only = Column(Boolean, nullable=True)
+    exchange_update_time = Column(Integer, nullable=True)  # updateTime of the last response, ms
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    response_data = Column(Text, nullable=True)  # JSON response from API
-    
+    response_data = Column(LargeBinary, nullable=True)  # last API response, see pack_response
+    version = Column(Integer, nullable=True)  # change number in commit order, see _next_order_version
+
+    @property
+    def response(self) -> Optional[dict]:
+        """The last API response, decoded on access"""
+        return unpack_response(self.response_data)
+
     def __repr__(self):
         return f"<OrderHistory(order_id={self.order_id}, symbol={self.symbol}, status={self.status})>"
 
+def _next_order_version():
+    """Next order change number, evaluated by SQLite inside the INSERT or UPDATE.
+
+    Writes hold the database write lock until they commit, so the numbers
+    follow commit order, unlike updated_at which is taken before the lock.
+    """
+    versions = OrderHistory.__table__.alias('versions')
+    return select(func.coalesce(func.max(versions.c.version), 0) + 1).scalar_subquery()
+
 class ActivityLog(Base):
     """Activity log table for tracking all actions"""
     __tablename__ = 'activity_log'
+    __table_args__ = (
+        Index('ix_activity_log_timestamp_id', 'timestamp', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
@@ -52,151 +284,718 @@ class ActivityLog(Base):
     def __repr__(self):
         return f"<ActivityLog(action={self.action}, status={self.status}, timestamp={self.timestamp})>"
 
+class ActivityRollup(Base):
+    """Activity counts per hour, action and status, kept for rows removed by retention"""
+    __tablename__ = 'activity_rollup'
+
+    hour = Column(String, primary_key=True)  # YYYY-MM-DD HH:00 of the rows' timestamp
+    action = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ActivityRollup(hour={self.hour}, action={self.action}, status={self.status}, count={self.count})>"
+
+class OrderStats(Base):
+    """Order counts per symbol, day and status, kept current on every order write"""
+    __tablename__ = 'order_stats'
+
+    symbol = Column(String, primary_key=True)
+    day = Column(String, primary_key=True, index=True)  # YYYY-MM-DD of the order's created_at
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<OrderStats(symbol={self.symbol}, day={self.day}, status={self.status}, count={self.count})>"
+
+PENDING_STATUSES = ('NEW', 'PARTIALLY_FILLED')
+
+def _summarize(counts: Dict[str, int]) -> dict:
+    total = sum(counts.values())
+    filled = counts.get('FILLED', 0)
+    return {
+        'total_orders': total,
+        'filled_orders': filled,
+        'cancelled_orders': counts.get('CANCELED', 0),
+        'pending_orders': sum(counts.get(s, 0) for s in PENDING_STATUSES),
+        'success_rate': (filled / total * 100) if total > 0 else 0
+    }
+
 class Database:
     """Database manager"""
     
-    def __init__(self, db_path: str = "trading_bot.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, read_only: bool = False,
+                 pragmas: Optional[Dict[str, object]] = None, response_codec: str = 'json'):
+        if response_codec not in RESPONSE_CODECS:
+            raise ValueError(f"Unknown response codec {response_codec!r}, expected one of {RESPONSE_CODECS}")
+        if response_codec == 'msgpack' and msgpack is None:
+            raise ImportError("The msgpack response codec needs the msgpack package")
         self.db_path = db_path
-        self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
-        Base.metadata.create_all(self.engine)
-        self.SessionLocal = sessionmaker(bind=self.engine)
-        logger.info(f"Database initialized at {db_path}")
+        self.read_only = read_only
+        self.response_codec = response_codec
+        self._writer: Optional[WriteBehindWriter] = None
+        self._change_seq = 0
+        self._changed = threading.Condition()
+
+        if read_only:
+            # Viewers never write, not even the schema, so they cannot block the bot
+            if db_path != ':memory:' and not os.path.exists(db_path):
+                raise DatabaseSchemaError(f"No database at {db_path} yet, run the bot first")
+            self.engine = None
+            self.SessionLocal = None
+        else:
+            self.engine = create_sqlite_engine(db_path, pragmas=pragmas)
+            self.SessionLocal = sessionmaker(bind=self.engine)
+            self._migrate()
+
+        # Queries go through a separate read-only pool so they never hold the write lock
+        if db_path == ':memory:':
+            self.read_engine = self.engine
+        else:
+            self.read_engine = create_sqlite_engine(db_path, read_only=True, pragmas=pragmas)
+        self.ReadSessionLocal = sessionmaker(bind=self.read_engine)
+        if read_only:
+            self._check_schema()
+        logger.info(f"Database initialized at {db_path}{' (read-only)' if read_only else ''}")
     
+    def _migrate(self):
+        """Bring the schema up to date, tables, columns and indexes added since the file was created"""
+        Base.metadata.create_all(self.engine)
+        self._ensure_columns()
+        self._ensure_indexes()
+        self._backfill_versions()
+        self._backfill_statistics()
+
+    def _check_schema(self):
+        """Fail early when the file predates tables or columns the queries need"""
+        missing = []
+        with self.read_engine.connect() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+                if not existing:
+                    missing.append(table.name)
+                else:
+                    missing.extend(f"{table.name}.{column.name}" for column in table.columns
+                                   if column.name not in existing)
+        if missing:
+            raise DatabaseSchemaError(
+                f"{self.db_path} was written by an older version (missing {', '.join(missing)}), "
+                f"run the bot or `python -m src.db_viewer migrate` once to upgrade it")
+
+    def _ensure_columns(self):
+        """create_all skips tables that already exist, so add nullable columns introduced later"""
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+                for column in table.columns:
+                    if column.name not in existing and column.nullable:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                        logger.info(f"Added column {table.name}.{column.name}")
+
+    def _ensure_indexes(self):
+        """create_all skips tables that already exist, so add indexes introduced later"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+
+    def _backfill_versions(self):
+        """Rows written before order_history.version existed are numbered in updated_at order"""
+        with self.engine.begin() as conn:
+            ids = [row[0] for row in conn.exec_driver_sql(
+                "SELECT id FROM order_history WHERE version IS NULL ORDER BY updated_at, id")]
+            if not ids:
+                return
+            start = conn.exec_driver_sql("SELECT COALESCE(MAX(version), 0) FROM order_history").scalar()
+            conn.exec_driver_sql("UPDATE order_history SET version = ? WHERE id = ?",
+                                 [(start + n, row_id) for n, row_id in enumerate(ids, 1)])
+        logger.info(f"Numbered {len(ids)} order changes")
+
     def get_session(self) -> Session:
         """Get a new database session"""
+        if self.read_only:
+            raise RuntimeError("Database was opened read-only")
         return self.SessionLocal()
+
+    def get_read_session(self) -> Session:
+        """Get a new session on the read-only engine"""
+        return self.ReadSessionLocal()
     
-    def save_order(self, order_data: dict, response_data: dict = None) -> OrderHistory:
-        """Save order to database"""
+    def enable_write_behind(self, max_batch: int = 200, flush_interval_ms: int = 5,
+                            max_queue: int = 10000) -> "WriteBehindWriter":
+        """Queue writes and commit them from a background thread in batches"""
+        if self._writer is None:
+            self._writer = WriteBehindWriter(self, max_batch=max_batch,
+                                             flush_interval=flush_interval_ms / 1000,
+                                             max_queue=max_queue)
+            logger.info(f"Write-behind enabled (batch={max_batch}, interval={flush_interval_ms}ms, queue={max_queue})")
+        return self._writer
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued writes are committed"""
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def close(self):
+        """Flush pending writes and stop the background writer"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    @property
+    def change_seq(self) -> int:
+        """Counter bumped after every commit made through this instance"""
+        return self._change_seq
+
+    def notify_change(self):
+        with self._changed:
+            self._change_seq += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, seq: int, timeout: Optional[float] = None) -> int:
+        """Block until change_seq moves past `seq` or the timeout expires, returns the current seq.
+
+        Only commits from this process are signalled, callers should still poll
+        on timeout to pick up writes from other processes.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._change_seq != seq, timeout)
+            return self._change_seq
+
+    def _run_write(self, op: Callable, *args, **kwargs):
+        """Run a write op in its own transaction, or queue it in write-behind mode"""
+        if self._writer is not None:
+            self._writer.submit(op, *args, **kwargs)
+            return None
         session = self.get_session()
         try:
-            order = OrderHistory(
-                order_id=str(response_data.get('orderId', 'pending')) if response_data else 'pending',
-                symbol=order_data.get('symbol'),
-                side=order_data.get('side'),
-                order_type=order_data.get('type'),
-                quantity=order_data.get('quantity'),
-                price=order_data.get('price'),
-                stop_price=order_data.get('stopPrice'),
-                time_in_force=order_data.get('timeInForce'),
-                status=response_data.get('status', 'PENDING') if response_data else 'PENDING',
-                executed_qty=float(response_data.get('executedQty', 0)) if response_data else 0,
-                avg_price=float(response_data.get('avgPrice', 0)) if response_data and response_data.get('avgPrice') else None,
-                response_data=str(response_data) if response_data else None
-            )
-            session.add(order)
+            result = op(session, *args, **kwargs)
             session.commit()
-            session.refresh(order)
-            logger.info(f"Order saved to database: {order.order_id}")
-            return order
-        except Exception as e:
+            self.notify_change()
+            if result is not None:
+                session.refresh(result)
+            return result
+        except Exception:
             session.rollback()
-            logger.error(f"Failed to save order: {e}")
             raise
         finally:
             session.close()
-    
+
+    def _bump_stats(self, session: Session, symbol: str, created_at: datetime, status: str, delta: int):
+        stmt = sqlite_insert(OrderStats).values(
+            symbol=symbol or '', day=created_at.date().isoformat(), status=status, count=delta
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=['symbol', 'day', 'status'],
+            set_={'count': OrderStats.count + delta},
+        ))
+
+    def _add_order(self, session: Session, order_data: dict, response_data: dict = None) -> OrderHistory:
+        client_order_id = order_data.get('newClientOrderId') or (response_data or {}).get('clientOrderId')
+        if client_order_id:
+            existing = session.query(OrderHistory).filter_by(client_order_id=client_order_id).first()
+            if existing is not None:
+                # Saved again under the same client order ID, it is the same order
+                if response_data and 'orderId' in response_data:
+                    existing.order_id = str(response_data['orderId'])
+                return self._apply_status(session, existing, response_data or {})
+
+        columns = _response_columns(response_data or {})
+        if 'reduce_only' not in columns and order_data.get('reduceOnly') is not None:
+            columns['reduce_only'] = bool(order_data['reduceOnly'])
+        now = datetime.utcnow()
+        order = OrderHistory(
+            created_at=now,
+            updated_at=now,
+            order_id=str(response_data.get('orderId', 'pending')) if response_data else 'pending',
+            client_order_id=client_order_id,
+            symbol=order_data.get('symbol'),
+            side=order_data.get('side'),
+            order_type=order_data.get('type'),
+            quantity=order_data.get('quantity'),
+            price=order_data.get('price'),
+            stop_price=order_data.get('stopPrice'),
+            time_in_force=order_data.get('timeInForce'),
+            status=response_data.get('status', 'PENDING') if response_data else 'PENDING',
+            executed_qty=float(response_data.get('executedQty', 0)) if response_data else 0,
+            avg_price=float(response_data.get('avgPrice', 0)) if response_data and response_data.get('avgPrice') else None,
+            response_data=pack_response(response_data, self.response_codec),
+            version=_next_order_version(),
+            **columns,
+        )
+        session.add(order)
+        self._bump_stats(session, order.symbol, now, order.status, 1)
+        return order
+
+    def _apply_order_status(self, session: Session, order_id: str, status_data: dict) -> Optional[OrderHistory]:
+        order = session.query(OrderHistory).filter_by(order_id=str(order_id)).first()
+        if order:
+            self._apply_status(session, order, status_data)
+        return order
+
+    def _apply_status(self, session: Session, order: OrderHistory, status_data: dict) -> OrderHistory:
+        if _is_stale(order, status_data):
+            logger.debug(f"Ignoring stale update for order {order.order_id}")
+            return order
+        new_status = status_data.get('status', order.status)
+        if new_status != order.status:
+            created_at = order.created_at or datetime.utcnow()
+            self._bump_stats(session, order.symbol, created_at, order.status, -1)
+            self._bump_stats(session, order.symbol, created_at, new_status, 1)
+        order.status = new_status
+        order.executed_qty = float(status_data.get('executedQty', order.executed_qty))
+        if status_data.get('avgPrice'):
+            order.avg_price = float(status_data.get('avgPrice'))
+        for column, value in _response_columns(status_data).items():
+            setattr(order, column, value)
+        packed = pack_response(status_data, self.response_codec)
+        if packed is not None and packed != order.response_data:
+            order.response_data = packed
+        # A status check that found nothing new leaves the row, and updated_at, alone
+        if session.is_modified(order):
+            order.updated_at = datetime.utcnow()
+            order.version = _next_order_version()
+        return order
+
+    def _add_activity(self, session: Session, **fields) -> None:
+        if fields.get('order_id'):
+            fields['order_id'] = str(fields['order_id'])
+        session.add(ActivityLog(**fields))
+
+    def save_order(self, order_data: dict, response_data: dict = None) -> Optional[OrderHistory]:
+        """Save order to database, returns None when the write is queued"""
+        try:
+            order = self._run_write(self._add_order, order_data, response_data)
+            if order is not None:
+                logger.info(f"Order saved to database: {order.order_id}")
+            return order
+        except Exception as e:
+            logger.error(f"Failed to save order: {e}")
+            raise
+
+    def _upsert_order_status(self, session: Session, status_data: dict) -> OrderHistory:
+        order = session.query(OrderHistory).filter_by(order_id=str(status_data.get('orderId'))).first()
+        if order is not None:
+            return self._apply_status(session, order, status_data)
+        # Not saved under its order ID yet, _add_order matches it by client order ID or inserts it
+        return self._add_order(session, _order_data_from_status(status_data), status_data)
+
+    def apply_order_update(self, status_data: dict) -> Optional[OrderHistory]:
+        """Apply an order in REST form (orderId, clientOrderId, status, ...) pushed by the exchange.
+
+        Unlike update_order_status, an order that place_order has not saved yet
+        is recorded from the update, and place_order's later save merges into
+        it by client order ID. Updates older than the stored one are ignored.
+        """
+        try:
+            return self._run_write(self._upsert_order_status, status_data)
+        except Exception as e:
+            logger.error(f"Failed to apply order update: {e}")
+            raise
+
     def update_order_status(self, order_id: str, status_data: dict) -> Optional[OrderHistory]:
         """Update order status"""
-        session = self.get_session()
         try:
-            order = session.query(OrderHistory).filter_by(order_id=str(order_id)).first()
-            if order:
-                order.status = status_data.get('status', order.status)
-                order.executed_qty = float(status_data.get('executedQty', order.executed_qty))
-                if status_data.get('avgPrice'):
-                    order.avg_price = float(status_data.get('avgPrice'))
-                order.updated_at = datetime.utcnow()
-                order.response_data = str(status_data)
-                session.commit()
-                session.refresh(order)
+            order = self._run_write(self._apply_order_status, order_id, status_data)
+            if order is not None:
                 logger.info(f"Order {order_id} updated in database")
-                return order
-            return None
+            return order
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to update order: {e}")
             raise
-        finally:
-            session.close()
-    
-    def get_order_history(self, symbol: Optional[str] = None, limit: int = 100) -> List[OrderHistory]:
+
+    def get_order_history(self, symbol: Optional[str] = None, limit: int = 100,
+                          cursor: Optional[str] = None) -> List[OrderHistory]:
         """Get order history"""
-        session = self.get_session()
+        return self.get_order_history_page(symbol=symbol, limit=limit, cursor=cursor)[0]
+
+    def get_order_history_page(self, symbol: Optional[str] = None, limit: int = 100,
+                               cursor: Optional[str] = None) -> Tuple[List[OrderHistory], Optional[str]]:
+        """Get one page of order history, newest first, and the cursor of the next page"""
+        session = self.get_read_session()
         try:
             query = session.query(OrderHistory)
             if symbol:
                 query = query.filter_by(symbol=symbol)
-            orders = query.order_by(OrderHistory.created_at.desc()).limit(limit).all()
-            return orders
+            return _keyset_page(query, OrderHistory.created_at, OrderHistory.id, limit, cursor)
         finally:
             session.close()
     
+    def get_latest_order_version(self) -> int:
+        """Version of the most recent order change, 0 when there are none"""
+        session = self.get_read_session()
+        try:
+            return session.query(func.max(OrderHistory.version)).scalar() or 0
+        finally:
+            session.close()
+
+    def get_orders_changed_since(self, version: int = 0,
+                                 limit: int = 100) -> Tuple[List[OrderHistory], int]:
+        """Orders created or updated after `version` in commit order, and the version of the last one"""
+        session = self.get_read_session()
+        try:
+            rows = session.query(OrderHistory).filter(
+                OrderHistory.version > version,
+            ).order_by(OrderHistory.version).limit(limit).all()
+            return rows, (rows[-1].version if rows else version)
+        finally:
+            session.close()
+
     def get_order_by_id(self, order_id: str) -> Optional[OrderHistory]:
         """Get order by ID"""
-        session = self.get_session()
+        session = self.get_read_session()
         try:
             order = session.query(OrderHistory).filter_by(order_id=str(order_id)).first()
             return order
         finally:
             session.close()
     
+    def get_order_by_client_id(self, client_order_id: str) -> Optional[OrderHistory]:
+        """Get order by the client order ID it was submitted with"""
+        session = self.get_read_session()
+        try:
+            return session.query(OrderHistory).filter_by(client_order_id=client_order_id).first()
+        finally:
+            session.close()
+
     def log_activity(self, action: str, status: str, symbol: Optional[str] = None, 
                     order_id: Optional[str] = None, message: Optional[str] = None,
                     error_details: Optional[str] = None, user_interface: Optional[str] = None):
         """Log activity"""
-        session = self.get_session()
         try:
-            log = ActivityLog(
+            self._run_write(
+                self._add_activity,
                 action=action,
                 symbol=symbol,
-                order_id=str(order_id) if order_id else None,
+                order_id=order_id,
                 status=status,
                 message=message,
                 error_details=error_details,
                 user_interface=user_interface
             )
-            session.add(log)
-            session.commit()
             logger.debug(f"Activity logged: {action} - {status}")
         except Exception as e:
-            session.rollback()
             logger.error(f"Failed to log activity: {e}")
+    
+    def get_activity_logs(self, limit: int = 100, cursor: Optional[str] = None) -> List[ActivityLog]:
+        """Get activity logs"""
+        return self.get_activity_logs_page(limit=limit, cursor=cursor)[0]
+
+    def get_activity_logs_page(self, limit: int = 100,
+                               cursor: Optional[str] = None) -> Tuple[List[ActivityLog], Optional[str]]:
+        """Get one page of activity logs, newest first, and the cursor of the next page"""
+        session = self.get_read_session()
+        try:
+            query = session.query(ActivityLog)
+            return _keyset_page(query, ActivityLog.timestamp, ActivityLog.id, limit, cursor)
         finally:
             session.close()
     
-    def get_activity_logs(self, limit: int = 100) -> List[ActivityLog]:
-        """Get activity logs"""
+    def get_activity_logs_after(self, last_id: Optional[int] = None, limit: int = 100) -> List[ActivityLog]:
+        """Activity logs with an id above `last_id`, oldest first"""
+        session = self.get_read_session()
+        try:
+            query = session.query(ActivityLog)
+            if last_id is not None:
+                query = query.filter(ActivityLog.id > last_id)
+            return query.order_by(ActivityLog.id).limit(limit).all()
+        finally:
+            session.close()
+
+    def get_last_activity_id(self) -> int:
+        session = self.get_read_session()
+        try:
+            return session.query(func.max(ActivityLog.id)).scalar() or 0
+        finally:
+            session.close()
+
+    def apply_retention(self, max_age_days: float = ACTIVITY_RETENTION_DAYS,
+                        batch_size: int = RETENTION_BATCH_SIZE, vacuum_pages: int = 0) -> Dict[str, int]:
+        """Roll activity_log rows older than `max_age_days` into activity_rollup and delete them.
+
+        Each batch of `batch_size` rows is rolled up and deleted in one short
+        transaction, so order writes are never blocked for long and an
+        interrupted run leaves nothing counted twice. Freed pages are then
+        released with incremental_vacuum, at most `vacuum_pages` (0 for all).
+        """
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+        hour = func.strftime('%Y-%m-%d %H:00', ActivityLog.timestamp)
+        deleted = 0
+        while True:
+            session = self.get_session()
+            try:
+                ids = [row_id for (row_id,) in session.query(ActivityLog.id)
+                       .filter(ActivityLog.timestamp < cutoff)
+                       .order_by(ActivityLog.timestamp, ActivityLog.id).limit(batch_size)]
+                if not ids:
+                    break
+                grouped = session.query(hour, ActivityLog.action, ActivityLog.status, func.count()).filter(
+                    ActivityLog.id.in_(ids)).group_by(hour, ActivityLog.action, ActivityLog.status)
+                stmt = sqlite_insert(ActivityRollup).from_select(['hour', 'action', 'status', 'count'], grouped)
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=['hour', 'action', 'status'],
+                    set_={'count': ActivityRollup.count + stmt.excluded['count']},
+                ))
+                session.query(ActivityLog).filter(ActivityLog.id.in_(ids)).delete(synchronize_session=False)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            deleted += len(ids)
+
+        if deleted:
+            self.notify_change()
+            logger.info(f"Rolled up and deleted {deleted} activity log rows older than {max_age_days} days")
+        return {'deleted': deleted, 'vacuumed_pages': self.incremental_vacuum(vacuum_pages)}
+
+    def incremental_vacuum(self, max_pages: int = 0) -> int:
+        """Return free pages to the filesystem, up to `max_pages` (0 for all), returns pages freed.
+
+        Only databases created with auto_vacuum=INCREMENTAL support this, older
+        files need one full VACUUM first (`vacuum()`).
+        """
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:  # INCREMENTAL
+                logger.info("Incremental vacuum is off for this database, run a full VACUUM once to enable it")
+                return 0
+            before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+            conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(max_pages)})")
+            return before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+    def vacuum(self):
+        """Rebuild the file with a full VACUUM, switching older databases to incremental auto-vacuum"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        logger.info("Database vacuumed")
+
+    def get_activity_rollup(self, since: Optional[datetime] = None, limit: int = 100) -> List[ActivityRollup]:
+        """Hourly activity counts, newest first"""
+        session = self.get_read_session()
+        try:
+            query = session.query(ActivityRollup)
+            if since is not None:
+                query = query.filter(ActivityRollup.hour >= since.strftime('%Y-%m-%d %H:00'))
+            return query.order_by(ActivityRollup.hour.desc(), ActivityRollup.action,
+                                  ActivityRollup.status).limit(limit).all()
+        finally:
+            session.close()
+
+    def get_statistics(self, days: Optional[int] = STATISTICS_DAYS) -> dict:
+        """Get trading statistics with per-symbol and per-day breakdowns.
+
+        Counts are summed in SQL, and only the last `days` days (all of them
+        when None) are broken down per day, so the cost does not grow with history.
+        """
+        session = self.get_read_session()
+        try:
+            symbol_rows = session.query(
+                OrderStats.symbol, OrderStats.status, func.sum(OrderStats.count),
+            ).group_by(OrderStats.symbol, OrderStats.status).all()
+            day_query = session.query(OrderStats.day, OrderStats.status, func.sum(OrderStats.count))
+            if days is not None:
+                since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+                day_query = day_query.filter(OrderStats.day >= since)
+            day_rows = day_query.group_by(OrderStats.day, OrderStats.status).all()
+        finally:
+            session.close()
+
+        totals: Dict[str, int] = {}
+        by_symbol: Dict[str, Dict[str, int]] = {}
+        by_day: Dict[str, Dict[str, int]] = {}
+        for symbol, status, count in symbol_rows:
+            totals[status] = totals.get(status, 0) + count
+            by_symbol.setdefault(symbol, {})[status] = count
+        for day, status, count in day_rows:
+            by_day.setdefault(day, {})[status] = count
+
+        stats = _summarize(totals)
+        stats['by_symbol'] = {symbol: _summarize(counts) for symbol, counts in sorted(by_symbol.items())}
+        stats['by_day'] = {day: _summarize(counts) for day, counts in sorted(by_day.items())}
+        return stats
+
+    def rebuild_statistics(self):
+        """Recompute order_stats from order_history with one grouped query"""
         session = self.get_session()
         try:
-            logs = session.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(limit).all()
-            return logs
+            session.query(OrderStats).delete()
+            grouped = session.query(
+                func.coalesce(OrderHistory.symbol, ''),
+                func.date(OrderHistory.created_at),
+                OrderHistory.status,
+                func.count(),
+            ).group_by(OrderHistory.symbol, func.date(OrderHistory.created_at), OrderHistory.status)
+            session.execute(
+                sqlite_insert(OrderStats).from_select(['symbol', 'day', 'status', 'count'], grouped)
+            )
+            session.commit()
+            self.notify_change()
+            logger.info("Order statistics rebuilt")
+        except Exception:
+            session.rollback()
+            raise
         finally:
             session.close()
-    
-    def get_statistics(self) -> dict:
-        """Get trading statistics"""
+
+    def compact_response_data(self, batch_size: int = 500) -> int:
+        """Re-encode responses stored as repr() text and fill their promoted columns, returns rows converted.
+
+        Runs in batches of `batch_size` rows, each its own transaction, and
+        keeps updated_at so live feeds do not replay converted orders.
+        """
+        converted = 0
+        last_id = 0
+        promoted = ('cum_quote', 'position_side', 'reduce_only', 'exchange_update_time')
+        while True:
+            session = self.get_session()
+            try:
+                rows = session.query(OrderHistory.id, OrderHistory.response_data, OrderHistory.updated_at).filter(
+                    OrderHistory.id > last_id, func.typeof(OrderHistory.response_data) == 'text',
+                ).order_by(OrderHistory.id).limit(batch_size).all()
+                if not rows:
+                    break
+                changes = []
+                for row_id, raw, updated_at in rows:
+                    data = unpack_response(raw)
+                    columns = _response_columns(data or {})
+                    changes.append({'id': row_id, 'updated_at': updated_at,
+                                    'response_data': pack_response(data, self.response_codec),
+                                    **{column: columns.get(column) for column in promoted}})
+                session.execute(update(OrderHistory), changes)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            converted += len(rows)
+            last_id = rows[-1][0]
+        if converted:
+            self.notify_change()
+            logger.info(f"Re-encoded response_data of {converted} orders")
+        return converted
+
+    def _backfill_statistics(self):
+        """Databases created before order_stats existed get it filled once"""
         session = self.get_session()
         try:
-            total_orders = session.query(OrderHistory).count()
-            filled_orders = session.query(OrderHistory).filter_by(status='FILLED').count()
-            cancelled_orders = session.query(OrderHistory).filter_by(status='CANCELED').count()
-            pending_orders = session.query(OrderHistory).filter(
-                OrderHistory.status.in_(['NEW', 'PARTIALLY_FILLED'])
-            ).count()
-            
-            return {
-                'total_orders': total_orders,
-                'filled_orders': filled_orders,
-                'cancelled_orders': cancelled_orders,
-                'pending_orders': pending_orders,
-                'success_rate': (filled_orders / total_orders * 100) if total_orders > 0 else 0
-            }
+            has_stats = session.query(OrderStats.symbol).first() is not None
+            has_orders = session.query(OrderHistory.id).first() is not None
         finally:
             session.close()
+        if has_orders and not has_stats:
+            self.rebuild_statistics()
 
-# Global database instance
+_STOP = object()
+
+class WriteBehindWriter:
+    """Background writer that commits queued database writes in batches.
+
+    A batch is committed when `max_batch` writes are queued or `flush_interval`
+    seconds after its first write. The queue is bounded, so producers block
+    once `max_queue` writes are pending. Pending writes are flushed at exit.
+    """
+
+    def __init__(self, db: "Database", max_batch: int = 200, flush_interval: float = 0.005,
+                 max_queue: int = 10000):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, op: Callable, *args, **kwargs):
+        if self._closed:
+            raise RuntimeError("Write-behind writer is closed")
+        # Blocks while the queue is full, which pushes back on the order path
+        self._queue.put((op, args, kwargs))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if timeout is None:
+            self._queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _write(self, batch):
+        session = self.db.get_session()
+        try:
+            for op, args, kwargs in batch:
+                op(session, *args, **kwargs)
+            session.commit()
+            self.db.notify_change()
+            logger.debug(f"Write-behind committed {len(batch)} records")
+            return
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Write-behind batch of {len(batch)} failed, retrying one by one: {e}")
+        finally:
+            session.close()
+
+        # Isolate the bad record so the rest of the batch is not lost
+        for op, args, kwargs in batch:
+            session = self.db.get_session()
+            try:
+                op(session, *args, **kwargs)
+                session.commit()
+                self.db.notify_change()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Write-behind dropped {op.__name__}: {e}")
+            finally:
+                session.close()
+
+# Global database instances
 _db_instance = None
+_read_only_db_instance = None
 
 def get_database() -> Database:
     """Get or create database instance"""
@@ -204,3 +1003,10 @@ def get_database() -> Database:
     if _db_instance is None:
         _db_instance = Database()
     return _db_instance
+
+def get_read_only_database() -> Database:
+    """Get or create a read-only database instance for viewers"""
+    global _read_only_db_instance
+    if _read_only_db_instance is None:
+        _read_only_db_instance = Database(read_only=True)
+    return _read_only_db_instance
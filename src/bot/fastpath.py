@@ -0,0 +1,102 @@
+"""
+Order building for trusted, strategy-generated flow
+
+OrderInput validates untrusted input from the CLI and web UI. Callers that
+already produce well-formed orders can hand OrderService plain tuples in
+ORDER_FIELDS order (or OrderRecord) instead: the same rules are applied from
+prebuilt lookup tables, without a model instance, model_dump or enum
+round trips, and the resulting exchange parameters are identical.
+
+    service.place_orders_batch([("BTCUSDT", "BUY", "LIMIT", 0.002, 94000.0), ...])
+"""
+import re
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+from src.bot.enums import OrderSide, OrderType, TimeInForce
+from src.bot.models import CLIENT_ORDER_ID_PATTERN
+from src.bot.retry import new_client_order_id
+from src.bot.validators import validate_and_normalize_order_params
+
+class OrderRecord(NamedTuple):
+    symbol: str
+    side: str
+    type: str
+    quantity: float
+    price: Optional[float] = None
+    timeInForce: Optional[str] = None
+    stopPrice: Optional[float] = None
+    reduceOnly: bool = False
+    newClientOrderId: Optional[str] = None
+
+ORDER_FIELDS = OrderRecord._fields
+_PADDING = tuple(OrderRecord._field_defaults[name] for name in ORDER_FIELDS[4:])
+
+# Enum members and their plain values both map to the plain value
+_SIDES = {side.value: side.value for side in OrderSide}
+_TIME_IN_FORCE = {tif.value: tif.value for tif in TimeInForce}
+
+def _type_rule(order_type: OrderType):
+    """(value, price required, stopPrice required, GTC default when priced) as OrderInput's validator"""
+    value = order_type.value
+    requires_price = order_type in (OrderType.LIMIT, OrderType.STOP_LIMIT, OrderType.TAKE_PROFIT_LIMIT)
+    requires_stop = order_type not in (OrderType.LIMIT, OrderType.MARKET)
+    defaults_gtc = order_type not in (OrderType.MARKET, OrderType.STOP_MARKET, OrderType.TAKE_PROFIT_MARKET)
+    return value, requires_price, requires_stop, defaults_gtc
+
+_TYPES = {order_type.value: _type_rule(order_type) for order_type in OrderType}
+_MARKET_STOPS = ('STOP_MARKET', 'TAKE_PROFIT_MARKET')
+_valid_client_order_id = re.compile(CLIENT_ORDER_ID_PATTERN).match
+
+def order_params(row: Sequence[Any]) -> Dict[str, Any]:
+    """Exchange parameters of one row, what OrderInput plus model_dump(exclude_none=True) give.
+
+    Raises ValueError for anything OrderInput would reject.
+    """
+    if len(row) < 9:
+        row = (*row, *_PADDING[len(row) - 4:])
+    symbol, side, order_type, quantity, price, time_in_force, stop_price, reduce_only, client_order_id = row
+
+    side_value = _SIDES.get(side)
+    if side_value is None:
+        raise ValueError(f"Invalid side {side!r}")
+    rule = _TYPES.get(order_type)
+    if rule is None:
+        raise ValueError(f"Invalid order type {order_type!r}")
+    type_value, requires_price, requires_stop, defaults_gtc = rule
+    if not quantity > 0:
+        raise ValueError(f"Quantity {quantity} must be greater than 0")
+    if requires_price and price is None:
+        raise ValueError(f"Price is required for {type_value} orders")
+    if requires_stop and stop_price is None:
+        if type_value in _MARKET_STOPS:
+            raise ValueError("stopPrice is required for STOP_MARKET/TAKE_PROFIT_MARKET orders")
+        raise ValueError(f"stopPrice is required for {type_value} orders")
+
+    params = {'symbol': symbol, 'side': side_value, 'type': type_value, 'quantity': float(quantity)}
+    if price is not None:
+        params['price'] = float(price)
+    if time_in_force is not None:
+        tif_value = _TIME_IN_FORCE.get(time_in_force)
+        if tif_value is None:
+            raise ValueError(f"Invalid timeInForce {time_in_force!r}")
+        params['timeInForce'] = tif_value
+    elif defaults_gtc and price is not None:
+        params['timeInForce'] = 'GTC'
+    if stop_price is not None:
+        params['stopPrice'] = float(stop_price)
+    params['reduceOnly'] = bool(reduce_only)
+    if client_order_id is not None:
+        if not _valid_client_order_id(client_order_id):
+            raise ValueError(f"Invalid newClientOrderId {client_order_id!r}")
+        params['newClientOrderId'] = client_order_id
+    return params
+
+def raw_params(row: Sequence[Any]) -> Dict[str, Any]:
+    """The row's fields by name, for recording orders that failed to build"""
+    return {name: value for name, value in zip(ORDER_FIELDS, row) if value is not None}
+
+def build_order_params(row: Sequence[Any], filters, reference_price: Optional[float] = None) -> Dict[str, Any]:
+    """Row to validated, normalized exchange parameters with a client order ID, as OrderService sends them"""
+    params = order_params(row)
+    if 'newClientOrderId' not in params:
+        params['newClientOrderId'] = new_client_order_id()
+    return validate_and_normalize_order_params(params, filters, reference_price)
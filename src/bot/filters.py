@@ -0,0 +1,216 @@
+"""
+Typed exchange filters parsed once from exchange info
+"""
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, only used by the bulk helpers
+    np = None
+
+
+def _dec(value: Any) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(str(value))
+
+
+def grid_scale(size: Decimal) -> Tuple[int, int]:
+    """(scale, units) with size == units / scale, scale the smallest power of ten that fits"""
+    exponent = size.normalize().as_tuple().exponent
+    scale = 10 ** max(0, -exponent)
+    return scale, int(size * scale)
+
+
+def to_units(value: Any, scale: int, units: int) -> int:
+    """Nearest grid multiple as an integer count, ties to even like Decimal.quantize.
+
+    Floats take one multiply and round; only values within float error of a
+    tie are redone in Decimal from their repr, so results match the decimal
+    the caller typed.
+    """
+    if value.__class__ is not Decimal:
+        exact = value * scale / units
+        count = round(exact)
+        # exact is off by a few ulps, enough to land on the wrong side of a .5 tie
+        if 0.5 - abs(exact - count) > 1e-9 * (abs(exact) + 1.0):
+            return count
+        value = Decimal(repr(value))
+    return int((value * scale / units).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_units(count: int, scale: int, units: int) -> float:
+    """Float nearest to count * units / scale, its repr is the exact decimal"""
+    return count * units / scale
+
+
+def to_units_bulk(values: Sequence[Any], scale: int, units: int):
+    """to_units over many values, one vectorized pass when NumPy is installed"""
+    if np is None:
+        return [to_units(v, scale, units) for v in values]
+    array = np.asarray(values, dtype=np.float64)
+    exact = array * scale / units
+    counts = np.rint(exact)  # ties to even
+    ties = np.flatnonzero(0.5 - np.abs(exact - counts) <= 1e-9 * (np.abs(exact) + 1.0))
+    counts = counts.astype(np.int64)
+    for i in ties:
+        counts[i] = to_units(float(array[i]), scale, units)
+    return counts
+
+
+def from_units_bulk(counts, scale: int, units: int):
+    if np is None:
+        return [c * units / scale for c in counts]
+    return np.asarray(counts, dtype=np.int64) * units / scale
+
+
+class _Grid:
+    """Tick or step size as integers, prices and quantities become whole counts of it"""
+    __slots__ = ()
+
+    def _init_grid(self, size: Decimal):
+        scale, units = grid_scale(size)
+        object.__setattr__(self, 'scale', scale)
+        object.__setattr__(self, 'units', units)
+
+    def to_units(self, value: Any) -> int:
+        return to_units(value, self.scale, self.units)
+
+    def from_units(self, count: int) -> float:
+        return from_units(count, self.scale, self.units)
+
+    def normalize(self, value: Any) -> float:
+        """Round to the nearest multiple of the grid"""
+        scale, units = self.scale, self.units
+        return to_units(value, scale, units) * units / scale
+
+    def normalize_many(self, values: Sequence[Any]):
+        """normalize for a whole ladder, a NumPy array when NumPy is installed, otherwise a list"""
+        return from_units_bulk(to_units_bulk(values, self.scale, self.units), self.scale, self.units)
+
+
+@dataclass(frozen=True, slots=True)
+class PriceFilter(_Grid):
+    min_price: Optional[Decimal]
+    max_price: Optional[Decimal]
+    tick_size: Decimal
+    scale: int = field(init=False, repr=False)  # tick_size == units / scale
+    units: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._init_grid(self.tick_size)
+
+
+@dataclass(frozen=True, slots=True)
+class LotSizeFilter(_Grid):
+    min_qty: Decimal
+    max_qty: Optional[Decimal]
+    step_size: Decimal
+    scale: int = field(init=False, repr=False)  # step_size == units / scale
+    units: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._init_grid(self.step_size)
+
+
+@dataclass(frozen=True, slots=True)
+class MinNotionalFilter:
+    notional: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class PercentPriceFilter:
+    multiplier_up: Decimal
+    multiplier_down: Decimal
+    multiplier_decimal: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class MaxNumOrdersFilter:
+    limit: int
+
+
+class FilterLimits:
+    """Filter bounds of one symbol as floats, built once so validation never compares against Decimal.
+
+    lot and market_lot are (grid or None, min_qty, max_qty), market_lot falls
+    back to LOT_SIZE. Zero means the bound is not published.
+    """
+    __slots__ = ('has_price_filter', 'price_grid', 'min_price', 'max_price', 'lot', 'market_lot',
+                 'min_notional', 'multiplier_up', 'multiplier_down')
+
+    def __init__(self, filters: "SymbolFilters"):
+        price = filters.price_filter
+        self.has_price_filter = price is not None
+        self.price_grid = price if price is not None and price.units else None
+        self.min_price = float(price.min_price) if price is not None and price.min_price else 0.0
+        self.max_price = float(price.max_price) if price is not None and price.max_price else 0.0
+        self.lot = self._lot(filters.lot_size)
+        self.market_lot = self._lot(filters.market_lot_size or filters.lot_size)
+        self.min_notional = float(filters.min_notional.notional) if filters.min_notional else 0.0
+        percent = filters.percent_price
+        self.multiplier_up = float(percent.multiplier_up) if percent else 0.0
+        self.multiplier_down = float(percent.multiplier_down) if percent else 0.0
+
+    @staticmethod
+    def _lot(lot: Optional[LotSizeFilter]) -> Optional[Tuple[Optional[LotSizeFilter], float, float]]:
+        if lot is None:
+            return None
+        return (lot if lot.units else None, float(lot.min_qty), float(lot.max_qty) if lot.max_qty else 0.0)
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolFilters:
+    """All filters of one symbol, parsed into typed objects"""
+    symbol: Optional[str]
+    price_filter: Optional[PriceFilter] = None
+    lot_size: Optional[LotSizeFilter] = None
+    market_lot_size: Optional[LotSizeFilter] = None
+    min_notional: Optional[MinNotionalFilter] = None
+    percent_price: Optional[PercentPriceFilter] = None
+    max_num_orders: Optional[MaxNumOrdersFilter] = None
+    max_num_algo_orders: Optional[MaxNumOrdersFilter] = None
+    raw: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+    limits: FilterLimits = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'limits', FilterLimits(self))
+
+    @classmethod
+    def from_symbol_info(cls, info: Dict[str, Any]) -> "SymbolFilters":
+        """Parse one entry of exchange_info['symbols']"""
+        parsed: Dict[str, Any] = {}
+        for f in info.get('filters', []):
+            filter_type = f.get('filterType')
+            if filter_type == 'PRICE_FILTER':
+                parsed['price_filter'] = PriceFilter(
+                    min_price=_dec(f.get('minPrice')),
+                    max_price=_dec(f.get('maxPrice')),
+                    tick_size=_dec(f['tickSize']),
+                )
+            elif filter_type in ('LOT_SIZE', 'MARKET_LOT_SIZE'):
+                lot = LotSizeFilter(
+                    min_qty=_dec(f.get('minQty', '0')),
+                    max_qty=_dec(f.get('maxQty')),
+                    step_size=_dec(f['stepSize']),
+                )
+                parsed['lot_size' if filter_type == 'LOT_SIZE' else 'market_lot_size'] = lot
+            elif filter_type == 'MIN_NOTIONAL':
+                # Futures publishes 'notional', spot used 'minNotional'
+                parsed['min_notional'] = MinNotionalFilter(
+                    notional=_dec(f.get('notional', f.get('minNotional')))
+                )
+            elif filter_type == 'PERCENT_PRICE':
+                multiplier_decimal = f.get('multiplierDecimal')
+                parsed['percent_price'] = PercentPriceFilter(
+                    multiplier_up=_dec(f['multiplierUp']),
+                    multiplier_down=_dec(f['multiplierDown']),
+                    multiplier_decimal=int(multiplier_decimal) if multiplier_decimal is not None else None,
+                )
+            elif filter_type == 'MAX_NUM_ORDERS':
+                parsed['max_num_orders'] = MaxNumOrdersFilter(limit=int(f['limit']))
+            elif filter_type == 'MAX_NUM_ALGO_ORDERS':
+                parsed['max_num_algo_orders'] = MaxNumOrdersFilter(limit=int(f['limit']))
+        return cls(symbol=info.get('symbol'), raw=info, **parsed)
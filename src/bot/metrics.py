@@ -0,0 +1,175 @@
+"""
+In-process metrics for the order path, rendered in Prometheus text format
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds, from in-memory steps (filter lookup, validation) up to slow network calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        key = tuple(str(label) for label in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(tuple(str(label) for label in labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {','.join(key): value for key, value in sorted(self._values.items())}
+
+class Histogram:
+    """Bucketed distribution per label set, observations are in seconds"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        key = tuple(str(label) for label in labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(tuple(str(label) for label in labels))
+        return series[-1] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        return {','.join(key): {'count': series[-1], 'sum': series[-2],
+                                'avg': series[-2] / series[-1] if series[-1] else 0.0}
+                for key, series in items}
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+REGISTRY = Registry()
+
+ORDER_STAGE_SECONDS = REGISTRY.histogram(
+    'bot_order_stage_seconds', 'Time spent in each stage of the order path',
+    ('endpoint', 'stage', 'symbol'))
+ORDER_REQUESTS = REGISTRY.counter(
+    'bot_order_requests_total', 'Order service calls by outcome, ok or the error code',
+    ('endpoint', 'symbol', 'outcome'))
+EXCHANGE_REQUEST_SECONDS = REGISTRY.histogram(
+    'bot_exchange_request_seconds', 'Exchange client call latency',
+    ('endpoint', 'status'))
+EXCHANGE_ERRORS = REGISTRY.counter(
+    'bot_exchange_errors_total', 'Exchange client errors by error code',
+    ('endpoint', 'code'))
+EXCHANGE_RETRIES = REGISTRY.counter(
+    'bot_exchange_retries_total', 'Exchange client calls retried',
+    ('endpoint', 'reason'))
+
+def observe_stage(endpoint: str, stage: str, symbol: Optional[str]):
+    """Context manager timing one order path stage"""
+    return ORDER_STAGE_SECONDS.time(endpoint, stage, symbol or '')
+
+def outcome_of(error: BaseException) -> str:
+    """Exchange error code when there is one, otherwise the exception type"""
+    code = getattr(error, 'code', None)
+    return str(code) if code is not None else type(error).__name__
+
+def count_request(endpoint: str, symbol: Optional[str], outcome: str = 'ok'):
+    ORDER_REQUESTS.inc(endpoint, symbol or '', outcome)
+
+def observe_span(span):
+    """Tracer handler feeding exchange call latency and error codes"""
+    EXCHANGE_REQUEST_SECONDS.observe(span.duration_ms / 1000, span.name, span.status)
+    if span.status == 'error':
+        EXCHANGE_ERRORS.inc(span.name, span.error_code if span.error_code is not None else 'none')
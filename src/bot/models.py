@@ -1,24 +1,7 @@
-from enum import Enum
 from pydantic import BaseModel, Field, field_validator, model_validator
+from src.bot.enums import OrderSide, OrderType, TimeInForce
 
-class OrderSide(str, Enum):
-    BUY = "BUY"
-    SELL = "SELL"
-
-class OrderType(str, Enum):
-    LIMIT = "LIMIT"
-    MARKET = "MARKET"
-    STOP = "STOP"
-    STOP_LIMIT = "STOP_LIMIT"
-    TAKE_PROFIT = "TAKE_PROFIT"
-    TAKE_PROFIT_LIMIT = "TAKE_PROFIT_LIMIT"
-    STOP_MARKET = "STOP_MARKET"
-    TAKE_PROFIT_MARKET = "TAKE_PROFIT_MARKET"
-
-class TimeInForce(str, Enum):
-    GTC = "GTC"  # Good 'Til Canceled
-    IOC = "IOC"  # Immediate or Cancel
-    FOK = "FOK"  # Fill or Kill
+CLIENT_ORDER_ID_PATTERN = r'^[\.A-Z\:/a-z0-9_-]{1,36}$'
 
 class OrderInput(BaseModel):
     symbol: str
@@ -29,6 +12,8 @@ class OrderInput(BaseModel):
     timeInForce: TimeInForce | None = None
     stopPrice: float | None = None
     reduceOnly: bool = False
+    # Generated when missing, the exchange rejects a second open order with the same ID
+    newClientOrderId: str | None = Field(None, pattern=CLIENT_ORDER_ID_PATTERN)
 
     @model_validator(mode='after')
     def validate_order_params(self):
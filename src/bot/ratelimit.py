@@ -0,0 +1,302 @@
+"""
+Client-side rate-limit governor for the Binance Futures REST API
+"""
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Mapping, Optional, Union
+from src.bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: cancels reduce risk, so they never wait behind new orders
+PRIORITY_CANCEL = 0
+PRIORITY_QUERY = 1
+PRIORITY_ORDER = 2
+
+# USD-M futures defaults, replaced by exchangeInfo rateLimits when available
+DEFAULT_RATE_LIMITS = [
+    {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 2400},
+    {'rateLimitType': 'ORDERS', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 1200},
+    {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 300},
+]
+INTERVAL_SECONDS = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400}
+WEIGHT_HEADER = 'x-mbx-used-weight-'
+ORDER_COUNT_HEADER = 'x-mbx-order-count-'
+BAN_STATUS_CODES = (418, 429)
+DEFAULT_RETRY_AFTER = 60.0
+
+class RateLimitExceeded(Exception):
+    """Raised when a request could not be admitted within its timeout"""
+
+class TokenBucket:
+    """Tokens refill continuously at `limit / window`, capped at `limit * headroom`"""
+
+    def __init__(self, limit: int, window: float, headroom: float = 1.0):
+        self.limit = limit
+        self.window = window
+        self.capacity = limit * headroom
+        self.rate = self.capacity / window
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available, 0 when they are now"""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket, not forever
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= amount
+
+    def sync_used(self, used: int, now: float):
+        """Align with the exchange's count of what this IP or account already used"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+def _interval_key(interval: str, interval_num: int) -> str:
+    # Same form as the header suffix, e.g. 1M or 10S
+    return f"{interval_num}{interval[0]}"
+
+class RateLimitGovernor:
+    """Admits requests against the request-weight and order-count limits.
+
+    Buckets are kept per limit window and re-synced from the X-MBX-USED-WEIGHT-*
+    and X-MBX-ORDER-COUNT-* response headers, which also count requests made by
+    other processes on the same IP or account. A 429 or 418 response pauses all
+    requests until its Retry-After has passed.
+    """
+
+    def __init__(self, rate_limits: Optional[List[Dict[str, Any]]] = None, headroom: float = 0.9):
+        self.headroom = headroom
+        self.weight_buckets: Dict[str, TokenBucket] = {}
+        self.order_buckets: Dict[str, TokenBucket] = {}
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._waiting = {PRIORITY_CANCEL: 0, PRIORITY_QUERY: 0, PRIORITY_ORDER: 0}
+        self._cond = threading.Condition()
+        self.configure(rate_limits or DEFAULT_RATE_LIMITS)
+
+    def configure(self, rate_limits: List[Dict[str, Any]]):
+        """Build buckets from the exchangeInfo `rateLimits` list"""
+        weight_buckets, order_buckets = {}, {}
+        for limit in rate_limits:
+            key = _interval_key(limit['interval'], limit['intervalNum'])
+            bucket = TokenBucket(limit['limit'], INTERVAL_SECONDS[limit['interval']] * limit['intervalNum'],
+                                 self.headroom)
+            if limit['rateLimitType'] == 'REQUEST_WEIGHT':
+                weight_buckets[key] = bucket
+            elif limit['rateLimitType'] == 'ORDERS':
+                order_buckets[key] = bucket
+        with self._cond:
+            self.weight_buckets, self.order_buckets = weight_buckets, order_buckets
+
+    def _try_consume(self, weight: int, orders: int, priority: int) -> float:
+        """Take the tokens and return 0, or return how long to wait before trying again"""
+        now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+
+        wait = 0.0
+        for bucket in self.weight_buckets.values():
+            wait = max(wait, bucket.wait_time(weight, now))
+        if orders:
+            for bucket in self.order_buckets.values():
+                wait = max(wait, bucket.wait_time(orders, now))
+        if any(count for p, count in self._waiting.items() if p < priority):
+            # Leave the tokens to the more urgent requests queued ahead
+            return max(wait, 0.01)
+        if wait > 0:
+            return wait
+
+        for bucket in self.weight_buckets.values():
+            bucket.consume(weight)
+        if orders:
+            for bucket in self.order_buckets.values():
+                bucket.consume(orders)
+        return 0.0
+
+    def acquire(self, weight: int = 1, orders: int = 0, priority: int = PRIORITY_QUERY,
+                timeout: Optional[float] = None):
+        """Block until the request fits under every limit"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    wait = self._try_consume(weight, orders, priority)
+                    if wait == 0:
+                        return
+                    self._check_deadline(wait, deadline)
+                    self.throttled += 1
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    async def acquire_async(self, weight: int = 1, orders: int = 0, priority: int = PRIORITY_QUERY,
+                            timeout: Optional[float] = None):
+        """acquire() for coroutines, sleeps on the event loop instead of blocking it"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_consume(weight, orders, priority)
+                if wait == 0:
+                    return
+                self._check_deadline(wait, deadline)
+                self.throttled += 1
+                await asyncio.sleep(wait)
+        finally:
+            with self._cond:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    @staticmethod
+    def _check_deadline(wait: float, deadline: Optional[float]):
+        if deadline is not None and time.monotonic() + wait > deadline:
+            raise RateLimitExceeded(f"Rate limit would delay the request by {wait:.2f}s")
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]):
+        """Sync the buckets from X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* headers"""
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._cond:
+            for name, value in headers.items():
+                name = name.lower()
+                if name.startswith(WEIGHT_HEADER):
+                    buckets, key = self.weight_buckets, name[len(WEIGHT_HEADER):].upper()
+                elif name.startswith(ORDER_COUNT_HEADER):
+                    buckets, key = self.order_buckets, name[len(ORDER_COUNT_HEADER):].upper()
+                else:
+                    continue
+                bucket = buckets.get(key)
+                if bucket is not None:
+                    try:
+                        bucket.sync_used(int(value), now)
+                    except ValueError:
+                        continue
+
+    def on_rate_limited(self, status_code: int, retry_after: Optional[str] = None):
+        """Pause every request after a 429 (too many requests) or 418 (IP banned)"""
+        try:
+            delay = float(retry_after) if retry_after else DEFAULT_RETRY_AFTER
+        except ValueError:
+            delay = DEFAULT_RETRY_AFTER
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        logger.warning(f"Rate limited by the exchange (HTTP {status_code}), pausing requests for {delay:.0f}s")
+
+    def observe(self, response: Any = None, error: Optional[BaseException] = None):
+        """Feed a response or API error back into the governor"""
+        if error is not None:
+            if getattr(error, 'response', None) is not None:
+                response = error.response
+            status_code = getattr(error, 'status_code', None)
+            if status_code in BAN_STATUS_CODES:
+                headers = getattr(response, 'headers', None) or {}
+                self.on_rate_limited(status_code, headers.get('Retry-After'))
+        self.update_from_headers(getattr(response, 'headers', None))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._cond:
+            for bucket in (*self.weight_buckets.values(), *self.order_buckets.values()):
+                bucket._refill(now)
+            return {
+                'weight': {k: {'limit': b.limit, 'available': int(b.tokens)} for k, b in self.weight_buckets.items()},
+                'orders': {k: {'limit': b.limit, 'available': int(b.tokens)} for k, b in self.order_buckets.items()},
+                'blocked_for': max(self.blocked_until - now, 0.0),
+                'throttled': self.throttled,
+            }
+
+# Response of the last request made by this thread or task. python-binance also
+# keeps it on `client.response`, but that is overwritten by every caller sharing the client.
+_last_response: ContextVar = ContextVar('last_response', default=None)
+
+def record_response(response: Any, *args, **kwargs) -> None:
+    """requests response hook, installed on the client session by create_client"""
+    _last_response.set(response)
+
+def response_trace_config():
+    """aiohttp TraceConfig that records responses like record_response, for AsyncClient sessions"""
+    import aiohttp
+
+    async def on_request_end(session, context, params):
+        # Runs inside the task that made the request, so the context var stays per task
+        _last_response.set(params.response)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+Cost = Union[int, Callable[..., int]]
+
+def _cost(value: Cost, args, kwargs) -> int:
+    return value(*args, **kwargs) if callable(value) else value
+
+def governed(weight: Cost = 1, orders: Cost = 0, priority: int = PRIORITY_QUERY):
+    """Admit a BinanceClient method through `self.governor`, then read the limit headers.
+
+    Headers come from the response recorded for this thread or task, see
+    record_response, never from the client's shared `response` attribute.
+
+    `weight` and `orders` may be callables taking the method's arguments.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                governor = self.governor
+                if governor is None:
+                    return await func(self, *args, **kwargs)
+                await governor.acquire_async(_cost(weight, args, kwargs), _cost(orders, args, kwargs), priority)
+                _last_response.set(None)
+                try:
+                    result = await func(self, *args, **kwargs)
+                except Exception as e:
+                    governor.observe(error=e)
+                    raise
+                governor.observe(_last_response.get())
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            governor = self.governor
+            if governor is None:
+                return func(self, *args, **kwargs)
+            governor.acquire(_cost(weight, args, kwargs), _cost(orders, args, kwargs), priority)
+            _last_response.set(None)
+            try:
+                result = func(self, *args, **kwargs)
+            except Exception as e:
+                governor.observe(error=e)
+                raise
+            governor.observe(_last_response.get())
+            return result
+        return wrapper
+    return decorator
+
+# Global governor, the limits are per IP and per account rather than per client
+_governor = None
+
+def get_rate_limit_governor() -> RateLimitGovernor:
+    """Get or create the process-wide rate-limit governor"""
+    global _governor
+    if _governor is None:
+        _governor = RateLimitGovernor(headroom=settings.rate_limit_headroom)
+    return _governor
@@ -0,0 +1,39 @@
+"""
+Client order IDs and transient failure handling for order submission
+"""
+import asyncio
+import uuid
+import requests
+from binance.exceptions import BinanceAPIException
+
+CLIENT_ORDER_ID_PREFIX = "ctb-"  # 4 + 32 hex chars, Binance allows up to 36
+ORDER_NOT_FOUND = -2013
+DUPLICATE_CLIENT_ORDER_ID = -4116
+# -1001 internal disconnect, -1007 backend timeout with execution status unknown
+EXECUTION_STATUS_UNKNOWN = -1007
+TRANSIENT_CODES = (-1001, EXECUTION_STATUS_UNKNOWN)
+
+def new_client_order_id() -> str:
+    return f"{CLIENT_ORDER_ID_PREFIX}{uuid.uuid4().hex}"
+
+def is_transient(error: BaseException) -> bool:
+    """Failures where the order may or may not have reached the matching engine.
+
+    Connection failures before anything is sent are already retried by the
+    transport, so everything left here is ambiguous and has to be looked up
+    before the order is sent again.
+    """
+    if isinstance(error, BinanceAPIException):
+        return error.status_code >= 500 or error.code in TRANSIENT_CODES
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          requests.exceptions.ChunkedEncodingError, asyncio.TimeoutError)):
+        return True
+    try:
+        import aiohttp
+    except ImportError:
+        return False
+    return isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+def backoff_delay(attempt: int, base: float) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)"""
+    return base * 2 ** (attempt - 1)
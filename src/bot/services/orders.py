@@ -1,127 +1,369 @@
+import asyncio
 import logging
-from typing import Any, Dict
-from src.bot.client import BinanceClient
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from src.bot.client import AsyncBinanceClient, BinanceClient
+from src.bot.config import settings
+from src.bot.fastpath import order_params, raw_params
+from src.bot.metrics import count_request, observe_stage, outcome_of
 from src.bot.models import OrderInput
+from src.bot.retry import EXECUTION_STATUS_UNKNOWN, TRANSIENT_CODES, is_transient, new_client_order_id
 from src.bot.services.symbols import SymbolService
 from src.bot.validators import validate_and_normalize_order_params
-from src.bot.database import get_database
 
 logger = logging.getLogger(__name__)
 
-class OrderService:
-    def __init__(self, client: BinanceClient, symbol_service: SymbolService):
+BATCH_ORDER_LIMIT = 5  # max orders per batchOrders request
+
+# OrderInput, or a trusted tuple in fastpath.ORDER_FIELDS order that skips the model
+Order = Union[OrderInput, Sequence[Any]]
+
+def symbol_of(order: Order) -> str:
+    return order.symbol if isinstance(order, OrderInput) else order[0]
+
+class BaseOrderService:
+    """Validation and database bookkeeping shared by the sync and async order services"""
+
+    def __init__(self, client, symbol_service: SymbolService, price_cache=None):
         self.client = client
         self.symbol_service = symbol_service
-        self.db = get_database()
+        self.price_cache = price_cache  # PriceCache for the price dependent filters
+        self._db = None
 
-    def place_order(self, order: OrderInput, user_interface: str = 'cli') -> Dict[str, Any]:
-        filters = self.symbol_service.get_symbol_filters(order.symbol)
+    @property
+    def db(self):
+        """Database opened on the first write, so read-only commands never import or create it"""
+        if self._db is None:
+            from src.bot.database import get_database
 
-        params = order.model_dump(exclude_none=True, mode='python')
-        
-        # Convert enum values to strings
-        if 'side' in params:
-            params['side'] = params['side'].value if hasattr(params['side'], 'value') else params['side']
-        if 'type' in params:
-            params['type'] = params['type'].value if hasattr(params['type'], 'value') else params['type']
-        if 'timeInForce' in params:
-            params['timeInForce'] = params['timeInForce'].value if hasattr(params['timeInForce'], 'value') else params['timeInForce']
+            self._db = get_database()
+            if settings.db_write_behind:
+                self._db.enable_write_behind(
+                    max_batch=settings.db_write_batch_size,
+                    flush_interval_ms=settings.db_write_interval_ms,
+                    max_queue=settings.db_write_queue_size,
+                )
+        return self._db
 
-        validated_params = validate_and_normalize_order_params(params, filters)
+    def _reference_price(self, symbol: str) -> Optional[float]:
+        """Streamed mark price when it is fresh, the price filters are left to the exchange otherwise"""
+        if self.price_cache is None:
+            return None
+        cached = self.price_cache.peek(symbol)
+        if cached is None or time.time() - cached[1] > settings.price_max_age:
+            return None
+        return cached[0]
 
-        logger.info(f"Placing order with params: {validated_params}")
-        
-        try:
-            result = self.client.futures_create_order(**validated_params)
-            
-            # Save to database
+    def _prepare_params(self, order: Order, filters, endpoint: str = 'place_order') -> Dict[str, Any]:
+        symbol = symbol_of(order)
+        with observe_stage(endpoint, 'dump', symbol):
+            if isinstance(order, OrderInput):
+                params = order.model_dump(exclude_none=True, mode='python')
+
+                # Convert enum values to strings
+                if 'side' in params:
+                    params['side'] = params['side'].value if hasattr(params['side'], 'value') else params['side']
+                if 'type' in params:
+                    params['type'] = params['type'].value if hasattr(params['type'], 'value') else params['type']
+                if 'timeInForce' in params:
+                    params['timeInForce'] = params['timeInForce'].value if hasattr(params['timeInForce'], 'value') else params['timeInForce']
+            else:
+                params = order_params(order)
+            # Tagged before sending, so a timed out order can be looked up and retried safely
+            if 'newClientOrderId' not in params:
+                params['newClientOrderId'] = new_client_order_id()
+
+        with observe_stage(endpoint, 'validate', symbol):
+            return validate_and_normalize_order_params(params, filters, self._reference_price(symbol))
+
+    def _record_order_placed(self, validated_params: Dict[str, Any], result: Dict[str, Any],
+                             user_interface: str):
+        symbol = validated_params.get('symbol')
+
+        # Save to database
+        with observe_stage('place_order', 'save_order', symbol):
             self.db.save_order(validated_params, result)
-            
-            # Log activity
+
+        # Log activity
+        with observe_stage('place_order', 'log_activity', symbol):
             self.db.log_activity(
                 action='place_order',
                 status='success',
-                symbol=validated_params.get('symbol'),
+                symbol=symbol,
                 order_id=result.get('orderId'),
                 message=f"Order placed: {validated_params.get('type')} {validated_params.get('side')}",
                 user_interface=user_interface
             )
-            
-            return result
-        except Exception as e:
-            # Log error
-            self.db.log_activity(
-                action='place_order',
-                status='error',
-                symbol=validated_params.get('symbol'),
-                message=f"Failed to place order",
-                error_details=str(e),
-                user_interface=user_interface
-            )
-            raise
 
-    def get_status(self, symbol: str, orderId: int, user_interface: str = 'cli') -> Dict[str, Any]:
-        logger.info(f"Getting status for orderId: {orderId}")
-        
-        try:
-            result = self.client.futures_get_order(symbol=symbol, orderId=orderId)
-            
-            # Update database
+    def _record_order_updated(self, action: str, symbol: str, orderId: int, result: Dict[str, Any],
+                              message: str, user_interface: str):
+        # Update database
+        with observe_stage(action, 'update_order', symbol):
             self.db.update_order_status(str(orderId), result)
-            
-            # Log activity
+
+        # Log activity
+        with observe_stage(action, 'log_activity', symbol):
             self.db.log_activity(
-                action='check_status',
+                action=action,
                 status='success',
                 symbol=symbol,
                 order_id=orderId,
-                message=f"Status checked: {result.get('status')}",
+                message=message,
                 user_interface=user_interface
             )
-            
+
+    def _prepare_batch(self, orders: List[Order], user_interface: str
+                       ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Any]]:
+        """Validate a batch, returns (index, params) of valid orders and a result slot per order"""
+        results: List[Any] = [None] * len(orders)
+        prepared = []
+        for index, order in enumerate(orders):
+            try:
+                with observe_stage('place_orders_batch', 'filters', symbol_of(order)):
+                    filters = self.symbol_service.get_parsed_filters(symbol_of(order))
+                prepared.append((index, self._prepare_params(order, filters, 'place_orders_batch')))
+            except Exception as e:
+                results[index] = {'code': getattr(e, 'code', None), 'msg': str(e)}
+                self._record_batch_failure(self._prepare_raw_params(order), results[index], user_interface)
+        return prepared, results
+
+    @staticmethod
+    def _prepare_raw_params(order: Order) -> Dict[str, Any]:
+        if not isinstance(order, OrderInput):
+            return raw_params(order)
+        return order.model_dump(exclude_none=True, mode='json')
+
+    @staticmethod
+    def _batch_error(chunk: List[Tuple[int, Dict[str, Any]]], error: Exception) -> List[Dict[str, Any]]:
+        """Per-order entries for a batch request that failed as a whole"""
+        code = EXECUTION_STATUS_UNKNOWN if is_transient(error) else getattr(error, 'code', None)
+        return [{'code': code, 'msg': str(error)}] * len(chunk)
+
+    @staticmethod
+    def _chunks(prepared: List[Tuple[int, Dict[str, Any]]]):
+        for start in range(0, len(prepared), BATCH_ORDER_LIMIT):
+            yield prepared[start:start + BATCH_ORDER_LIMIT]
+
+    def _record_batch_results(self, chunk: List[Tuple[int, Dict[str, Any]]], response, results: List[Any],
+                              user_interface: str):
+        """Store one batchOrders response, the exchange answers per order in request order"""
+        for (index, params), item in zip(chunk, response):
+            results[index] = item
+            if 'orderId' in item:
+                count_request('place_orders_batch', params.get('symbol'))
+                self._record_order_placed(params, item, user_interface)
+            elif item.get('code') in TRANSIENT_CODES:
+                self._record_batch_unknown(params, item, user_interface)
+            else:
+                self._record_batch_failure(params, item, user_interface)
+
+    def _record_batch_unknown(self, params: Dict[str, Any], error: Dict[str, Any], user_interface: str):
+        """The order may be live, it is kept under its client order ID for the next update to settle"""
+        count_request('place_orders_batch', params.get('symbol'), str(error['code']))
+        self.db.save_order(params, {'status': 'UNKNOWN', **error})
+        self.db.log_activity(
+            action='place_order',
+            status='error',
+            symbol=params.get('symbol'),
+            message=f"Batch order outcome unknown, look up {params.get('newClientOrderId')}",
+            error_details=f"{error.get('code')}: {error.get('msg')}",
+            user_interface=user_interface
+        )
+
+    def _record_batch_failure(self, params: Dict[str, Any], error: Dict[str, Any], user_interface: str):
+        count_request('place_orders_batch', params.get('symbol'),
+                      str(error['code']) if error.get('code') is not None else 'rejected')
+        self.db.save_order(params, {'status': 'REJECTED', **error})
+        self.db.log_activity(
+            action='place_order',
+            status='error',
+            symbol=params.get('symbol'),
+            message="Failed to place batch order",
+            error_details=f"{error.get('code')}: {error.get('msg')}",
+            user_interface=user_interface
+        )
+
+    def _record_error(self, action: str, symbol: str, message: str, error: Exception,
+                      user_interface: str, orderId=None):
+        self.db.log_activity(
+            action=action,
+            status='error',
+            symbol=symbol,
+            order_id=orderId,
+            message=message,
+            error_details=str(error),
+            user_interface=user_interface
+        )
+
+class OrderService(BaseOrderService):
+    def __init__(self, client: BinanceClient, symbol_service: SymbolService, price_cache=None):
+        super().__init__(client, symbol_service, price_cache)
+
+    def place_order(self, order: Order, user_interface: str = 'cli') -> Dict[str, Any]:
+        symbol = symbol_of(order)
+        try:
+            with observe_stage('place_order', 'filters', symbol):
+                filters = self.symbol_service.get_parsed_filters(symbol)
+            validated_params = self._prepare_params(order, filters)
+        except Exception as e:
+            count_request('place_order', symbol, outcome_of(e))
+            raise
+
+        logger.info(f"Placing order with params: {validated_params}")
+
+        try:
+            with observe_stage('place_order', 'request', symbol):
+                result = self.client.futures_create_order(**validated_params)
+            self._record_order_placed(validated_params, result, user_interface)
+            count_request('place_order', symbol)
             return result
         except Exception as e:
+            count_request('place_order', symbol, outcome_of(e))
             # Log error
-            self.db.log_activity(
-                action='check_status',
-                status='error',
-                symbol=symbol,
-                order_id=orderId,
-                message=f"Failed to check status",
-                error_details=str(e),
-                user_interface=user_interface
-            )
+            self._record_error('place_order', validated_params.get('symbol'),
+                               "Failed to place order", e, user_interface)
+            raise
+
+    def place_orders_batch(self, orders: List[Order], user_interface: str = 'cli') -> List[Dict[str, Any]]:
+        """Place orders through the batchOrders endpoint, up to 5 per request.
+
+        Returns one entry per input order, either the exchange order or a
+        {'code': ..., 'msg': ...} error.
+        """
+        prepared, results = self._prepare_batch(orders, user_interface)
+
+        for chunk in self._chunks(prepared):
+            logger.info(f"Placing batch of {len(chunk)} orders")
+            try:
+                with observe_stage('place_orders_batch', 'request', ''):
+                    response = self.client.futures_place_batch_order([params for _, params in chunk])
+            except Exception as e:
+                response = self._batch_error(chunk, e)
+            self._record_batch_results(chunk, response, results, user_interface)
+
+        return results
+
+    def get_status(self, symbol: str, orderId: int, user_interface: str = 'cli') -> Dict[str, Any]:
+        logger.info(f"Getting status for orderId: {orderId}")
+
+        try:
+            with observe_stage('check_status', 'request', symbol):
+                result = self.client.futures_get_order(symbol=symbol, orderId=orderId)
+            self._record_order_updated('check_status', symbol, orderId, result,
+                                       f"Status checked: {result.get('status')}", user_interface)
+            count_request('check_status', symbol)
+            return result
+        except Exception as e:
+            count_request('check_status', symbol, outcome_of(e))
+            # Log error
+            self._record_error('check_status', symbol, "Failed to check status", e,
+                               user_interface, orderId=orderId)
             raise
 
     def cancel_order(self, symbol: str, orderId: int, user_interface: str = 'cli') -> Dict[str, Any]:
         logger.info(f"Cancelling orderId: {orderId}")
-        
+
         try:
-            result = self.client.futures_cancel_order(symbol=symbol, orderId=orderId)
-            
-            # Update database
-            self.db.update_order_status(str(orderId), result)
-            
-            # Log activity
-            self.db.log_activity(
-                action='cancel_order',
-                status='success',
-                symbol=symbol,
-                order_id=orderId,
-                message=f"Order cancelled",
-                user_interface=user_interface
-            )
-            
+            with observe_stage('cancel_order', 'request', symbol):
+                result = self.client.futures_cancel_order(symbol=symbol, orderId=orderId)
+            self._record_order_updated('cancel_order', symbol, orderId, result,
+                                       "Order cancelled", user_interface)
+            count_request('cancel_order', symbol)
             return result
         except Exception as e:
+            count_request('cancel_order', symbol, outcome_of(e))
             # Log error
-            self.db.log_activity(
-                action='cancel_order',
-                status='error',
-                symbol=symbol,
-                order_id=orderId,
-                message=f"Failed to cancel order",
-                error_details=str(e),
-                user_interface=user_interface
-            )
+            self._record_error('cancel_order', symbol, "Failed to cancel order", e,
+                               user_interface, orderId=orderId)
+            raise
+
+class AsyncOrderService(BaseOrderService):
+    """Asyncio order service, lets callers fan out many requests from one event loop.
+
+    Database writes run in worker threads so they never block the loop.
+    """
+
+    def __init__(self, client: AsyncBinanceClient, symbol_service: SymbolService, price_cache=None):
+        super().__init__(client, symbol_service, price_cache)
+
+    async def _get_filters(self, symbol: str):
+        if not self.symbol_service.is_loaded:
+            # First use fetches exchange info over the blocking client
+            return await asyncio.to_thread(self.symbol_service.get_parsed_filters, symbol)
+        return self.symbol_service.get_parsed_filters(symbol)
+
+    async def place_order(self, order: Order, user_interface: str = 'cli') -> Dict[str, Any]:
+        symbol = symbol_of(order)
+        try:
+            with observe_stage('place_order', 'filters', symbol):
+                filters = await self._get_filters(symbol)
+            validated_params = self._prepare_params(order, filters)
+        except Exception as e:
+            count_request('place_order', symbol, outcome_of(e))
+            raise
+
+        logger.info(f"Placing order with params: {validated_params}")
+
+        try:
+            with observe_stage('place_order', 'request', symbol):
+                result = await self.client.futures_create_order(**validated_params)
+            await asyncio.to_thread(self._record_order_placed, validated_params, result, user_interface)
+            count_request('place_order', symbol)
+            return result
+        except Exception as e:
+            count_request('place_order', symbol, outcome_of(e))
+            await asyncio.to_thread(self._record_error, 'place_order', validated_params.get('symbol'),
+                                    "Failed to place order", e, user_interface)
+            raise
+
+    async def place_orders_batch(self, orders: List[Order], user_interface: str = 'cli') -> List[Dict[str, Any]]:
+        """Async place_orders_batch, all chunks are sent concurrently"""
+        if orders and not self.symbol_service.is_loaded:
+            await asyncio.to_thread(self.symbol_service.get_parsed_filters, symbol_of(orders[0]))
+        prepared, results = await asyncio.to_thread(self._prepare_batch, orders, user_interface)
+
+        async def send(chunk):
+            try:
+                with observe_stage('place_orders_batch', 'request', ''):
+                    return await self.client.futures_place_batch_order([params for _, params in chunk])
+            except Exception as e:
+                return self._batch_error(chunk, e)
+
+        chunks = list(self._chunks(prepared))
+        responses = await asyncio.gather(*(send(chunk) for chunk in chunks))
+        for chunk, response in zip(chunks, responses):
+            await asyncio.to_thread(self._record_batch_results, chunk, response, results, user_interface)
+
+        return results
+
+    async def get_status(self, symbol: str, orderId: int, user_interface: str = 'cli') -> Dict[str, Any]:
+        logger.info(f"Getting status for orderId: {orderId}")
+
+        try:
+            with observe_stage('check_status', 'request', symbol):
+                result = await self.client.futures_get_order(symbol=symbol, orderId=orderId)
+            await asyncio.to_thread(self._record_order_updated, 'check_status', symbol, orderId, result,
+                                    f"Status checked: {result.get('status')}", user_interface)
+            count_request('check_status', symbol)
+            return result
+        except Exception as e:
+            count_request('check_status', symbol, outcome_of(e))
+            await asyncio.to_thread(self._record_error, 'check_status', symbol,
+                                    "Failed to check status", e, user_interface, orderId)
+            raise
+
+    async def cancel_order(self, symbol: str, orderId: int, user_interface: str = 'cli') -> Dict[str, Any]:
+        logger.info(f"Cancelling orderId: {orderId}")
+
+        try:
+            with observe_stage('cancel_order', 'request', symbol):
+                result = await self.client.futures_cancel_order(symbol=symbol, orderId=orderId)
+            await asyncio.to_thread(self._record_order_updated, 'cancel_order', symbol, orderId, result,
+                                    "Order cancelled", user_interface)
+            count_request('cancel_order', symbol)
+            return result
+        except Exception as e:
+            count_request('cancel_order', symbol, outcome_of(e))
+            await asyncio.to_thread(self._record_error, 'cancel_order', symbol,
+                                    "Failed to cancel order", e, user_interface, orderId)
             raise
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from src.bot.config import settings
+from src.bot.streams import WebSocketStream
+
+logger = logging.getLogger(__name__)
+
+class PriceCache(WebSocketStream):
+    """In-process latest prices fed by the mark price or bookTicker streams.
+
+    Symbols are subscribed on first request, up to `max_symbols`; callers
+    check the symbol exists first. All readers share the one upstream
+    connection, so the cost does not grow with the number of viewers.
+    """
+
+    def __init__(self, ws_url: Optional[str] = None, stream: Optional[str] = None,
+                 max_symbols: Optional[int] = None):
+        super().__init__(name="price-stream")
+        self.ws_url = (ws_url or settings.ws_url).rstrip('/')
+        self.stream = stream or settings.price_stream
+        self.max_symbols = settings.price_stream_max_symbols if max_symbols is None else max_symbols
+        self._prices: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, updated at epoch seconds)
+        self._symbols: set = set()
+        self._streamed: set = set()  # symbols the current connection carries or was sent a SUBSCRIBE for
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    def _stream_name(self, symbol: str) -> str:
+        return f"{symbol.lower()}@{self.stream}"
+
+    def url(self) -> str:
+        with self._lock:
+            self._streamed = set(self._symbols)
+            streams = [self._stream_name(s) for s in sorted(self._streamed)]
+        # Reconnects carry every subscribed symbol in the URL
+        return f"{self.ws_url}/stream?streams={'/'.join(streams)}"
+
+    def subscribe(self, symbol: str) -> bool:
+        """Stream the symbol from now on, False when the subscription cap is reached"""
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol in self._symbols:
+                return True
+            if len(self._symbols) >= self.max_symbols:
+                logger.debug(f"Price stream carries {self.max_symbols} symbols, {symbol} is not streamed")
+                return False
+            self._symbols.add(symbol)
+
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        elif not self._subscribe_missing():
+            # Not connected right now, subscribed once the connection opens
+            logger.debug(f"Price stream offline, {symbol} queued for the next connect")
+        return True
+
+    async def on_open(self, ws) -> None:
+        # Symbols requested after url() was built are missing from the URL
+        self._subscribe_missing()
+
+    def _subscribe_missing(self) -> bool:
+        """SUBSCRIBE requested symbols the connection does not carry, False when not connected"""
+        with self._lock:
+            missing = sorted(self._symbols - self._streamed)
+            if not missing:
+                return True
+            self._request_id += 1
+            payload = {'method': 'SUBSCRIBE', 'params': [self._stream_name(s) for s in missing],
+                       'id': self._request_id}
+            if not self.send(payload):
+                return False
+            self._streamed.update(missing)
+            return True
+
+    def put(self, symbol: str, price: float, updated_at: Optional[float] = None) -> None:
+        self._prices[symbol.upper()] = (price, updated_at if updated_at is not None else time.time())
+
+    def get(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """(price, updated_at) from memory, subscribing the symbol when it is new"""
+        symbol = symbol.upper()
+        if symbol not in self._symbols:
+            self.subscribe(symbol)
+        return self._prices.get(symbol)
+
+    def peek(self, symbol: str) -> Optional[Tuple[float, float]]:
+        """(price, updated_at) if the symbol is already streamed, never subscribes"""
+        return self._prices.get(symbol.upper())
+
+    def on_message(self, message: Any) -> None:
+        if not isinstance(message, dict):
+            return
+        data = message.get('data', message)  # combined streams wrap the payload
+        event_type = data.get('e')
+        if event_type == 'markPriceUpdate':
+            self.put(data['s'], float(data['p']), data['E'] / 1000)
+        elif event_type == 'bookTicker':
+            mid = (float(data['b']) + float(data['a'])) / 2
+            self.put(data['s'], mid, data.get('E', data.get('T', time.time() * 1000)) / 1000)
+
+# Global price cache instance
+_price_cache = None
+
+def get_price_cache() -> PriceCache:
+    """Get or create the price cache"""
+    global _price_cache
+    if _price_cache is None:
+        _price_cache = PriceCache()
+    return _price_cache
@@ -1,48 +1,215 @@
 import json
 import logging
-from typing import Any, Dict
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
 from src.bot.client import BinanceClient
+from src.bot.config import settings
+from src.bot.filters import SymbolFilters
 
 logger = logging.getLogger(__name__)
 
 CACHE_FILE = "exchange_info.json"
+LOCK_TIMEOUT = 60  # seconds after which another process' refresh lock is considered dead
 
 class SymbolService:
-    def __init__(self, client: BinanceClient):
+    def __init__(self, client: BinanceClient, cache_file: Optional[str] = None,
+                 max_age: Optional[int] = None):
         self.client = client
+        self.cache_file = cache_file or settings.exchange_info_cache_file or CACHE_FILE
+        self.max_age = settings.exchange_info_max_age if max_age is None else max_age
         self._exchange_info = None
-        self._load_cache()
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+        self._filters: Dict[str, SymbolFilters] = {}
+        self._fetched_at = 0.0  # wall-clock time the loaded data was fetched
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._cache_checked = False  # the cache file is read on first use, not at construction
+        # Simulated exchange info must never replace the real exchange's cached copy
+        self.use_cache = getattr(client, 'simulated', False) is not True
 
-    def _load_cache(self):
+    def _cache_mtime(self) -> Optional[float]:
         try:
-            with open(CACHE_FILE, "r") as f:
-                self._exchange_info = json.load(f)
-                logger.info("Loaded exchange info from cache.")
-        except (FileNotFoundError, json.JSONDecodeError):
+            return os.stat(self.cache_file).st_mtime
+        except OSError:
+            return None
+
+    def _is_stale(self) -> bool:
+        return time.time() - self._fetched_at > self.max_age
+
+    def _load_cache(self) -> bool:
+        mtime = self._cache_mtime()
+        try:
+            with open(self.cache_file, "r") as f:
+                self._set_exchange_info(json.load(f))
+            self._fetched_at = mtime or 0.0
+            logger.info("Loaded exchange info from cache.")
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
             logger.info("Cache not found or invalid, will fetch from API.")
-            self._exchange_info = None
+            self._set_exchange_info(None)
+            return False
+
+        if self._is_stale():
+            logger.info("Exchange info cache is stale, refreshing in background.")
+            self.refresh_in_background()
+        return True
 
     def _save_cache(self):
-        if self._exchange_info:
-            with open(CACHE_FILE, "w") as f:
+        """Write the cache to a temp file and rename it into place.
+
+        The cache only saves later fetches, a read-only directory or full disk
+        is logged and the data fetched stays in memory.
+        """
+        if not self._exchange_info:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".exchange_info.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
                 json.dump(self._exchange_info, f)
-                logger.info("Saved exchange info to cache.")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.cache_file)
+            self._fetched_at = self._cache_mtime() or time.time()
+            logger.info("Saved exchange info to cache.")
+        except OSError as e:
+            self._fetched_at = time.time()
+            logger.warning(f"Could not write the exchange info cache {self.cache_file}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _acquire_file_lock(self) -> bool:
+        """Cross-process lock so only one process refetches exchange info"""
+        lock_path = f"{self.cache_file}.lock"
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime < LOCK_TIMEOUT:
+                    return False
+                os.remove(lock_path)
+            except OSError:
+                return False
+            return self._acquire_file_lock()
+        except OSError as e:
+            # No shared cache to coordinate on, refresh this process' copy anyway
+            logger.debug(f"Exchange info refresh lock unavailable: {e}")
+            return True
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+    def _release_file_lock(self):
+        try:
+            os.remove(f"{self.cache_file}.lock")
+        except OSError:
+            pass
+
+    def _set_exchange_info(self, exchange_info) -> None:
+        """Store exchange info and rebuild the per-symbol index"""
+        if exchange_info is None:
+            self._exchange_info = None
+            self._symbols = {}
+            self._filters = {}
+            return
+
+        if not isinstance(exchange_info, dict) or 'symbols' not in exchange_info:
+            keys = list(exchange_info.keys()) if isinstance(exchange_info, dict) else type(exchange_info)
+            raise ValueError(f"Invalid exchange info structure: {keys}")
+
+        symbols = {s['symbol']: s for s in exchange_info['symbols']}
+        filters = {name: SymbolFilters.from_symbol_info(s) for name, s in symbols.items()}
+        # Swap the whole index in one go so readers never see a half-built one
+        self._exchange_info, self._symbols, self._filters = exchange_info, symbols, filters
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._exchange_info)
 
     def fetch_exchange_info(self) -> Dict[str, Any]:
         logger.info("Fetching exchange info from API...")
-        self._exchange_info = self.client.futures_exchange_info()
-        logger.debug(f"Exchange info response type: {type(self._exchange_info)}, keys: {list(self._exchange_info.keys()) if isinstance(self._exchange_info, dict) else 'not a dict'}")
-        self._save_cache()
+        self._set_exchange_info(self.client.futures_exchange_info())
+        logger.debug(f"Exchange info loaded with {len(self._symbols)} symbols")
+        if self.use_cache:
+            self._save_cache()
+        else:
+            self._fetched_at = time.time()
         return self._exchange_info
 
-    def get_symbol_filters(self, symbol: str) -> Dict[str, Any]:
+    def refresh(self) -> None:
+        """Bring exchange info up to date, preferring a copy another process already fetched"""
+        if not self.use_cache:
+            self.fetch_exchange_info()
+            return
+        mtime = self._cache_mtime()
+        if mtime and mtime > self._fetched_at and time.time() - mtime <= self.max_age:
+            if self._load_cache():
+                return
+
+        if not self._acquire_file_lock():
+            logger.debug("Another process is refreshing exchange info, skipping.")
+            return
+        try:
+            self.fetch_exchange_info()
+        finally:
+            self._release_file_lock()
+
+    def _refresh_worker(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Background exchange info refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread unless one is already running"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        # Push the next staleness check out so a failing refresh is not retried on every order
+        self._fetched_at = max(self._fetched_at, time.time() - self.max_age + LOCK_TIMEOUT)
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_worker, name="exchange-info-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _ensure_loaded(self):
+        if not self._cache_checked:
+            self._cache_checked = True
+            if self.use_cache:
+                self._load_cache()
         if not self._exchange_info:
             self.fetch_exchange_info()
+        elif self._is_stale():
+            self.refresh_in_background()
 
-        if 'symbols' not in self._exchange_info:
-            raise ValueError(f"Invalid exchange info structure: {list(self._exchange_info.keys())}")
-        
-        for s in self._exchange_info['symbols']:
-            if s['symbol'] == symbol:
-                return s
-        raise ValueError(f"Symbol {symbol} not found in exchange info.")
+    def get_exchange_info(self) -> Dict[str, Any]:
+        """Full exchange info, loaded from the cache or the API on first use"""
+        self._ensure_loaded()
+        return self._exchange_info
+
+    def has_symbol(self, symbol: str) -> bool:
+        """True when exchange info lists the symbol"""
+        self._ensure_loaded()
+        return symbol in self._symbols
+
+    def get_symbol_filters(self, symbol: str) -> Dict[str, Any]:
+        """Raw exchange info entry for a symbol"""
+        self._ensure_loaded()
+
+        try:
+            return self._symbols[symbol]
+        except KeyError:
+            raise ValueError(f"Symbol {symbol} not found in exchange info.") from None
+
+    def get_parsed_filters(self, symbol: str) -> SymbolFilters:
+        """Pre-parsed filters for a symbol, used on the order path"""
+        self._ensure_loaded()
+
+        try:
+            return self._filters[symbol]
+        except KeyError:
+            raise ValueError(f"Symbol {symbol} not found in exchange info.") from None
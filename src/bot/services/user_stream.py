@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from src.bot.client import BinanceClient
+from src.bot.config import settings
+from src.bot.database import Database, get_database
+from src.bot.streams import WebSocketStream
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 30 * 60  # listenKeys expire after 60 minutes without a keepalive
+
+def order_update_to_status(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the short keys of an ORDER_TRADE_UPDATE order onto the REST order fields"""
+    return {
+        'orderId': order.get('i'),
+        'symbol': order.get('s'),
+        'clientOrderId': order.get('c'),
+        'side': order.get('S'),
+        'type': order.get('o'),
+        'timeInForce': order.get('f'),
+        'origQty': order.get('q'),
+        'price': order.get('p'),
+        'avgPrice': order.get('ap'),
+        'stopPrice': order.get('sp'),
+        'executionType': order.get('x'),
+        'status': order.get('X'),
+        'executedQty': order.get('z'),
+        'lastFilledQty': order.get('l'),
+        'lastFilledPrice': order.get('L'),
+        'updateTime': order.get('T'),
+    }
+
+class UserDataStream(WebSocketStream):
+    """Subscribes to the futures user-data stream and applies order updates to the database"""
+
+    def __init__(self, client: BinanceClient, db: Optional[Database] = None,
+                 ws_url: Optional[str] = None, keepalive_interval: float = KEEPALIVE_INTERVAL):
+        if getattr(client, 'simulated', False) is True:
+            raise ValueError("The simulated exchange has no user data stream, use EXCHANGE=binance")
+        super().__init__(name="user-data-stream")
+        self.client = client
+        self.db = db or get_database()
+        self.ws_url = (ws_url or settings.ws_url).rstrip('/')
+        self.keepalive_interval = keepalive_interval
+        self.listen_key: Optional[str] = None
+        # Database writes leave the event loop, one worker keeps them in arrival order
+        self._db_worker = self._new_db_worker()
+
+    @staticmethod
+    def _new_db_worker() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-data-db")
+
+    def start(self) -> "UserDataStream":
+        if self._db_worker is None:
+            self._db_worker = self._new_db_worker()
+        return super().start()
+
+    def stop(self, timeout: float = 5.0):
+        super().stop(timeout)
+        # Updates already received are written before stop returns
+        if self._db_worker is not None:
+            self._db_worker.shutdown(wait=True)
+            self._db_worker = None
+
+    def url(self) -> str:
+        self.listen_key = self.client.futures_stream_get_listen_key()
+        return f"{self.ws_url}/ws/{self.listen_key}"
+
+    async def on_open(self, ws) -> None:
+        self.create_task(self._keepalive(self.listen_key))
+
+    async def _keepalive(self, listen_key: str):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            try:
+                await asyncio.to_thread(self.client.futures_stream_keepalive, listen_key)
+                logger.debug("listenKey keepalive sent")
+            except Exception as e:
+                logger.warning(f"listenKey keepalive failed, reconnecting: {e}")
+                self.reconnect()
+                return
+
+    def on_message(self, message: Any) -> None:
+        event_type = message.get('e') if isinstance(message, dict) else None
+        if event_type == 'ORDER_TRADE_UPDATE':
+            self._db_worker.submit(self._handle_order_update_logged, message)
+        elif event_type == 'listenKeyExpired':
+            logger.warning("listenKey expired, reconnecting with a new one")
+            self.reconnect()
+
+    def _handle_order_update_logged(self, event: Dict[str, Any]) -> None:
+        try:
+            self.handle_order_update(event)
+        except Exception as e:
+            logger.error(f"Failed to apply order update: {e}")
+
+    def handle_order_update(self, event: Dict[str, Any]) -> None:
+        status = order_update_to_status(event.get('o', {}))
+        order_id = status['orderId']
+        logger.info(f"Order update: {order_id} {status['executionType']} -> {status['status']}")
+
+        # Matched by order ID, then client order ID, recorded when it arrives before place_order saved it
+        self.db.apply_order_update(status)
+        self.db.log_activity(
+            action='order_update',
+            status='success',
+            symbol=status['symbol'],
+            order_id=order_id,
+            message=f"{status['executionType']}: {status['status']}",
+            user_interface='stream'
+        )
@@ -0,0 +1,503 @@
+"""
+In-process paper-trading exchange with the BinanceClient interface
+"""
+import heapq
+import json
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from binance.exceptions import BinanceAPIException
+from src.bot.config import settings
+from src.bot.filters import SymbolFilters
+
+logger = logging.getLogger(__name__)
+
+# Used when no exchange info cache is available
+DEFAULT_EXCHANGE_INFO = {
+    "timezone": "UTC",
+    "rateLimits": [],
+    "symbols": [
+        {"symbol": symbol, "status": "TRADING", "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": tick, "maxPrice": "1000000", "tickSize": tick},
+            {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+            {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120", "stepSize": "0.001"},
+            {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+            {"filterType": "MIN_NOTIONAL", "notional": "5"},
+        ]} for symbol, tick in (("BTCUSDT", "0.10"), ("ETHUSDT", "0.01"))
+    ],
+}
+DEFAULT_PRICES = {"BTCUSDT": 95000.0, "ETHUSDT": 3500.0}
+GENERATED_ID_PREFIX = 'sim-'  # clientOrderId of orders placed without newClientOrderId
+
+NEW, PARTIALLY_FILLED, FILLED, CANCELED, EXPIRED = 'NEW', 'PARTIALLY_FILLED', 'FILLED', 'CANCELED', 'EXPIRED'
+OPEN_STATUSES = (NEW, PARTIALLY_FILLED)
+
+# type -> (price handling, trigger)
+REQUIRES_PRICE, ACCEPTS_PRICE, NO_PRICE = 'required', 'optional', 'none'
+STOP, TAKE_PROFIT = 'stop', 'take_profit'
+ORDER_KINDS = {
+    'LIMIT': (REQUIRES_PRICE, None),
+    'MARKET': (NO_PRICE, None),
+    'STOP': (ACCEPTS_PRICE, STOP),
+    'STOP_LIMIT': (REQUIRES_PRICE, STOP),
+    'STOP_MARKET': (NO_PRICE, STOP),
+    'TAKE_PROFIT': (ACCEPTS_PRICE, TAKE_PROFIT),
+    'TAKE_PROFIT_LIMIT': (REQUIRES_PRICE, TAKE_PROFIT),
+    'TAKE_PROFIT_MARKET': (NO_PRICE, TAKE_PROFIT),
+}
+TIME_IN_FORCE = ('GTC', 'IOC', 'FOK')
+
+def _api_error(code: int, msg: str) -> BinanceAPIException:
+    """Same exception the REST client raises for an error response"""
+    return BinanceAPIException(None, 400, json.dumps({'code': code, 'msg': msg}))
+
+def _decimals(value: Decimal) -> int:
+    return max(0, -value.normalize().as_tuple().exponent)
+
+class _SymbolSpec:
+    """Filters of one symbol as floats and integer limits, for the matching hot path"""
+    __slots__ = ('symbol', 'tick', 'step', 'price_format', 'qty_format', 'min_price', 'max_price',
+                 'min_qty', 'max_qty', 'market_min_qty', 'market_max_qty', 'min_notional',
+                 'max_orders', 'multiplier_up', 'multiplier_down')
+
+    def __init__(self, filters: SymbolFilters):
+        price, lot = filters.price_filter, filters.lot_size
+        market_lot = filters.market_lot_size or lot
+        tick = price.tick_size if price else Decimal('0.01')
+        step = lot.step_size if lot else Decimal('0.001')
+        self.symbol = filters.symbol
+        self.tick, self.step = float(tick), float(step)
+        self.price_format = f"%.{_decimals(tick)}f"
+        self.qty_format = f"%.{_decimals(step)}f"
+        self.min_price = float(price.min_price) if price and price.min_price else 0.0
+        self.max_price = float(price.max_price) if price and price.max_price else 0.0
+        self.min_qty = float(lot.min_qty) if lot else 0.0
+        self.max_qty = float(lot.max_qty) if lot and lot.max_qty else 0.0
+        self.market_min_qty = float(market_lot.min_qty) if market_lot else 0.0
+        self.market_max_qty = float(market_lot.max_qty) if market_lot and market_lot.max_qty else 0.0
+        self.min_notional = float(filters.min_notional.notional) if filters.min_notional else 0.0
+        self.max_orders = filters.max_num_orders.limit if filters.max_num_orders else 0
+        percent = filters.percent_price
+        self.multiplier_up = float(percent.multiplier_up) if percent else 0.0
+        self.multiplier_down = float(percent.multiplier_down) if percent else 0.0
+
+class _Order:
+    """Prices are integer ticks and quantities integer steps, so matching is exact"""
+    __slots__ = ('order_id', 'client_order_id', 'spec', 'is_buy', 'type', 'time_in_force',
+                 'price', 'stop', 'qty', 'filled', 'quote', 'status', 'reduce_only', 'resting', 'update_time')
+
+    def __init__(self, order_id, client_order_id, spec, is_buy, type_, time_in_force, price, stop,
+                 qty, reduce_only, now):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.spec = spec
+        self.is_buy = is_buy
+        self.type = type_
+        self.time_in_force = time_in_force
+        self.price = price  # ticks, None for market orders
+        self.stop = stop  # ticks, None unless a STOP or TAKE_PROFIT order
+        self.qty = qty
+        self.filled = 0
+        self.quote = 0  # sum of fill steps * fill ticks
+        self.status = NEW
+        self.reduce_only = reduce_only
+        self.resting = False  # on the book or waiting for its trigger
+        self.update_time = now
+
+class _Book:
+    """Resting orders in price-time priority, plus untriggered stop orders"""
+    __slots__ = ('spec', 'bids', 'asks', 'trigger_above', 'trigger_below', 'reference', 'position', 'open_orders')
+
+    def __init__(self, spec: _SymbolSpec, reference: Optional[int]):
+        self.spec = spec
+        self.bids: list = []  # (-ticks, seq, order)
+        self.asks: list = []  # (ticks, seq, order)
+        self.trigger_above: list = []  # (stop ticks, seq, order), fire once reference >= stop
+        self.trigger_below: list = []  # (-stop ticks, seq, order), fire once reference <= stop
+        self.reference = reference  # ticks, the simulated market price
+        self.position = 0  # steps, positive is long
+        self.open_orders = 0  # resting and untriggered orders, limited by MAX_NUM_ORDERS
+
+class SimulatedBinanceClient:
+    """Drop-in BinanceClient that matches orders in memory.
+
+    Each symbol has a book of resting orders and a reference price standing in
+    for the rest of the market: orders that cross it fill there in full, and
+    moving it with set_price() fills resting orders it trades through and fires
+    STOP/TAKE_PROFIT triggers. Orders are checked against the exchange filters
+    and rejected with the exchange's error codes.
+    """
+    simulated = True
+
+    def __init__(self, exchange_info: Optional[Dict[str, Any]] = None, prices: Optional[Dict[str, float]] = None):
+        self.exchange_info = exchange_info or DEFAULT_EXCHANGE_INFO
+        self.clock = None
+        self.governor = None
+        self._books: Dict[str, _Book] = {}
+        for info in self.exchange_info['symbols']:
+            spec = _SymbolSpec(SymbolFilters.from_symbol_info(info))
+            self._books[spec.symbol] = _Book(spec, None)
+        for symbol, price in (DEFAULT_PRICES if prices is None else prices).items():
+            if symbol in self._books:
+                self._books[symbol].reference = round(float(price) / self._books[symbol].spec.tick)
+        self._orders: Dict[int, _Order] = {}
+        self._client_ids: Dict[str, _Order] = {}
+        self._next_id = 1
+        self._seq = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_settings(cls) -> "SimulatedBinanceClient":
+        """Symbols from the exchange info cache when there is one, prices from SIMULATOR_PRICES"""
+        exchange_info = None
+        try:
+            with open(settings.exchange_info_cache_file) as f:
+                exchange_info = json.load(f)
+        except (OSError, ValueError):
+            logger.info("No exchange info cache, simulating the default symbols")
+        return cls(exchange_info, settings.simulator_prices or None)
+
+    # BinanceClient interface
+
+    def sync_time(self) -> int:
+        return 0
+
+    def sync_time_in_background(self):
+        pass
+
+    def connection_stats(self) -> Dict[str, Any]:
+        return {'connections': 0, 'requests': 0, 'reuse_ratio': 0.0, 'hosts': {}}
+
+    def futures_exchange_info(self):
+        return self.exchange_info
+
+    def futures_ping(self):
+        return {}
+
+    def futures_symbol_ticker(self, **params):
+        book = self._book(params.get('symbol'))
+        if book.reference is None:
+            raise _api_error(-1121, "Invalid symbol.")
+        return {'symbol': book.spec.symbol, 'price': book.spec.price_format % (book.reference * book.spec.tick),
+                'time': int(time.time() * 1000)}
+
+    def futures_create_order(self, **params):
+        with self._lock:
+            return self._response(self._place(params))
+
+    def futures_place_batch_order(self, batch_orders: list):
+        results = []
+        with self._lock:
+            for params in batch_orders:
+                try:
+                    results.append(self._response(self._place(dict(params))))
+                except BinanceAPIException as e:
+                    results.append({'code': e.code, 'msg': e.message})
+        return results
+
+    def futures_get_order(self, **params):
+        with self._lock:
+            return self._response(self._find(params))
+
+    def futures_cancel_order(self, **params):
+        with self._lock:
+            order = self._find(params)
+            if order.status not in OPEN_STATUSES:
+                raise _api_error(-2011, "Unknown order sent.")
+            self._unrest(self._books[order.spec.symbol], order)
+            order.status = CANCELED
+            order.update_time = int(time.time() * 1000)
+            return self._response(order)
+
+    # Simulation controls
+
+    def set_price(self, symbol: str, price: float) -> List[Dict[str, Any]]:
+        """Move the reference price, returns the orders that filled or triggered"""
+        with self._lock:
+            book = self._book(symbol)
+            reference = book.reference = round(float(price) / book.spec.tick)
+            touched = []
+
+            # The market traded through these, they fill at their own price
+            for side, crossed in ((book.bids, lambda ticks: -ticks >= reference),
+                                  (book.asks, lambda ticks: ticks <= reference)):
+                while side:
+                    key, _, order = side[0]
+                    if order.status not in OPEN_STATUSES:
+                        heapq.heappop(side)
+                        continue
+                    if not crossed(key):
+                        break
+                    heapq.heappop(side)
+                    self._fill(book, order, order.qty - order.filled, order.price)
+                    touched.append(order)
+
+            for heap, fired in ((book.trigger_above, lambda key: key <= reference),
+                                (book.trigger_below, lambda key: -key >= reference)):
+                while heap and fired(heap[0][0]):
+                    order = heapq.heappop(heap)[2]
+                    if order.status == NEW:
+                        self._unrest(book, order)
+                        self._run(book, order)
+                        touched.append(order)
+            return [self._response(order) for order in touched]
+
+    def get_position(self, symbol: str) -> float:
+        book = self._book(symbol)
+        return book.position * book.spec.step
+
+    # Matching engine
+
+    def _book(self, symbol: Optional[str]) -> _Book:
+        book = self._books.get(symbol)
+        if book is None:
+            raise _api_error(-1121, "Invalid symbol.")
+        return book
+
+    def _find(self, params: Dict[str, Any]) -> _Order:
+        self._book(params.get('symbol'))
+        if params.get('orderId') is not None:
+            order = self._orders.get(int(params['orderId']))
+        elif params.get('origClientOrderId') is not None:
+            client_order_id = params['origClientOrderId']
+            order = self._client_ids.get(client_order_id)
+            suffix = client_order_id[len(GENERATED_ID_PREFIX):]
+            if order is None and client_order_id.startswith(GENERATED_ID_PREFIX) and suffix.isdigit():
+                # Generated ids are not indexed, they carry the order id
+                order = self._orders.get(int(suffix))
+                if order is not None and order.client_order_id is not None:
+                    order = None
+        else:
+            raise _api_error(-1102, "Param 'orderId' or 'origClientOrderId' must be sent, but both were empty/null!")
+        if order is None or order.spec.symbol != params['symbol']:
+            raise _api_error(-2013, "Order does not exist.")
+        return order
+
+    def _ticks(self, spec: _SymbolSpec, value: Any, name: str) -> int:
+        price = float(value)
+        if price <= 0:
+            raise _api_error(-4001 if name == 'price' else -4006, f"{name} less than or equal to zero.")
+        ticks = round(price / spec.tick)
+        if abs(ticks * spec.tick - price) > spec.tick * 1e-6:
+            raise _api_error(-4014, "Price not increased by tick size.")
+        if spec.min_price and price < spec.min_price:
+            raise _api_error(-4013, "Price less than min price.")
+        if spec.max_price and price > spec.max_price:
+            raise _api_error(-4002 if name == 'price' else -4007, f"{name} greater than max price.")
+        return ticks
+
+    def _place(self, params: Dict[str, Any]) -> _Order:
+        book = self._books.get(params.get('symbol'))
+        if book is None:
+            raise _api_error(-1121, "Invalid symbol.")
+        spec = book.spec
+
+        order_type = params.get('type')
+        kind = ORDER_KINDS.get(order_type)
+        if kind is None:
+            raise _api_error(-1116, "Invalid orderType.")
+        side = params.get('side')
+        if side == 'BUY':
+            is_buy = True
+        elif side == 'SELL':
+            is_buy = False
+        else:
+            raise _api_error(-1117, "Invalid side.")
+        limit_kind, trigger = kind
+        raw_price = params.get('price')
+        # STOP and TAKE_PROFIT become limit orders when given a price, market orders otherwise
+        is_limit = limit_kind == REQUIRES_PRICE or (limit_kind == ACCEPTS_PRICE and raw_price is not None)
+
+        time_in_force = None
+        if is_limit:
+            time_in_force = params.get('timeInForce') or 'GTC'
+            if time_in_force not in TIME_IN_FORCE:
+                raise _api_error(-1115, "Invalid timeInForce.")
+            if raw_price is None:
+                raise _api_error(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+
+        quantity = float(params.get('quantity') or 0)
+        if quantity <= 0:
+            raise _api_error(-4003, "Quantity less than or equal to zero.")
+        if is_limit:
+            min_qty, max_qty = spec.min_qty, spec.max_qty
+        else:
+            min_qty, max_qty = spec.market_min_qty, spec.market_max_qty
+        if quantity < min_qty:
+            raise _api_error(-4004, "Quantity less than min quantity.")
+        if max_qty and quantity > max_qty:
+            raise _api_error(-4005, "Quantity greater than max quantity.")
+        step = spec.step
+        qty = round(quantity / step)
+        if abs(qty * step - quantity) > step * 1e-6:
+            raise _api_error(-4023, "Quantity not increased by step size.")
+
+        reference = book.reference
+        price = None
+        if is_limit:
+            price = self._ticks(spec, raw_price, 'price')
+            if reference is not None and spec.multiplier_up:
+                if is_buy and price > reference * spec.multiplier_up:
+                    raise _api_error(-4016, "Limit price can't be higher than the multiplier-up bound.")
+                if not is_buy and price < reference * spec.multiplier_down:
+                    raise _api_error(-4024, "Limit price can't be lower than the multiplier-down bound.")
+
+        stop = None
+        if trigger is not None:
+            if params.get('stopPrice') is None:
+                raise _api_error(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, or malformed.")
+            stop = self._ticks(spec, params['stopPrice'], 'stopPrice')
+
+        reduce_only = params.get('reduceOnly', False)
+        if reduce_only is not False and reduce_only is not True:
+            reduce_only = str(reduce_only).lower() == 'true'
+        if reduce_only:
+            if book.position == 0 or (book.position > 0) == is_buy:
+                raise _api_error(-2022, "ReduceOnly Order is rejected.")
+        elif spec.min_notional:
+            notional_ticks = price if price is not None else stop if stop is not None else reference
+            if notional_ticks is not None and notional_ticks * spec.tick * quantity < spec.min_notional:
+                raise _api_error(-4164, f"Order's notional must be no smaller than {spec.min_notional} "
+                                        f"(unless you choose reduce only).")
+
+        if spec.max_orders and book.open_orders >= spec.max_orders:
+            raise _api_error(-2025, "Reach max open order limit.")
+
+        client_order_id = params.get('newClientOrderId')
+        if client_order_id is not None:
+            existing = self._client_ids.get(client_order_id)
+            if existing is not None and existing.status in OPEN_STATUSES:
+                raise _api_error(-4116, "ClientOrderId is duplicated.")
+
+        # Stops fire as the price rises through them, take-profits as it falls, mirrored for sells
+        trigger_above = (trigger == STOP) == is_buy
+        if stop is not None and reference is not None:
+            if (reference >= stop) if trigger_above else (reference <= stop):
+                raise _api_error(-2021, "Order would immediately trigger.")
+
+        order_id = self._next_id
+        self._next_id = order_id + 1
+        order = _Order(order_id, client_order_id, spec, is_buy, order_type, time_in_force,
+                       price, stop, qty, reduce_only, int(time.time() * 1000))
+        self._orders[order_id] = order
+        if client_order_id is not None:
+            self._client_ids[client_order_id] = order
+
+        if stop is None:
+            self._run(book, order)
+        else:
+            self._seq += 1
+            self._rest(book, order)
+            if trigger_above:
+                heapq.heappush(book.trigger_above, (stop, self._seq, order))
+            else:
+                heapq.heappush(book.trigger_below, (-stop, self._seq, order))
+        return order
+
+    def _run(self, book: _Book, order: _Order):
+        """Match an active order, then rest, expire or finish it according to its time in force"""
+        if order.time_in_force == 'FOK' and not self._can_fill(book, order):
+            order.status = EXPIRED
+            return
+        remaining = self._match(book, order)
+        if not remaining:
+            return
+        if order.price is None or order.time_in_force != 'GTC':
+            order.status = EXPIRED
+            return
+        self._seq += 1
+        self._rest(book, order)
+        if order.is_buy:
+            heapq.heappush(book.bids, (-order.price, self._seq, order))
+        else:
+            heapq.heappush(book.asks, (order.price, self._seq, order))
+
+    def _match(self, book: _Book, order: _Order) -> int:
+        """Fill against the reference price and resting orders, returns the unfilled steps"""
+        is_buy, limit, reference = order.is_buy, order.price, book.reference
+        opposite = book.asks if is_buy else book.bids
+        remaining = order.qty - order.filled
+        while remaining:
+            while opposite and opposite[0][2].status not in OPEN_STATUSES:
+                heapq.heappop(opposite)
+            maker = opposite[0][2] if opposite else None
+            # The rest of the market, at the reference price, has unlimited depth
+            if reference is not None and (maker is None or (reference <= maker.price if is_buy
+                                                            else reference >= maker.price)):
+                if limit is not None and (reference > limit if is_buy else reference < limit):
+                    break
+                self._fill(book, order, remaining, reference)
+                return 0
+            if maker is None or (limit is not None and (maker.price > limit if is_buy else maker.price < limit)):
+                break
+            quantity = min(remaining, maker.qty - maker.filled)
+            self._fill(book, maker, quantity, maker.price)
+            self._fill(book, order, quantity, maker.price)
+            remaining -= quantity
+            if maker.status == FILLED:
+                heapq.heappop(opposite)
+        return remaining
+
+    def _can_fill(self, book: _Book, order: _Order) -> bool:
+        limit, reference = order.price, book.reference
+        if reference is not None and (limit is None or (reference <= limit if order.is_buy else reference >= limit)):
+            return True
+        needed = order.qty - order.filled
+        for _, _, maker in (book.asks if order.is_buy else book.bids):
+            if maker.status in OPEN_STATUSES and (limit is None or (maker.price <= limit if order.is_buy
+                                                                    else maker.price >= limit)):
+                needed -= maker.qty - maker.filled
+                if needed <= 0:
+                    return True
+        return False
+
+    def _fill(self, book: _Book, order: _Order, quantity: int, ticks: int):
+        order.filled += quantity
+        order.quote += quantity * ticks
+        book.position += quantity if order.is_buy else -quantity
+        order.update_time = int(time.time() * 1000)
+        if order.filled == order.qty:
+            order.status = FILLED
+            self._unrest(book, order)
+        else:
+            order.status = PARTIALLY_FILLED
+
+    @staticmethod
+    def _rest(book: _Book, order: _Order):
+        order.resting = True
+        book.open_orders += 1
+
+    @staticmethod
+    def _unrest(book: _Book, order: _Order):
+        # Heap entries of closed orders are skipped when they reach the top
+        if order.resting:
+            order.resting = False
+            book.open_orders -= 1
+
+    @staticmethod
+    def _response(order: _Order) -> Dict[str, Any]:
+        spec = order.spec
+        tick, price_format = spec.tick, spec.price_format
+        filled = order.filled
+        return {
+            'orderId': order.order_id,
+            'symbol': spec.symbol,
+            'status': order.status,
+            'clientOrderId': order.client_order_id or GENERATED_ID_PREFIX + str(order.order_id),
+            'price': price_format % (order.price * tick) if order.price is not None else price_format % 0,
+            'avgPrice': price_format % (order.quote / filled * tick) if filled else price_format % 0,
+            'origQty': spec.qty_format % (order.qty * spec.step),
+            'executedQty': spec.qty_format % (filled * spec.step),
+            'cumQuote': '%.8f' % (order.quote * tick * spec.step),
+            'timeInForce': order.time_in_force or 'GTC',
+            'type': order.type,
+            'origType': order.type,
+            'reduceOnly': order.reduce_only,
+            'side': 'BUY' if order.is_buy else 'SELL',
+            'positionSide': 'BOTH',
+            'stopPrice': price_format % (order.stop * tick) if order.stop is not None else price_format % 0,
+            'workingType': 'CONTRACT_PRICE',
+            'updateTime': order.update_time,
+        }
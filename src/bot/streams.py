@@ -0,0 +1,122 @@
+"""
+WebSocket stream runner shared by the user-data and market-data subscribers
+"""
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Optional, Set
+import websockets
+
+logger = logging.getLogger(__name__)
+
+class WebSocketStream:
+    """One WebSocket connection served from a background thread with its own event loop.
+
+    Subclasses provide `url()` and `on_message()`. The connection is re-opened
+    with exponential backoff whenever it drops, and `url()` is called again on
+    every attempt so it may hand out a fresh listenKey.
+    """
+
+    def __init__(self, name: str, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.name = name
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+        self._stopping = False
+        self._stop_event: Optional[asyncio.Event] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def url(self) -> str:
+        raise NotImplementedError
+
+    def on_message(self, message: Any) -> None:
+        raise NotImplementedError
+
+    async def on_open(self, ws) -> None:
+        """Called after each (re)connect, e.g. to resubscribe"""
+
+    def create_task(self, coro) -> asyncio.Task:
+        """Background task tied to the current connection, cancelled when it closes"""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def start(self) -> "WebSocketStream":
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stopping = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._thread_main, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        if self._loop and not self._loop.is_closed():
+            if self._stop_event is not None:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            if self._ws is not None:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread:
+            self._thread.join(timeout)
+
+    def send(self, payload: Any) -> bool:
+        """Send a JSON message from any thread, False when not connected"""
+        if self._loop is None or self._ws is None:
+            return False
+        asyncio.run_coroutine_threadsafe(self._ws.send(json.dumps(payload)), self._loop)
+        return True
+
+    def reconnect(self):
+        """Drop the current connection so the next attempt calls url() again"""
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    def _thread_main(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self):
+        self._stop_event = asyncio.Event()
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                url = await asyncio.to_thread(self.url)
+                async with websockets.connect(url) as ws:
+                    self._ws = ws
+                    self.connected.set()
+                    delay = self.reconnect_delay
+                    logger.info(f"{self.name} connected")
+                    await self.on_open(ws)
+                    async for raw in ws:
+                        try:
+                            self.on_message(json.loads(raw))
+                        except Exception as e:
+                            logger.error(f"{self.name} failed to handle message: {e}")
+            except Exception as e:
+                if not self._stopping:
+                    logger.warning(f"{self.name} disconnected: {e}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+                for task in list(self._tasks):
+                    task.cancel()
+
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.max_reconnect_delay)
@@ -0,0 +1,173 @@
+"""
+Low-overhead call tracing for the exchange clients
+"""
+import inspect
+import logging
+import random
+import reprlib
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, List, Optional
+from src.bot.config import settings
+from src.bot.metrics import observe_span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAYLOAD_LIMIT = 2000  # characters of a sampled payload that are kept
+# Arguments and dict keys never written to a payload, matched by name
+REDACTED_FIELDS = frozenset(('api_key', 'api_secret', 'signature'))
+REDACTED = '***'
+
+@dataclass(slots=True)
+class Span:
+    """One traced call. Sizes are item counts (len), never serialized bytes."""
+    name: str
+    duration_ms: float
+    status: str  # ok or error
+    args_size: int
+    result_size: Optional[int] = None
+    error_code: Optional[int] = None
+    payload: Optional["LazyPayload"] = None
+
+def _scrub(value: Any, depth: int = 3) -> Any:
+    """Copy of `value` with REDACTED_FIELDS keys masked in nested dicts, lists and tuples.
+
+    Stops at the depth the payload repr shows.
+    """
+    if depth <= 0:
+        return value
+    if isinstance(value, dict):
+        return {k: REDACTED if k in REDACTED_FIELDS else _scrub(v, depth - 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_scrub(v, depth - 1) for v in value)
+    return value
+
+class LazyPayload:
+    """Arguments and result, only turned into text if a log record is actually emitted.
+
+    Secrets are masked when formatting, positional arguments by the parameter
+    names in `signature`.
+    """
+    __slots__ = ('args', 'kwargs', 'result', 'limit', 'signature')
+
+    def __init__(self, args, kwargs, result, limit: int, signature: Optional[inspect.Signature] = None):
+        self.args, self.kwargs, self.result, self.limit = args, kwargs, result, limit
+        self.signature = signature
+
+    def _positional_names(self) -> List[str]:
+        names = []
+        for param in (self.signature.parameters.values() if self.signature is not None else ()):
+            if param.kind not in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+                break
+            names.append(param.name)
+        return names
+
+    def __str__(self) -> str:
+        names = self._positional_names()
+        args = tuple(REDACTED if i < len(names) and names[i] in REDACTED_FIELDS else _scrub(arg)
+                     for i, arg in enumerate(self.args))
+        short = reprlib.Repr()
+        short.maxstring = short.maxother = self.limit
+        short.maxlist = short.maxdict = 20
+        short.maxlevel = 3
+        text = (f"args={short.repr(args)} kwargs={short.repr(_scrub(self.kwargs))} "
+                f"result={short.repr(_scrub(self.result))}")
+        return text[:self.limit]
+
+def _size(value: Any) -> Optional[int]:
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+class Tracer:
+    """Times calls and hands a Span to each registered handler.
+
+    Payloads are attached to a `sample_rate` share of spans, and only while
+    DEBUG logging is enabled for this module.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, payload_limit: int = DEFAULT_PAYLOAD_LIMIT):
+        self.sample_rate = sample_rate
+        self.payload_limit = payload_limit
+        self.handlers: List[Callable[[Span], None]] = [log_span, observe_span]
+
+    def add_handler(self, handler: Callable[[Span], None]):
+        self.handlers.append(handler)
+
+    def remove_handler(self, handler: Callable[[Span], None]):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+
+    def _sample(self) -> bool:
+        return self.sample_rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < self.sample_rate
+
+    def record(self, name: str, started: float, args, kwargs, result=None, error: Optional[BaseException] = None,
+               signature: Optional[inspect.Signature] = None):
+        span = Span(
+            name=name,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            status='error' if error is not None else 'ok',
+            args_size=len(args) + len(kwargs),
+            result_size=_size(result) if error is None else None,
+            error_code=getattr(error, 'code', None) if error is not None else None,
+        )
+        if self._sample():
+            span.payload = LazyPayload(args, kwargs, result if error is None else error, self.payload_limit,
+                                       signature)
+        for handler in self.handlers:
+            try:
+                handler(span)
+            except Exception as e:
+                logger.warning(f"Trace handler {handler!r} failed: {e}")
+
+def log_span(span: Span):
+    """Default handler, formatting is deferred to the logging module"""
+    if span.status == 'error':
+        logger.error("Error in %s (code=%s, %.2f ms)", span.name, span.error_code, span.duration_ms)
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s ok in %.2f ms (args=%d, result=%s)", span.name, span.duration_ms,
+                     span.args_size, span.result_size)
+    if span.payload is not None:
+        logger.debug("%s payload: %s", span.name, span.payload)
+
+# Global tracer
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    """Get or create the tracer configured from settings"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(sample_rate=settings.trace_sample_rate, payload_limit=settings.trace_payload_limit)
+    return _tracer
+
+def traced(func):
+    """Record name, duration, status and sizes of every call, failed ones included"""
+    name = func.__name__
+    signature = inspect.signature(func)  # names positional arguments for redaction
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                get_tracer().record(name, started, args, kwargs, error=e, signature=signature)
+                raise
+            get_tracer().record(name, started, args, kwargs, result, signature=signature)
+            return result
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            get_tracer().record(name, started, args, kwargs, error=e, signature=signature)
+            raise
+        get_tracer().record(name, started, args, kwargs, result, signature=signature)
+        return result
+    return wrapper
@@ -0,0 +1,121 @@
+"""
+HTTP transport tuning for the Binance REST clients
+"""
+import socket
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Connection pool, timeout and keep-alive settings for the REST session"""
+    pool_connections: int = 4       # hosts with a cached pool
+    pool_maxsize: int = 16          # connections kept open per host
+    pool_block: bool = False        # wait for a free connection instead of opening a throwaway one
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    connect_retries: int = 2        # only connection failures, a sent order is never resent
+    tcp_keepalive: bool = True
+    keepalive_idle: int = 60        # seconds idle before the first probe
+    keepalive_interval: int = 10
+    keepalive_count: int = 5
+
+    @classmethod
+    def from_settings(cls, settings) -> "TransportConfig":
+        return cls(
+            pool_maxsize=settings.http_pool_maxsize,
+            pool_block=settings.http_pool_block,
+            connect_timeout=settings.http_connect_timeout,
+            read_timeout=settings.http_read_timeout,
+            connect_retries=settings.http_connect_retries,
+            tcp_keepalive=settings.http_tcp_keepalive,
+        )
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+def keepalive_socket_options(config: TransportConfig) -> List[Tuple[int, int, int]]:
+    """Socket options for new connections, keeping urllib3's TCP_NODELAY default"""
+    options = list(HTTPConnection.default_socket_options)
+    if not config.tcp_keepalive:
+        return options
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    # Probe tuning is platform specific, macOS names the idle time TCP_KEEPALIVE
+    idle = getattr(socket, 'TCP_KEEPIDLE', getattr(socket, 'TCP_KEEPALIVE', None))
+    for name, value in ((idle, config.keepalive_idle),
+                        (getattr(socket, 'TCP_KEEPINTVL', None), config.keepalive_interval),
+                        (getattr(socket, 'TCP_KEEPCNT', None), config.keepalive_count)):
+        if name is not None:
+            options.append((socket.IPPROTO_TCP, name, value))
+    return options
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open sockets with TCP keep-alive enabled"""
+
+    def __init__(self, socket_options: List[Tuple[int, int, int]], **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        return super().proxy_manager_for(*args, **kwargs)
+
+def configure_session(session: requests.Session, config: TransportConfig) -> KeepAliveHTTPAdapter:
+    """Mount a pooled keep-alive adapter on the session for http and https"""
+    adapter = KeepAliveHTTPAdapter(
+        keepalive_socket_options(config),
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+        max_retries=Retry(total=config.connect_retries, connect=config.connect_retries,
+                          read=0, status=0, other=0, redirect=0, raise_on_status=False),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+def connection_stats(session: requests.Session) -> Dict[str, Any]:
+    """Per-host connections opened vs requests served, from the urllib3 pools"""
+    hosts = {}
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            connections, requests_served = pool.num_connections, pool.num_requests
+            hosts[host] = {
+                'connections': connections,
+                'requests': requests_served,
+                'reused': max(requests_served - connections, 0),
+                'idle': pool.pool.qsize() if pool.pool is not None else 0,
+            }
+
+    connections = sum(h['connections'] for h in hosts.values())
+    requests_served = sum(h['requests'] for h in hosts.values())
+    return {
+        'connections': connections,
+        'requests': requests_served,
+        'reuse_ratio': (requests_served - connections) / requests_served if requests_served else 0.0,
+        'hosts': hosts,
+    }
+
+def aiohttp_transport(config: TransportConfig) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(requests_params, session_params) for AsyncClient, call from inside the event loop"""
+    import aiohttp
+
+    # Per-request kwargs override the session timeout, so it goes in requests_params
+    requests_params = {'timeout': aiohttp.ClientTimeout(sock_connect=config.connect_timeout,
+                                                        sock_read=config.read_timeout)}
+    session_params = {'connector': aiohttp.TCPConnector(limit_per_host=config.pool_maxsize,
+                                                        keepalive_timeout=config.keepalive_idle)}
+    return requests_params, session_params
@@ -1,11 +1,22 @@
 import decimal
+from src.bot.filters import grid_scale, to_units
+
+def _to_decimal(value):
+    if isinstance(value, decimal.Decimal):
+        return value
+    return decimal.Decimal(str(value))
+
+def _snap(value, size):
+    size = _to_decimal(size)
+    scale, units = grid_scale(size)
+    if not units:
+        return _to_decimal(value).quantize(size)
+    return (decimal.Decimal(to_units(value, scale, units) * units) / scale).quantize(size)
 
 def format_price(price, tick_size):
-    """Format price to match tick size."""
-    tick_size = decimal.Decimal(str(tick_size))
-    return decimal.Decimal(str(price)).quantize(tick_size)
+    """Format price to the nearest multiple of tick size."""
+    return _snap(price, tick_size)
 
 def format_quantity(quantity, step_size):
-    """Format quantity to match step size."""
-    step_size = decimal.Decimal(str(step_size))
-    return decimal.Decimal(str(quantity)).quantize(step_size)
+    """Format quantity to the nearest multiple of step size."""
+    return _snap(quantity, step_size)
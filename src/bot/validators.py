@@ -1,24 +1,77 @@
-from typing import Any, Dict
-from src.bot.utils import format_price, format_quantity
+from typing import Any, Dict, Optional, Union
+from src.bot.filters import SymbolFilters
+
+# Order types filled at the market, their quantity is checked against MARKET_LOT_SIZE
+MARKET_TYPES = frozenset(('MARKET', 'STOP_MARKET', 'TAKE_PROFIT_MARKET'))
+PRICE_KEYS = (('price', -4002), ('stopPrice', -4007))  # with the code for exceeding maxPrice
+NOTIONAL_TOLERANCE = 1 - 1e-9
+
+class OrderValidationError(ValueError):
+    """Order rejected before sending, `code` is the error the exchange would have returned"""
+
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
 
 def validate_and_normalize_order_params(
-    params: Dict[str, Any], filters: Dict[str, Any]
+    params: Dict[str, Any], filters: Union[SymbolFilters, Dict[str, Any]],
+    reference_price: Optional[float] = None,
 ) -> Dict[str, Any]:
-    """Validate and normalize order parameters against exchange filters."""
-    # Price validation (for LIMIT orders)
-    if 'price' in params and params['price'] is not None:
-        price_filter = next((f for f in filters['filters'] if f['filterType'] == 'PRICE_FILTER'), None)
-        if price_filter:
-            tick_size = price_filter['tickSize']
-            params['price'] = float(format_price(params['price'], tick_size))
-
-    # Quantity validation
-    lot_size_filter = next((f for f in filters['filters'] if f['filterType'] == 'LOT_SIZE'), None)
-    if lot_size_filter:
-        step_size = lot_size_filter['stepSize']
-        min_qty = float(lot_size_filter['minQty'])
+    """Validate and normalize order parameters against exchange filters.
+
+    PERCENT_PRICE, and MIN_NOTIONAL for orders without a price, need the
+    current `reference_price` (mark price) and are left to the exchange when it
+    is not known. MAX_NUM_ORDERS depends on the account's open orders and is
+    always left to the exchange.
+    """
+    if not isinstance(filters, SymbolFilters):
+        filters = SymbolFilters.from_symbol_info(filters)
+    limits = filters.limits
+
+    # Prices snap to whole ticks, the scale is precomputed per symbol
+    if limits.has_price_filter:
+        grid = limits.price_grid
+        for key, max_code in PRICE_KEYS:
+            value = params.get(key)
+            if value is None:
+                continue
+            if grid is not None:
+                value = params[key] = grid.normalize(value)
+            if value <= 0:
+                raise OrderValidationError(-4001 if key == 'price' else -4006,
+                                           f"{key} {value} must be greater than zero")
+            if limits.min_price and value < limits.min_price:
+                raise OrderValidationError(-4013, f"{key} {value} is less than minPrice {limits.min_price}")
+            if limits.max_price and value > limits.max_price:
+                raise OrderValidationError(max_code, f"{key} {value} is greater than maxPrice {limits.max_price}")
+
+    # Quantity validation, market orders use MARKET_LOT_SIZE when the symbol has it
+    price = params.get('price')
+    lot = limits.market_lot if price is None or params.get('type') in MARKET_TYPES else limits.lot
+    if lot is not None:
+        grid, min_qty, max_qty = lot
         if params['quantity'] < min_qty:
-            raise ValueError(f"Quantity {params['quantity']} is less than minQty {min_qty}")
-        params['quantity'] = float(format_quantity(params['quantity'], step_size))
+            raise OrderValidationError(-4004, f"Quantity {params['quantity']} is less than minQty {min_qty}")
+        if grid is not None:
+            params['quantity'] = grid.normalize(params['quantity'])
+        if max_qty and params['quantity'] > max_qty:
+            raise OrderValidationError(-4005, f"Quantity {params['quantity']} is greater than maxQty {max_qty}")
+
+    # PERCENT_PRICE caps buys above the mark and sells below it, the far side is free
+    if limits.multiplier_up and price is not None and reference_price:
+        if params.get('side') == 'BUY' and price > reference_price * limits.multiplier_up:
+            raise OrderValidationError(-4016, f"Price {price} is more than {limits.multiplier_up}x "
+                                              f"the mark price {reference_price}")
+        if params.get('side') == 'SELL' and price < reference_price * limits.multiplier_down:
+            raise OrderValidationError(-4024, f"Price {price} is less than {limits.multiplier_down}x "
+                                              f"the mark price {reference_price}")
+
+    if limits.min_notional and not params.get('reduceOnly'):
+        notional_price = params.get('price') or params.get('stopPrice') or reference_price
+        # Tolerance keeps float error from rejecting an order exactly at the minimum
+        if notional_price and notional_price * params['quantity'] < limits.min_notional * NOTIONAL_TOLERANCE:
+            raise OrderValidationError(-4164, f"Order value {notional_price * params['quantity']:.2f} is below "
+                                              f"the minimum notional {limits.min_notional}")
 
     return params
@@ -1,27 +1,74 @@
 import argparse
+import json
 import logging
-from rich.console import Console
-from rich.table import Table
-from src.bot.client import BinanceClient
-from src.bot.config import settings
+from src.bot.enums import OrderSide, OrderType, TimeInForce
 from src.bot.logger import setup_logging
-from src.bot.models import OrderInput, OrderSide, OrderType, TimeInForce
-from src.bot.services.orders import OrderService
-from src.bot.services.symbols import SymbolService
 
-console = Console()
+# Heavy modules (binance, sqlalchemy, pydantic, rich) are imported by the
+# commands that use them, so short-lived invocations only pay for what they run
+
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+def load_orders_file(path: str) -> list:
+    """Read one OrderInput JSON object per line, blank lines and # comments are skipped"""
+    from src.bot.models import OrderInput
+
+    orders = []
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                orders.append(OrderInput(**json.loads(line)))
+            except Exception as e:
+                raise ValueError(f"{path}:{line_number}: {e}") from e
+    return orders
+
+def display_batch_results(orders: list, results: list):
+    from rich.table import Table
+
+    table = Table(title="Batch Order Results")
+    table.add_column("#", style="cyan")
+    table.add_column("Symbol", style="green")
+    table.add_column("Side", style="blue")
+    table.add_column("Type", style="magenta")
+    table.add_column("Order ID", style="yellow")
+    table.add_column("Status", style="bold")
+
+    for index, (order, result) in enumerate(zip(orders, results), start=1):
+        if 'orderId' in result:
+            status = f"[green]{result.get('status')}[/green]"
+        else:
+            status = f"[red]{result.get('code')}: {result.get('msg')}[/red]"
+        table.add_row(str(index), order.symbol, order.side.value, order.type.value,
+                      str(result.get('orderId', '-')), status)
+
+    get_console().print(table)
 
 def main():
     parser = argparse.ArgumentParser(description="Binance Futures Trading Bot")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check connectivity and sync server time before running the command")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print per-stage latency metrics (Prometheus text format) after the command")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Order command
     order_parser = subparsers.add_parser("order", help="Place a new order")
-    order_parser.add_argument("--symbol", required=True, help="Trading symbol (e.g., BTCUSDT)")
-    order_parser.add_argument("--side", required=True, choices=[s.value for s in OrderSide], help="Order side")
-    order_parser.add_argument("--type", required=True, choices=[t.value for t in OrderType], help="Order type")
-    order_parser.add_argument("--quantity", required=True, type=float, help="Order quantity")
+    order_parser.add_argument("--file", help="JSON lines file of orders to place as batches of up to 5")
+    order_parser.add_argument("--symbol", help="Trading symbol (e.g., BTCUSDT)")
+    order_parser.add_argument("--side", choices=[s.value for s in OrderSide], help="Order side")
+    order_parser.add_argument("--type", choices=[t.value for t in OrderType], help="Order type")
+    order_parser.add_argument("--quantity", type=float, help="Order quantity")
     order_parser.add_argument("--price", type=float, help="Order price (required for LIMIT)")
     order_parser.add_argument("--timeInForce", choices=[t.value for t in TimeInForce], help="Time in force (for LIMIT)")
     order_parser.add_argument("--stopPrice", type=float, help="Stop price (for STOP/TAKE_PROFIT orders)")
@@ -43,48 +90,87 @@ def main():
     # Ping command
     subparsers.add_parser("ping", help="Check connectivity to Binance API")
 
+    # Stream command
+    subparsers.add_parser("stream", help="Record order updates from the user-data stream until Ctrl+C")
+
     args = parser.parse_args()
 
+    if args.command == "order" and not args.file:
+        missing = [f"--{name}" for name in ("symbol", "side", "type", "quantity") if getattr(args, name) is None]
+        if missing:
+            order_parser.error(f"the following arguments are required: {', '.join(missing)}")
+
     setup_logging(verbose=args.verbose)
     logger = logging.getLogger(__name__)
 
+    console = get_console()
+
     try:
-        client = BinanceClient(settings.api_key, settings.api_secret)
-        symbol_service = SymbolService(client)
-        order_service = OrderService(client, symbol_service)
+        from src.bot.client import create_exchange_client
+
+        client = create_exchange_client(verify=True if args.verify else None)
 
         if args.command == "ping":
             client.futures_ping()
             console.print("[green]Pong! Connectivity is OK.[/green]")
 
         elif args.command == "symbols":
-            filters = symbol_service.get_symbol_filters(args.symbol)
+            from src.bot.services.symbols import SymbolService
+
+            filters = SymbolService(client).get_symbol_filters(args.symbol)
             console.print(filters)
 
-        elif args.command == "order":
-            order_input = OrderInput(
-                symbol=args.symbol,
-                side=args.side,
-                type=args.type,
-                quantity=args.quantity,
-                price=args.price,
-                timeInForce=args.timeInForce,
-                stopPrice=args.stopPrice,
-            )
-            result = order_service.place_order(order_input, user_interface='cli')
-            console.print(result)
-
-        elif args.command == "status":
-            status = order_service.get_status(args.symbol, args.orderId, user_interface='cli')
-            console.print(status)
-
-        elif args.command == "cancel":
-            result = order_service.cancel_order(args.symbol, args.orderId, user_interface='cli')
-            console.print(result)
+        elif args.command == "stream":
+            from src.bot.services.user_stream import UserDataStream
+
+            stream = UserDataStream(client).start()
+            console.print("[green]Listening for order updates, press Ctrl+C to stop.[/green]")
+            try:
+                stream.join()
+            except KeyboardInterrupt:
+                stream.stop()
+
+        else:
+            from src.bot.models import OrderInput
+            from src.bot.services.orders import OrderService
+            from src.bot.services.symbols import SymbolService
+
+            order_service = OrderService(client, SymbolService(client))
+
+            if args.command == "order" and args.file:
+                orders = load_orders_file(args.file)
+                results = order_service.place_orders_batch(orders, user_interface='cli')
+                display_batch_results(orders, results)
+
+            elif args.command == "order":
+                order_input = OrderInput(
+                    symbol=args.symbol,
+                    side=args.side,
+                    type=args.type,
+                    quantity=args.quantity,
+                    price=args.price,
+                    timeInForce=args.timeInForce,
+                    stopPrice=args.stopPrice,
+                )
+                result = order_service.place_order(order_input, user_interface='cli')
+                console.print(result)
+
+            elif args.command == "status":
+                status = order_service.get_status(args.symbol, args.orderId, user_interface='cli')
+                console.print(status)
+
+            elif args.command == "cancel":
+                result = order_service.cancel_order(args.symbol, args.orderId, user_interface='cli')
+                console.print(result)
 
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         console.print(f"[red]Error: {e}[/red]")
 
+    if args.metrics:
+        from src.bot.metrics import REGISTRY
+        # Plain print, rich would read the label brackets as markup
+        print(REGISTRY.render(), end="")
+
 if __name__ == "__main__":
     main()
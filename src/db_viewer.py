@@ -2,17 +2,24 @@
 Database viewer CLI for viewing order history and logs
 """
 import argparse
+import time
+from datetime import datetime, timedelta
 from rich.console import Console
 from rich.table import Table
 from rich import box
-from src.bot.database import get_database
+from src.bot.database import (ACTIVITY_RETENTION_DAYS, RETENTION_BATCH_SIZE, get_database,
+                              get_read_only_database)
 
 console = Console()
 
-def view_history(symbol=None, limit=20):
+def print_next_page(command, next_cursor):
+    if next_cursor:
+        console.print(f"[dim]Next page: {command} --cursor {next_cursor}[/dim]")
+
+def view_history(symbol=None, limit=20, cursor=None):
     """View order history"""
-    db = get_database()
-    orders = db.get_order_history(symbol=symbol, limit=limit)
+    db = get_read_only_database()
+    orders, next_cursor = db.get_order_history_page(symbol=symbol, limit=limit, cursor=cursor)
     
     if not orders:
         console.print("[yellow]No orders found in database[/yellow]")
@@ -50,11 +57,12 @@ def view_history(symbol=None, limit=20):
         )
     
     console.print(table)
+    print_next_page(f"history{f' --symbol {symbol}' if symbol else ''} --limit {limit}", next_cursor)
 
-def view_logs(limit=20):
+def view_logs(limit=20, cursor=None):
     """View activity logs"""
-    db = get_database()
-    logs = db.get_activity_logs(limit=limit)
+    db = get_read_only_database()
+    logs, next_cursor = db.get_activity_logs_page(limit=limit, cursor=cursor)
     
     if not logs:
         console.print("[yellow]No logs found in database[/yellow]")
@@ -85,10 +93,11 @@ def view_logs(limit=20):
         )
     
     console.print(table)
+    print_next_page(f"logs --limit {limit}", next_cursor)
 
 def view_statistics():
     """View trading statistics"""
-    db = get_database()
+    db = get_read_only_database()
     stats = db.get_statistics()
     
     table = Table(title="Trading Statistics", box=box.ROUNDED, show_header=False)
@@ -103,6 +112,68 @@ def view_statistics():
     
     console.print(table)
 
+    if stats['by_symbol']:
+        symbol_table = Table(title="By Symbol", box=box.ROUNDED)
+        symbol_table.add_column("Symbol", style="green")
+        symbol_table.add_column("Total", style="cyan")
+        symbol_table.add_column("Filled", style="green")
+        symbol_table.add_column("Cancelled", style="red")
+        symbol_table.add_column("Pending", style="yellow")
+        symbol_table.add_column("Success Rate", style="white")
+
+        for symbol, symbol_stats in stats['by_symbol'].items():
+            symbol_table.add_row(
+                symbol or "-",
+                str(symbol_stats['total_orders']),
+                str(symbol_stats['filled_orders']),
+                str(symbol_stats['cancelled_orders']),
+                str(symbol_stats['pending_orders']),
+                f"{symbol_stats['success_rate']:.2f}%"
+            )
+
+        console.print(symbol_table)
+
+def view_rollup(hours=24, limit=50):
+    """View hourly activity counts kept by retention"""
+    db = get_read_only_database()
+    rows = db.get_activity_rollup(since=datetime.utcnow() - timedelta(hours=hours), limit=limit)
+
+    if not rows:
+        console.print("[yellow]No rolled up activity found[/yellow]")
+        return
+
+    table = Table(title="Hourly Activity", box=box.ROUNDED)
+    table.add_column("Hour (UTC)", style="dim")
+    table.add_column("Action", style="yellow")
+    table.add_column("Status", style="bold")
+    table.add_column("Count", style="cyan")
+
+    for row in rows:
+        status_color = 'green' if row.status == 'success' else 'red'
+        table.add_row(row.hour, row.action, f"[{status_color}]{row.status}[/{status_color}]", str(row.count))
+
+    console.print(table)
+
+def run_migrate():
+    """Upgrade the database schema, the viewers only read files already up to date"""
+    db = get_database()
+    console.print(f"[green]Database {db.db_path} is up to date[/green]")
+
+def run_retention(days=ACTIVITY_RETENTION_DAYS, batch_size=RETENTION_BATCH_SIZE, vacuum_pages=0,
+                  every=None, full_vacuum=False):
+    """Roll up and delete old activity logs, once or every `every` seconds"""
+    db = get_database()
+    if full_vacuum:
+        db.vacuum()
+        console.print("[green]Database vacuumed, incremental vacuum is enabled[/green]")
+    while True:
+        result = db.apply_retention(max_age_days=days, batch_size=batch_size, vacuum_pages=vacuum_pages)
+        console.print(f"Deleted {result['deleted']} activity logs older than {days} days, "
+                      f"freed {result['vacuumed_pages']} pages")
+        if not every:
+            return
+        time.sleep(every)
+
 def main():
     parser = argparse.ArgumentParser(description="Database Viewer for Trading Bot")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -111,23 +182,52 @@ def main():
     history_parser = subparsers.add_parser("history", help="View order history")
     history_parser.add_argument("--symbol", help="Filter by symbol")
     history_parser.add_argument("--limit", type=int, default=20, help="Number of records to show")
+    history_parser.add_argument("--cursor", help="Continue from a previous page")
     
     # Logs command
     logs_parser = subparsers.add_parser("logs", help="View activity logs")
     logs_parser.add_argument("--limit", type=int, default=20, help="Number of records to show")
+    logs_parser.add_argument("--cursor", help="Continue from a previous page")
     
     # Stats command
     subparsers.add_parser("stats", help="View trading statistics")
+
+    # Rollup command
+    rollup_parser = subparsers.add_parser("rollup", help="View hourly activity counts")
+    rollup_parser.add_argument("--hours", type=int, default=24, help="Hours to show")
+    rollup_parser.add_argument("--limit", type=int, default=50, help="Number of records to show")
+
+    # Migrate command
+    subparsers.add_parser("migrate", help="Upgrade a database written by an older version")
+
+    # Retention command
+    retention_parser = subparsers.add_parser("retention", help="Roll up and delete old activity logs")
+    retention_parser.add_argument("--days", type=float, default=ACTIVITY_RETENTION_DAYS,
+                                  help="Keep raw activity logs for this many days")
+    retention_parser.add_argument("--batch-size", type=int, default=RETENTION_BATCH_SIZE,
+                                  help="Rows deleted per transaction")
+    retention_parser.add_argument("--vacuum-pages", type=int, default=0,
+                                  help="Max pages returned to the filesystem, 0 for all")
+    retention_parser.add_argument("--every", type=int, help="Keep running, every this many seconds")
+    retention_parser.add_argument("--full-vacuum", action="store_true",
+                                  help="Run a full VACUUM first, needed once for databases created before retention")
     
     args = parser.parse_args()
     
     try:
         if args.command == "history":
-            view_history(symbol=args.symbol, limit=args.limit)
+            view_history(symbol=args.symbol, limit=args.limit, cursor=args.cursor)
         elif args.command == "logs":
-            view_logs(limit=args.limit)
+            view_logs(limit=args.limit, cursor=args.cursor)
         elif args.command == "stats":
             view_statistics()
+        elif args.command == "rollup":
+            view_rollup(hours=args.hours, limit=args.limit)
+        elif args.command == "migrate":
+            run_migrate()
+        elif args.command == "retention":
+            run_retention(days=args.days, batch_size=args.batch_size, vacuum_pages=args.vacuum_pages,
+                          every=args.every, full_vacuum=args.full_vacuum)
     except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
 
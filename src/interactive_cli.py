@@ -5,8 +5,7 @@ from rich.table import Table
 from rich.panel import Panel
 from rich.layout import Layout
 from rich import box
-from src.bot.client import BinanceClient
-from src.bot.config import settings
+from src.bot.client import BinanceClient, create_exchange_client
 from src.bot.logger import setup_logging
 from src.bot.models import OrderInput, OrderSide, OrderType, TimeInForce
 from src.bot.services.orders import OrderService
@@ -44,39 +43,46 @@ def display_menu():
 def place_optional_sl_tp(order_service: OrderService, main_order: dict, symbol: str, quantity: float, side: str):
     """Place optional Stop Loss and Take Profit orders"""
     try:
+        opposite_side = "SELL" if side == "BUY" else "BUY"
+        orders = []
+        labels = []
+
         # Ask for Stop Loss
         if Confirm.ask("\n[yellow]Add Stop Loss (SL)?[/yellow]", default=False):
             sl_price = float(Prompt.ask("Stop Loss Price"))
-            opposite_side = "SELL" if side == "BUY" else "BUY"
-            
-            sl_order = OrderInput(
+            orders.append(OrderInput(
                 symbol=symbol,
                 side=opposite_side,
                 type=OrderType.STOP_MARKET,
                 quantity=quantity,
                 stopPrice=sl_price,
                 timeInForce="GTC"
-            )
-            
-            sl_result = order_service.place_order(sl_order, user_interface='terminal')
-            console.print(f"[green]✓ Stop Loss placed! Order ID: {sl_result.get('orderId')}[/green]")
-        
+            ))
+            labels.append("Stop Loss")
+
         # Ask for Take Profit
         if Confirm.ask("\n[yellow]Add Take Profit (TP)?[/yellow]", default=False):
             tp_price = float(Prompt.ask("Take Profit Price"))
-            opposite_side = "SELL" if side == "BUY" else "BUY"
-            
-            tp_order = OrderInput(
+            orders.append(OrderInput(
                 symbol=symbol,
                 side=opposite_side,
                 type=OrderType.TAKE_PROFIT_MARKET,
                 quantity=quantity,
                 stopPrice=tp_price,
                 timeInForce="GTC"
-            )
-            
-            tp_result = order_service.place_order(tp_order, user_interface='terminal')
-            console.print(f"[green]✓ Take Profit placed! Order ID: {tp_result.get('orderId')}[/green]")
+            ))
+            labels.append("Take Profit")
+
+        if not orders:
+            return
+
+        # SL and TP go out together in one batch request
+        results = order_service.place_orders_batch(orders, user_interface='terminal')
+        for label, result in zip(labels, results):
+            if 'orderId' in result:
+                console.print(f"[green]✓ {label} placed! Order ID: {result.get('orderId')}[/green]")
+            else:
+                console.print(f"[red]✗ {label} failed: {result.get('msg')}[/red]")
     except Exception as e:
         console.print(f"[red]✗ Error placing SL/TP: {e}[/red]")
 
@@ -100,10 +106,6 @@ def place_market_order(order_service: OrderService):
             console.print("\n[green]✓ Order placed successfully![/green]")
             display_order_result(result)
             
-            # Optional SL/TP
-            place_optional_sl_tp(order_service, result, symbol, quantity, side)
-            display_order_result(result)
-            
             # Optional SL/TP
             place_optional_sl_tp(order_service, result, symbol, quantity, side)
         else:
@@ -381,7 +383,7 @@ def main():
     setup_logging(verbose=False)
     
     try:
-        client = BinanceClient(settings.api_key, settings.api_secret)
+        client = create_exchange_client(verify=True)
         symbol_service = SymbolService(client)
         order_service = OrderService(client, symbol_service)
         
@@ -1,18 +1,26 @@
 """
 Simple Web UI for Binance Futures Trading Bot
 """
+import json
 import logging
-from flask import Flask, render_template, request, jsonify
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
-from src.bot.client import BinanceClient
+from src.bot.client import create_exchange_client
 from src.bot.config import settings
+from src.bot.database import STATISTICS_DAYS, Database, get_database
 from src.bot.logger import setup_logging
-from src.bot.models import OrderInput, OrderSide, OrderType, TimeInForce
+from src.bot.metrics import REGISTRY
+from src.bot.models import OrderInput
 from src.bot.services.orders import OrderService
+from src.bot.services.prices import get_price_cache
 from src.bot.services.symbols import SymbolService
+from src.bot.services.user_stream import UserDataStream
+from src.bot.validators import OrderValidationError
 
 # Setup
-setup_logging(verbose=False)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -22,20 +30,59 @@ CORS(app)
 _client = None
 _symbol_service = None
 _order_service = None
+_user_stream = None
+
+# Live feed tuning: commits in this process wake the feed at once, writes from
+# other processes (CLI, terminal UI) are picked up by polling
+STREAM_POLL_INTERVAL = 5.0
+STREAM_HEARTBEAT_INTERVAL = 15.0
+STREAM_BATCH_SIZE = 100
 
 def get_services():
     """Lazy initialization of services"""
-    global _client, _symbol_service, _order_service
+    global _client, _symbol_service, _order_service, _user_stream
     
     if _client is None:
         logger.info("Initializing Binance client...")
-        _client = BinanceClient(settings.api_key, settings.api_secret)
+        _client = create_exchange_client(verify=True)
         _symbol_service = SymbolService(_client)
-        _order_service = OrderService(_client, _symbol_service)
+        _order_service = OrderService(_client, _symbol_service, get_price_cache())
+        if settings.user_data_stream:
+            _user_stream = UserDataStream(_client).start()
         logger.info("Services initialized successfully")
     
     return _client, _symbol_service, _order_service
 
+def _serialize_order(order) -> Dict[str, Any]:
+    return {
+        'id': order.id,
+        'orderId': order.order_id,
+        'symbol': order.symbol,
+        'side': order.side,
+        'type': order.order_type,
+        'quantity': order.quantity,
+        'price': order.price,
+        'stopPrice': order.stop_price,
+        'status': order.status,
+        'executedQty': order.executed_qty,
+        'avgPrice': order.avg_price,
+        'createdAt': order.created_at.isoformat() if order.created_at else None,
+        'updatedAt': order.updated_at.isoformat() if order.updated_at else None
+    }
+
+def _serialize_log(log) -> Dict[str, Any]:
+    return {
+        'id': log.id,
+        'timestamp': log.timestamp.isoformat() if log.timestamp else None,
+        'action': log.action,
+        'symbol': log.symbol,
+        'orderId': log.order_id,
+        'status': log.status,
+        'message': log.message,
+        'errorDetails': log.error_details,
+        'userInterface': log.user_interface
+    }
+
 @app.route('/')
 def index():
     """Main page"""
@@ -47,7 +94,8 @@ def ping():
     try:
         client, _, _ = get_services()
         client.futures_ping()
-        return jsonify({'success': True, 'message': 'Connected to Binance Futures API'})
+        return jsonify({'success': True, 'message': 'Connected to Binance Futures API',
+                        'transport': client.connection_stats()})
     except Exception as e:
         logger.error(f"Ping failed: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -57,9 +105,7 @@ def get_symbols():
     """Get list of available symbols"""
     try:
         _, symbol_service, _ = get_services()
-        exchange_info = symbol_service._exchange_info
-        if not exchange_info:
-            exchange_info = symbol_service.fetch_exchange_info()
+        exchange_info = symbol_service.get_exchange_info()
         
         symbols = [s['symbol'] for s in exchange_info.get('symbols', []) if s.get('status') == 'TRADING']
         return jsonify({'success': True, 'symbols': symbols[:50]})  # Return first 50
@@ -100,6 +146,15 @@ def get_symbol_info(symbol):
         logger.error(f"Failed to get symbol info: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Friendlier text for exchange rejections, orders failing the local filter checks
+# already carry a specific message
+ORDER_ERROR_MESSAGES = {
+    -2019: "Insufficient margin. Please add more testnet funds to your account.",
+    -4164: "Order value too small. Increase quantity or price.",
+    -2021: "Stop price would trigger immediately. Adjust stop price based on current market price.",
+    -1111: "Price or quantity has too many decimal places. Check symbol info for correct precision.",
+}
+
 @app.route('/api/order', methods=['POST'])
 def place_order():
     """Place a new order"""
@@ -127,21 +182,14 @@ def place_order():
         result = order_service.place_order(order, user_interface='web')
         
         return jsonify({'success': True, 'order': result})
+    except OrderValidationError as e:
+        logger.info(f"Order rejected locally ({e.code}): {e}")
+        return jsonify({'success': False, 'error': str(e), 'code': e.code}), 400
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Failed to place order: {error_msg}")
-        
-        # Make error messages more user-friendly
-        if "Margin is insufficient" in error_msg or "-2019" in error_msg:
-            error_msg = "Insufficient margin. Please add more testnet funds to your account."
-        elif "notional must be no smaller" in error_msg or "-4164" in error_msg:
-            error_msg = "Order value too small. Minimum order value is $100. Increase quantity or price."
-        elif "would immediately trigger" in error_msg or "-2021" in error_msg:
-            error_msg = "Stop price would trigger immediately. Adjust stop price based on current market price."
-        elif "Precision is over the maximum" in error_msg or "-1111" in error_msg:
-            error_msg = "Price or quantity has too many decimal places. Check symbol info for correct precision."
-        
-        return jsonify({'success': False, 'error': error_msg}), 400
+        code = getattr(e, 'code', None)
+        return jsonify({'success': False, 'error': ORDER_ERROR_MESSAGES.get(code, error_msg), 'code': code}), 400
 
 @app.route('/api/order/<symbol>/<int:order_id>', methods=['GET'])
 def get_order_status(symbol, order_id):
@@ -185,12 +233,30 @@ def cancel_order(symbol, order_id):
 def get_current_price(symbol):
     """Get current market price for a symbol"""
     try:
-        client, _, _ = get_services()
-        ticker = client.client.futures_symbol_ticker(symbol=symbol)
+        symbol = symbol.upper()
+        client, symbol_service, _ = get_services()
+        price_cache = get_price_cache()
+        # Only listed symbols are streamed, anything else or past the cap is served over REST
+        if symbol_service.has_symbol(symbol):
+            price_cache.subscribe(symbol)
+        cached = price_cache.peek(symbol)
+        source = 'stream'
+
+        if cached is None or time.time() - cached[1] > settings.price_max_age:
+            # Stream not warmed up or stalled, one REST call refills the cache for every viewer
+            ticker = client.futures_symbol_ticker(symbol=symbol)
+            price_cache.put(symbol, float(ticker['price']))
+            cached = price_cache.peek(symbol)
+            source = 'rest'
+
+        price, updated_at = cached
         return jsonify({
             'success': True, 
             'symbol': symbol,
-            'price': float(ticker['price'])
+            'price': price,
+            'updatedAt': datetime.fromtimestamp(updated_at, tz=timezone.utc).isoformat(),
+            'age': round(max(time.time() - updated_at, 0.0), 3),
+            'source': source
         })
     except Exception as e:
         logger.error(f"Failed to get price: {e}")
@@ -200,33 +266,19 @@ def get_current_price(symbol):
 def get_order_history():
     """Get order history from database"""
     try:
-        from src.bot.database import get_database
         db = get_database()
         
         symbol = request.args.get('symbol')
         limit = int(request.args.get('limit', 50))
+        cursor = request.args.get('cursor')
         
-        orders = db.get_order_history(symbol=symbol, limit=limit)
+        orders, next_cursor = db.get_order_history_page(symbol=symbol, limit=limit, cursor=cursor)
         
-        history = []
-        for order in orders:
-            history.append({
-                'id': order.id,
-                'orderId': order.order_id,
-                'symbol': order.symbol,
-                'side': order.side,
-                'type': order.order_type,
-                'quantity': order.quantity,
-                'price': order.price,
-                'stopPrice': order.stop_price,
-                'status': order.status,
-                'executedQty': order.executed_qty,
-                'avgPrice': order.avg_price,
-                'createdAt': order.created_at.isoformat() if order.created_at else None,
-                'updatedAt': order.updated_at.isoformat() if order.updated_at else None
-            })
+        history = [_serialize_order(order) for order in orders]
         
-        return jsonify({'success': True, 'history': history})
+        return jsonify({'success': True, 'history': history, 'nextCursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Failed to get history: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -235,47 +287,144 @@ def get_order_history():
 def get_statistics():
     """Get trading statistics"""
     try:
-        from src.bot.database import get_database
         db = get_database()
         
-        stats = db.get_statistics()
+        stats = db.get_statistics(days=request.args.get('days', STATISTICS_DAYS, type=int))
         
         return jsonify({'success': True, 'statistics': stats})
     except Exception as e:
         logger.error(f"Failed to get statistics: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Order path latency and exchange error metrics for Prometheus"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/logs', methods=['GET'])
 def get_activity_logs():
     """Get activity logs"""
     try:
-        from src.bot.database import get_database
         db = get_database()
         
         limit = int(request.args.get('limit', 50))
-        logs = db.get_activity_logs(limit=limit)
+        cursor = request.args.get('cursor')
+        logs, next_cursor = db.get_activity_logs_page(limit=limit, cursor=cursor)
         
-        activity = []
-        for log in logs:
-            activity.append({
-                'id': log.id,
-                'timestamp': log.timestamp.isoformat() if log.timestamp else None,
-                'action': log.action,
-                'symbol': log.symbol,
-                'orderId': log.order_id,
-                'status': log.status,
-                'message': log.message,
-                'errorDetails': log.error_details,
-                'userInterface': log.user_interface
-            })
+        activity = [_serialize_log(log) for log in logs]
         
-        return jsonify({'success': True, 'logs': activity})
+        return jsonify({'success': True, 'logs': activity, 'nextCursor': next_cursor})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Failed to get logs: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _statistics_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level figures and per-symbol/per-day summaries that differ from `old`"""
+    delta = {}
+    for key, value in new.items():
+        if isinstance(value, dict):
+            changed = {k: v for k, v in value.items() if old.get(key, {}).get(k) != v}
+            if changed:
+                delta[key] = changed
+        elif old.get(key) != value:
+            delta[key] = value
+    return delta
+
+def _sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id else message
+
+def encode_stream_cursor(order_version: int, last_log_id: int) -> str:
+    return f"{order_version}.{last_log_id}"
+
+def decode_stream_cursor(cursor: str) -> Tuple[int, int]:
+    order_version, sep, last_log_id = cursor.partition('.')
+    if not sep or not order_version.isdigit() or not last_log_id.isdigit():
+        raise ValueError(f"Invalid stream cursor: {cursor}")
+    return int(order_version), int(last_log_id)
+
+def stream_events(db: Database, cursor: Optional[str] = None, limit: int = 20,
+                  poll_interval: float = STREAM_POLL_INTERVAL):
+    """Server-sent events for the live history, logs and statistics panels.
+
+    Without a cursor the first event is a `snapshot` of the latest rows. After
+    that only `history` (new or changed orders), `logs` (new entries) and
+    `statistics` (changed figures) events are sent, each carrying the resume
+    cursor as its event id.
+    """
+    if cursor:
+        order_version, last_log_id = decode_stream_cursor(cursor)
+        stats: Dict[str, Any] = {}
+        check_now = True
+    else:
+        order_version = db.get_latest_order_version()
+        last_log_id = db.get_last_activity_id()
+        stats = db.get_statistics()
+        orders, _ = db.get_order_history_page(limit=limit)
+        logs = db.get_activity_logs(limit=limit)
+        yield _sse('snapshot', {
+            'history': [_serialize_order(o) for o in orders],
+            'logs': [_serialize_log(log) for log in logs],
+            'statistics': stats,
+        }, encode_stream_cursor(order_version, last_log_id))
+        check_now = False
+
+    seq = db.change_seq
+    last_sent = time.monotonic()
+    while True:
+        if not check_now:
+            seq = db.wait_for_change(seq, timeout=poll_interval)
+        check_now = False
+
+        # Orders page on their commit-ordered version, a write that commits late is still seen
+        orders, order_version = db.get_orders_changed_since(order_version, limit=STREAM_BATCH_SIZE)
+        logs = db.get_activity_logs_after(last_log_id, limit=STREAM_BATCH_SIZE)
+        if logs:
+            last_log_id = logs[-1].id
+        event_id = encode_stream_cursor(order_version, last_log_id)
+
+        if orders:
+            yield _sse('history', [_serialize_order(o) for o in orders], event_id)
+        if logs:
+            yield _sse('logs', [_serialize_log(log) for log in logs], event_id)
+        if orders or not stats:
+            new_stats = db.get_statistics()
+            delta = _statistics_delta(stats, new_stats)
+            stats = new_stats
+            if delta:
+                yield _sse('statistics', delta, event_id)
+
+        if orders or logs:
+            last_sent = time.monotonic()
+            # A full batch means more rows are waiting
+            check_now = len(orders) == STREAM_BATCH_SIZE or len(logs) == STREAM_BATCH_SIZE
+        elif time.monotonic() - last_sent >= STREAM_HEARTBEAT_INTERVAL:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Live feed of order history, activity logs and statistics deltas"""
+    # EventSource sends the last event id by itself when it reconnects
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    try:
+        if cursor:
+            decode_stream_cursor(cursor)
+        limit = int(request.args.get('limit', 20))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    response = Response(stream_with_context(stream_events(get_database(), cursor, limit)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 def main():
     """Run the web server"""
+    setup_logging(verbose=False)
     print("\n" + "="*60)
     print("🌐 Binance Futures Trading Bot - Web UI")
     print("="*60)
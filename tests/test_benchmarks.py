@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import MagicMock
+from binance.exceptions import BinanceAPIException
+from benchmarks.fake_exchange import ORDER_PATHS, FakeFuturesAPI
+from benchmarks.orders import percentile, summarize
+from src.bot.client import BinanceClient
+from src.bot.config import settings
+from src.bot.models import OrderInput, OrderSide, OrderType
+from src.bot.services.orders import OrderService
+from src.bot.services.symbols import SymbolService
+
+@pytest.fixture
+def fake_api(monkeypatch, tmp_path):
+    api = FakeFuturesAPI().start()
+    monkeypatch.setattr(settings, 'base_url', api.base_url)
+    monkeypatch.setattr(settings, 'exchange_info_cache_file', str(tmp_path / 'exchange_info.json'))
+    monkeypatch.setattr(settings, 'order_retry_backoff', 0)
+    yield api
+    api.stop()
+
+@pytest.fixture
+def order_service(fake_api):
+    client = BinanceClient('key', 'secret', governor=MagicMock())
+    service = OrderService(client, SymbolService(client))
+    service._db = MagicMock()
+    return service
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 0.999) == 100
+    assert percentile([], 0.5) == 0.0
+
+def test_summarize():
+    result = summarize([3.0, 1.0, 2.0], errors=1, elapsed=0.5)
+    assert result['orders'] == 3
+    assert result['orders_per_s'] == 6.0
+    assert result['p50_ms'] == 2.0
+
+def test_order_round_trip_through_fake_api(fake_api, order_service):
+    order = OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT,
+                       quantity=0.0025, price=90000.5, timeInForce="GTC")
+    placed = order_service.place_order(order)
+    assert placed['status'] == 'NEW'
+    assert placed['price'] == '90000.5'
+    assert placed['origQty'] == '0.002'
+
+    cancelled = order_service.cancel_order("BTCUSDT", placed['orderId'])
+    assert cancelled['status'] == 'CANCELED'
+    assert fake_api.stats()['requests']['POST /fapi/v1/order'] == 1
+
+def test_injected_errors_reach_the_caller(fake_api, order_service):
+    fake_api.error_rate = 1.0
+    order = OrderInput(symbol="BTCUSDT", side=OrderSide.SELL, type=OrderType.MARKET, quantity=0.01)
+
+    with pytest.raises(BinanceAPIException) as excinfo:
+        order_service.place_order(order)
+    assert excinfo.value.code == -1001
+    # Sent once, then only looked up since the order's fate stays unknown
+    stats = fake_api.stats()
+    assert stats['requests']['POST /fapi/v1/order'] == 1
+    assert stats['requests']['GET /fapi/v1/order'] == settings.order_retry_attempts - 1
+    assert stats['errors_injected'] == settings.order_retry_attempts
+
+def test_failed_order_is_resent_once_lookup_finds_nothing(fake_api, order_service, monkeypatch):
+    failures = iter([True])  # only the first order request fails
+    monkeypatch.setattr(fake_api, '_inject_error', lambda path: path in ORDER_PATHS and next(failures, False))
+    order = OrderInput(symbol="BTCUSDT", side=OrderSide.SELL, type=OrderType.MARKET, quantity=0.01)
+
+    placed = order_service.place_order(order)
+    assert placed['status'] == 'FILLED'
+    assert placed['clientOrderId'].startswith('ctb-')
+    stats = fake_api.stats()
+    assert stats['requests'] == {'GET /fapi/v1/exchangeInfo': 1, 'GET /fapi/v1/time': 1,
+                                 'POST /fapi/v1/order': 2, 'GET /fapi/v1/order': 1}
+    assert stats['orders'] == 1
@@ -0,0 +1,8 @@
+import subprocess
+import sys
+
+def test_cli_import_is_light():
+    code = ("import sys, src.cli; "
+            "print(','.join(m for m in ('binance', 'sqlalchemy', 'pydantic', 'rich') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,63 @@
+import json
+import time
+from unittest.mock import MagicMock
+import pytest
+from binance.exceptions import BinanceAPIException
+from src.bot.client import BinanceClient, sync_server_time
+from src.bot.clock import ServerClock
+
+def api_error(code):
+    return BinanceAPIException(MagicMock(), 400, json.dumps({"code": code, "msg": "error"}))
+
+def make_client(create_order):
+    client = BinanceClient.__new__(BinanceClient)
+    client.clock = ServerClock()
+    client.governor = None
+    client.client = MagicMock()
+    client.client.futures_time.side_effect = lambda: {"serverTime": int(time.time() * 1000) + 2500}
+    client.client.futures_create_order.side_effect = create_order
+    return client
+
+def test_offset_uses_round_trip_midpoint():
+    clock = ServerClock()
+    assert clock.stale
+    assert clock.record(server_time_ms=10_150, sent_ms=10_000, received_ms=10_100) == 100
+    assert clock.round_trip_ms == 100
+    assert not clock.stale
+
+def test_sync_applies_offset_to_signed_requests():
+    client = MagicMock()
+    client.futures_time.return_value = {"serverTime": int(time.time() * 1000) + 5000}
+    offset = sync_server_time(client, ServerClock())
+    assert 4900 < offset <= 5000
+    assert client.timestamp_offset == offset
+
+def test_timestamp_error_resyncs_and_retries_once():
+    calls = []
+
+    def create_order(**params):
+        calls.append(params)
+        if len(calls) == 1:
+            raise api_error(-1021)
+        return {"orderId": 1}
+
+    client = make_client(create_order)
+    client.sync_time()
+    assert client.futures_create_order(symbol="BTCUSDT") == {"orderId": 1}
+    assert len(calls) == 2
+    assert client.client.futures_time.call_count == 2
+    assert 2400 < client.client.timestamp_offset <= 2500
+
+def test_other_errors_are_not_retried():
+    client = make_client(MagicMock(side_effect=api_error(-2019)))
+    client.sync_time()
+    with pytest.raises(BinanceAPIException):
+        client.futures_create_order(symbol="BTCUSDT")
+    assert client.client.futures_create_order.call_count == 1
+
+def test_time_sync_counts_against_the_governor():
+    client = make_client(MagicMock())
+    client.governor = MagicMock()
+    client.sync_time()
+    client.governor.acquire.assert_called_once()
+    assert client.governor.acquire.call_args.args[:2] == (1, 0)
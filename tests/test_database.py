@@ -0,0 +1,312 @@
+import shutil
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from src.bot.database import Database, DatabaseSchemaError, OrderHistory, pack_response, unpack_response
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+def test_save_and_update_order(db):
+    order = db.save_order(
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0},
+        {"orderId": 42, "status": "NEW", "executedQty": "0"},
+    )
+    assert order.order_id == "42"
+    updated = db.update_order_status("42", {"status": "FILLED", "executedQty": "0.01", "avgPrice": "100"})
+    assert updated.status == "FILLED"
+    assert updated.avg_price == 100.0
+
+def test_client_order_id_is_saved_once(db):
+    order_data = {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01,
+                  "newClientOrderId": "ctb-1"}
+    db.save_order(order_data, {"status": "REJECTED", "code": -1001})
+    db.save_order(order_data, {"orderId": 1, "status": "FILLED", "executedQty": "0.01"})
+
+    order = db.get_order_by_client_id("ctb-1")
+    assert (order.order_id, order.status) == ("1", "FILLED")
+    stats = db.get_statistics()
+    assert (stats["total_orders"], stats["filled_orders"]) == (1, 1)
+
+def test_columns_added_to_existing_database(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = Database(path)
+    with old.engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ux_order_history_client_order_id")
+        conn.exec_driver_sql("ALTER TABLE order_history DROP COLUMN client_order_id")
+    old.engine.dispose()
+
+    upgraded = Database(path)
+    upgraded.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01,
+                         "newClientOrderId": "ctb-2"}, {"orderId": 3, "status": "NEW"})
+    assert upgraded.get_order_by_client_id("ctb-2").order_id == "3"
+
+RESPONSE = {"orderId": 4040331923, "symbol": "BTCUSDT", "status": "NEW", "clientOrderId": "ctb-7",
+            "price": "95000.00", "avgPrice": "0.00", "origQty": "0.002", "executedQty": "0.000",
+            "cumQuote": "0.00000", "timeInForce": "GTC", "type": "LIMIT", "reduceOnly": False,
+            "side": "BUY", "positionSide": "BOTH", "updateTime": 1731000000000}
+
+def test_responses_are_packed_and_decoded_on_access(db):
+    packed = pack_response(RESPONSE)
+    assert packed[:1] == b"J" and len(packed) < len(str(RESPONSE)) / 2
+    assert unpack_response(packed) == RESPONSE
+    assert unpack_response(pack_response({"code": -1})) == {"code": -1}
+    assert unpack_response(str(RESPONSE)) == RESPONSE
+
+    order = db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002,
+                           "price": 95000.0}, RESPONSE)
+    assert order.response == RESPONSE
+    assert (order.position_side, order.reduce_only, order.exchange_update_time) == ("BOTH", False, 1731000000000)
+    session = db.get_read_session()
+    try:
+        assert session.query(OrderHistory).filter_by(position_side="BOTH").count() == 1
+    finally:
+        session.close()
+
+def test_msgpack_codec(tmp_path):
+    pytest.importorskip("msgpack")
+    db = Database(str(tmp_path / "msgpack.db"), response_codec="msgpack")
+    order = db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002}, RESPONSE)
+    assert order.response_data[:1] == b"M" and order.response == RESPONSE
+
+def test_unchanged_status_is_not_rewritten(db):
+    order = db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002}, RESPONSE)
+    seq = db.change_seq
+    assert db.update_order_status(str(RESPONSE["orderId"]), dict(RESPONSE)).updated_at == order.updated_at
+    filled = dict(RESPONSE, status="FILLED", executedQty="0.002", cumQuote="190.00")
+    updated = db.update_order_status(str(RESPONSE["orderId"]), filled)
+    assert updated.updated_at > order.updated_at and updated.cum_quote == 190.0
+    assert updated.response == filled and db.change_seq == seq + 2
+
+def test_legacy_responses_are_compacted(db):
+    order = db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002}, RESPONSE)
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE order_history SET response_data = :raw"), {"raw": str(RESPONSE)})
+    assert db.get_order_by_id(order.order_id).response == RESPONSE
+
+    assert db.compact_response_data(batch_size=1) == 1
+    assert db.compact_response_data() == 0
+    compacted = db.get_order_by_id(order.order_id)
+    assert compacted.response_data[:1] == b"J" and compacted.response == RESPONSE
+    assert compacted.cum_quote == 0.0 and compacted.updated_at == order.updated_at
+
+def test_write_behind_batches_and_flushes(db):
+    db.enable_write_behind(max_batch=50, flush_interval_ms=50, max_queue=10)
+    for i in range(100):
+        assert db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01},
+                             {"orderId": i, "status": "NEW"}) is None
+        db.log_activity("place_order", "success", symbol="BTCUSDT", order_id=i)
+    db.update_order_status("7", {"status": "FILLED", "executedQty": "0.01"})
+
+    assert db.flush(timeout=5)
+    assert db.get_statistics()["total_orders"] == 100
+    assert db.get_order_by_id("7").status == "FILLED"
+    assert len(db.get_activity_logs(limit=1000)) == 100
+
+def test_close_flushes_pending_writes(db):
+    db.enable_write_behind(flush_interval_ms=1000)
+    db.log_activity("check_status", "success")
+    db.close()
+    assert len(db.get_activity_logs()) == 1
+
+def test_engine_profile(db):
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+def test_read_only_database(db):
+    db.log_activity("place_order", "success")
+    viewer = Database(db.db_path, read_only=True)
+    assert len(viewer.get_activity_logs()) == 1
+    with pytest.raises(RuntimeError):
+        viewer.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01})
+
+# Schema written by the first release, before any migration
+BASELINE_SCHEMA = """
+CREATE TABLE order_history (
+    id INTEGER NOT NULL PRIMARY KEY, order_id VARCHAR NOT NULL, symbol VARCHAR NOT NULL,
+    side VARCHAR NOT NULL, order_type VARCHAR NOT NULL, quantity FLOAT NOT NULL, price FLOAT,
+    stop_price FLOAT, time_in_force VARCHAR, status VARCHAR NOT NULL, executed_qty FLOAT,
+    avg_price FLOAT, created_at DATETIME, updated_at DATETIME, response_data TEXT);
+CREATE INDEX ix_order_history_order_id ON order_history (order_id);
+CREATE INDEX ix_order_history_symbol ON order_history (symbol);
+CREATE TABLE activity_log (
+    id INTEGER NOT NULL PRIMARY KEY, timestamp DATETIME, action VARCHAR NOT NULL, symbol VARCHAR,
+    order_id VARCHAR, status VARCHAR NOT NULL, message TEXT, error_details TEXT, user_interface VARCHAR);
+CREATE INDEX ix_activity_log_timestamp ON activity_log (timestamp);
+INSERT INTO order_history (order_id, symbol, side, order_type, quantity, status, executed_qty,
+    created_at, updated_at, response_data)
+VALUES ('1', 'BTCUSDT', 'BUY', 'MARKET', 0.01, 'FILLED', 0.01,
+    '2024-01-02 03:04:05.000000', '2024-01-02 03:04:05.000000', '{''orderId'': 1}');
+INSERT INTO activity_log (timestamp, action, status) VALUES ('2024-01-02 03:04:05.000000', 'place_order', 'success');
+"""
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    return str(path)
+
+def test_read_only_database_never_migrates(baseline_db):
+    with open(baseline_db, "rb") as f:
+        before = f.read()
+    with pytest.raises(DatabaseSchemaError, match="db_viewer migrate"):
+        Database(baseline_db, read_only=True)
+    with open(baseline_db, "rb") as f:
+        assert f.read() == before
+
+    Database(baseline_db).close()
+    viewer = Database(baseline_db, read_only=True)
+    assert viewer.get_latest_order_version() == 1
+    orders = viewer.get_order_history()
+    assert [(o.order_id, o.client_order_id, o.response) for o in orders] == [("1", None, {"orderId": 1})]
+    assert [log.action for log in viewer.get_activity_logs()] == ["place_order"]
+    assert viewer.engine is None
+
+def test_read_only_database_does_not_create_the_file(tmp_path):
+    with pytest.raises(DatabaseSchemaError, match="run the bot"):
+        Database(str(tmp_path / "missing.db"), read_only=True)
+    assert not (tmp_path / "missing.db").exists()
+
+def test_viewer_statistics_on_older_files(baseline_db, tmp_path, monkeypatch):
+    import src.bot.database as database
+    from src import db_viewer
+    shutil.copy(baseline_db, tmp_path / database.DEFAULT_DB_PATH)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, "_db_instance", None)
+    monkeypatch.setattr(database, "_read_only_db_instance", None)
+    printed = []
+    monkeypatch.setattr(db_viewer.console, "print", printed.append)
+
+    monkeypatch.setattr("sys.argv", ["db_viewer", "stats"])
+    db_viewer.main()
+    assert "migrate" in str(printed[-1])
+
+    db_viewer.run_migrate()
+    printed.clear()
+    db_viewer.view_statistics()
+    assert database.get_read_only_database().get_statistics()["filled_orders"] == 1
+    assert printed and not any("Error" in str(line) for line in printed)
+    database.get_database().close()
+
+def test_changes_follow_commit_order_not_timestamps(db, monkeypatch):
+    import src.bot.database as database
+    order = {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0}
+    db.save_order(order, {"orderId": 1, "status": "NEW"})
+    rows, version = db.get_orders_changed_since()
+    assert [o.order_id for o in rows] == ["1"]
+
+    class Earlier(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2020, 1, 1)
+
+    # Timestamped before the first order but committed after it
+    monkeypatch.setattr(database, "datetime", Earlier)
+    db.save_order(order, {"orderId": 2, "status": "NEW"})
+    rows, version = db.get_orders_changed_since(version)
+    assert [o.order_id for o in rows] == ["2"]
+    db.update_order_status("1", {"status": "FILLED"})
+    rows, version = db.get_orders_changed_since(version)
+    assert [o.order_id for o in rows] == ["1"]
+    assert version == db.get_latest_order_version() == 3
+
+def test_batched_writes_get_distinct_versions(db):
+    db.enable_write_behind(flush_interval_ms=1000)
+    for i in range(5):
+        db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01},
+                      {"orderId": i, "status": "NEW"})
+    db.update_order_status("0", {"status": "FILLED"})
+    assert db.flush(timeout=5)
+    rows, _ = db.get_orders_changed_since(limit=10)
+    assert [o.version for o in rows] == [2, 3, 4, 5, 6]
+    assert [o.order_id for o in rows] == ["1", "2", "3", "4", "0"]
+
+def test_keyset_pagination(db):
+    for i in range(25):
+        db.save_order({"symbol": "BTCUSDT" if i % 2 else "ETHUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01},
+                      {"orderId": i, "status": "NEW"})
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = db.get_order_history_page(limit=10, cursor=cursor)
+        seen.extend(int(o.order_id) for o in page)
+        if cursor is None:
+            break
+    assert seen == list(range(24, -1, -1))
+
+    btc, cursor = db.get_order_history_page(symbol="BTCUSDT", limit=5)
+    assert [o.order_id for o in btc] == ["23", "21", "19", "17", "15"]
+    rest, _ = db.get_order_history_page(symbol="BTCUSDT", limit=100, cursor=cursor)
+    assert len(rest) == 7
+
+    with pytest.raises(ValueError):
+        db.get_activity_logs_page(cursor="not-a-cursor")
+
+def test_statistics_follow_status_transitions(db):
+    for i, symbol in enumerate(["BTCUSDT", "BTCUSDT", "ETHUSDT"]):
+        db.save_order({"symbol": symbol, "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0},
+                      {"orderId": i, "status": "NEW"})
+    db.update_order_status("0", {"status": "FILLED"})
+    db.update_order_status("2", {"status": "CANCELED"})
+
+    stats = db.get_statistics()
+    assert stats["total_orders"] == 3
+    assert stats["filled_orders"] == 1
+    assert stats["cancelled_orders"] == 1
+    assert stats["pending_orders"] == 1
+    assert stats["by_symbol"]["BTCUSDT"]["filled_orders"] == 1
+    assert stats["by_symbol"]["ETHUSDT"]["cancelled_orders"] == 1
+    assert sum(day["total_orders"] for day in stats["by_day"].values()) == 3
+
+    db.rebuild_statistics()
+    assert db.get_statistics() == stats
+
+def test_statistics_break_down_recent_days_only(db):
+    for i in range(2):
+        db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01},
+                      {"orderId": i, "status": "FILLED"})
+    session = db.get_session()
+    old = datetime.utcnow() - timedelta(days=40)
+    session.query(OrderHistory).filter(OrderHistory.order_id == "0").update({"created_at": old})
+    session.commit()
+    session.close()
+    db.rebuild_statistics()
+
+    stats = db.get_statistics()
+    assert stats["filled_orders"] == 2
+    assert list(stats["by_day"]) == [datetime.utcnow().strftime("%Y-%m-%d")]
+    assert len(db.get_statistics(days=None)["by_day"]) == 2
+
+def test_retention_rolls_up_and_deletes_old_activity(db):
+    old = datetime.utcnow() - timedelta(days=40)
+    for action, status in [("check_status", "success")] * 3 + [("cancel_order", "error")]:
+        db.log_activity(action, status, message="x" * 2000)
+    db.log_activity("place_order", "success")
+    with db.engine.begin() as conn:
+        conn.execute(text("UPDATE activity_log SET timestamp = :ts WHERE action != 'place_order'"), {"ts": old})
+
+    result = db.apply_retention(max_age_days=30, batch_size=2)
+    assert result["deleted"] == 4 and result["vacuumed_pages"] > 0
+    assert [log.action for log in db.get_activity_logs()] == ["place_order"]
+    rollup = {(r.hour, r.action, r.status): r.count for r in db.get_activity_rollup()}
+    hour = old.strftime("%Y-%m-%d %H:00")
+    assert rollup == {(hour, "check_status", "success"): 3, (hour, "cancel_order", "error"): 1}
+    assert db.apply_retention(max_age_days=30)["deleted"] == 0
+
+def test_vacuum_enables_incremental_mode_on_old_files(tmp_path):
+    path = str(tmp_path / "old.db")
+    pragmas = {"journal_mode": "WAL"}
+    old = Database(path, pragmas=pragmas)
+    assert old.incremental_vacuum() == 0
+    old.vacuum()
+    with old.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
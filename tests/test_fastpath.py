@@ -0,0 +1,81 @@
+import itertools
+from unittest.mock import MagicMock
+import pytest
+from src.bot.enums import OrderSide, OrderType, TimeInForce
+from src.bot.fastpath import OrderRecord, build_order_params, order_params
+from src.bot.filters import SymbolFilters
+from src.bot.models import OrderInput
+from src.bot.services.orders import OrderService
+
+FILTERS = SymbolFilters.from_symbol_info({"symbol": "BTCUSDT", "filters": [
+    {"filterType": "PRICE_FILTER", "minPrice": "556.80", "maxPrice": "4529764", "tickSize": "0.10"},
+    {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+    {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120", "stepSize": "0.001"},
+    {"filterType": "MIN_NOTIONAL", "notional": "100"},
+]})
+
+SERVICE = OrderService(None, None)
+
+def model_params(fields):
+    """Exchange parameters the OrderInput path produces, or the exception type it raises"""
+    try:
+        return SERVICE._prepare_params(OrderInput(**fields), FILTERS)
+    except ValueError:
+        return ValueError
+
+def fast_params(fields):
+    try:
+        return SERVICE._prepare_params(OrderRecord(**fields), FILTERS)
+    except ValueError:
+        return ValueError
+
+def test_matches_order_input_across_order_shapes():
+    cases = itertools.product(
+        ["BUY", OrderSide.SELL, "HOLD"],
+        [t.value for t in OrderType],
+        [0.0025, 0.0001, 150.0, 0],
+        [None, 95000.06, 100.0],
+        [None, "IOC", TimeInForce.FOK],
+        [None, 94000.04],
+        [False, True],
+        ["my-order_1", "bad id!"],
+    )
+    compared = 0
+    for side, order_type, quantity, price, tif, stop, reduce_only, client_id in cases:
+        fields = dict(symbol="BTCUSDT", side=side, type=order_type, quantity=quantity, price=price,
+                      timeInForce=tif, stopPrice=stop, reduceOnly=reduce_only,
+                      newClientOrderId=client_id)
+        expected = model_params(fields)
+        assert fast_params(fields) == expected, fields
+        compared += expected is not ValueError
+    assert compared > 100  # the grid covers plenty of valid orders, not just rejections
+
+def test_plain_tuples_are_padded_with_defaults():
+    assert order_params(("BTCUSDT", "BUY", "LIMIT", 0.002, 95000.0)) == {
+        "symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002, "price": 95000.0,
+        "timeInForce": "GTC", "reduceOnly": False,
+    }
+    params = build_order_params(("BTCUSDT", "SELL", "MARKET", 0.0025), FILTERS, reference_price=95000.0)
+    assert params["quantity"] == 0.002 and params["newClientOrderId"].startswith("ctb-")
+    with pytest.raises(ValueError):
+        order_params(("BTCUSDT", "BUY", "LIMIT", 0.002))
+
+def test_batch_accepts_rows():
+    client = MagicMock()
+    client.futures_place_batch_order.side_effect = lambda batch: [{"orderId": i, "status": "NEW"}
+                                                                  for i, _ in enumerate(batch)]
+    symbol_service = MagicMock()
+    symbol_service.get_parsed_filters.return_value = FILTERS
+    service = OrderService(client, symbol_service)
+    service._db = MagicMock()
+
+    results = service.place_orders_batch([
+        ("BTCUSDT", "BUY", "LIMIT", 0.002, 94000.04),
+        OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT, quantity=0.002, price=94000),
+        ("BTCUSDT", "BUY", "LIMIT", 0.0001, 94000.0),
+    ])
+    sent = client.futures_place_batch_order.call_args.args[0]
+    assert [p["price"] for p in sent] == [94000.0, 94000.0]
+    assert results[2]["code"] == -4004
+    failed = service._db.save_order.call_args_list[0].args[0]
+    assert failed == {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.0001, "price": 94000.0}
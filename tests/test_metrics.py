@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import MagicMock
+from binance.exceptions import BinanceAPIException
+from src.bot.filters import SymbolFilters
+from src.bot.metrics import (EXCHANGE_ERRORS, EXCHANGE_REQUEST_SECONDS, ORDER_REQUESTS,
+                             ORDER_STAGE_SECONDS, Counter, Histogram, Registry, observe_span)
+from src.bot.models import OrderInput, OrderSide, OrderType
+from src.bot.services.orders import OrderService
+from src.bot.tracing import Span
+from src.web_ui import app
+
+@pytest.fixture
+def order_service():
+    client = MagicMock()
+    client.futures_create_order.return_value = {"orderId": 1, "status": "NEW"}
+    symbol_service = MagicMock()
+    symbol_service.get_parsed_filters.return_value = SymbolFilters.from_symbol_info({
+        "symbol": "METRICUSDT",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.01"},
+            {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+        ]
+    })
+    service = OrderService(client, symbol_service)
+    service._db = MagicMock()
+    return service
+
+def market_order():
+    return OrderInput(symbol="METRICUSDT", side=OrderSide.BUY, type=OrderType.MARKET, quantity=0.01)
+
+def test_render_histogram_and_counter():
+    registry = Registry()
+    histogram = registry.histogram('test_seconds', 'Test latency', ('stage',), buckets=(0.1, 1.0))
+    counter = registry.counter('test_total', 'Test calls', ('outcome',))
+    histogram.observe(0.05, 'a')
+    histogram.observe(0.5, 'a')
+    counter.inc('ok')
+    counter.inc('ok')
+
+    text = registry.render()
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 2' in text
+    assert 'test_seconds_count{stage="a"} 2' in text
+    assert 'test_total{outcome="ok"} 2' in text
+
+def test_label_values_are_escaped():
+    counter = Counter('escaped_total', 'Escaping', ('msg',))
+    counter.inc('say "hi"\n')
+    assert counter.samples() == ['escaped_total{msg="say \\"hi\\"\\n"} 1']
+
+def test_histogram_counts_values_above_the_last_bucket():
+    histogram = Histogram('slow_seconds', 'Slow', buckets=(0.1,))
+    histogram.observe(5.0)
+    assert histogram.count() == 1
+    assert histogram.samples()[0] == 'slow_seconds_bucket{le="0.1"} 0'
+
+def test_place_order_records_every_stage(order_service):
+    stages = ('filters', 'dump', 'validate', 'request', 'save_order', 'log_activity')
+    before = {stage: ORDER_STAGE_SECONDS.count('place_order', stage, 'METRICUSDT') for stage in stages}
+    ok_before = ORDER_REQUESTS.value('place_order', 'METRICUSDT', 'ok')
+
+    order_service.place_order(market_order())
+
+    for stage in stages:
+        assert ORDER_STAGE_SECONDS.count('place_order', stage, 'METRICUSDT') == before[stage] + 1
+    assert ORDER_REQUESTS.value('place_order', 'METRICUSDT', 'ok') == ok_before + 1
+
+def test_place_order_counts_exchange_error_code(order_service):
+    response = MagicMock(status_code=400, text='{"code": -2019, "msg": "Margin is insufficient."}')
+    order_service.client.futures_create_order.side_effect = BinanceAPIException(response, 400, response.text)
+    before = ORDER_REQUESTS.value('place_order', 'METRICUSDT', '-2019')
+
+    with pytest.raises(BinanceAPIException):
+        order_service.place_order(market_order())
+
+    assert ORDER_REQUESTS.value('place_order', 'METRICUSDT', '-2019') == before + 1
+
+def test_observe_span_counts_exchange_errors():
+    observe_span(Span(name='futures_metric_test', duration_ms=12.5, status='error', args_size=0, error_code=-1021))
+    assert EXCHANGE_ERRORS.value('futures_metric_test', '-1021') == 1
+    assert EXCHANGE_REQUEST_SECONDS.count('futures_metric_test', 'error') == 1
+
+def test_metrics_endpoint(order_service):
+    order_service.place_order(market_order())
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'version=0.0.4' in response.content_type
+    assert 'bot_order_stage_seconds_bucket{endpoint="place_order",stage="request",symbol="METRICUSDT"' in response.get_data(as_text=True)
@@ -1,18 +1,36 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock
+import requests
+from unittest.mock import ANY, AsyncMock, MagicMock
+from src.bot import database
+from src.bot.client import BinanceClient
+from src.bot.clock import ServerClock
+from src.bot.config import settings
+from src.bot.filters import SymbolFilters
 from src.bot.models import OrderInput, OrderSide, OrderType
-from src.bot.services.orders import OrderService
+from src.bot.services.orders import AsyncOrderService, OrderService
+from src.bot.services.prices import PriceCache
+from src.bot.validators import OrderValidationError
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    test_db = database.Database(str(tmp_path / "test.db"))
+    monkeypatch.setattr(database, "_db_instance", test_db)
+    yield test_db
+    test_db.close()
 
 @pytest.fixture
 def mock_order_service():
     client = MagicMock()
+    client.futures_create_order.return_value = {"orderId": 1, "status": "NEW"}
     symbol_service = MagicMock()
-    symbol_service.get_symbol_filters.return_value = {
+    symbol_service.get_parsed_filters.return_value = SymbolFilters.from_symbol_info({
+        "symbol": "BTCUSDT",
         "filters": [
             {"filterType": "PRICE_FILTER", "tickSize": "0.01"},
             {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
         ]
-    }
+    })
     return OrderService(client, symbol_service)
 
 def test_place_limit_order(mock_order_service):
@@ -32,7 +50,8 @@ def test_place_limit_order(mock_order_service):
         quantity=1.234,
         price=123.46,
         timeInForce='GTC',
-        reduceOnly=False
+        reduceOnly=False,
+        newClientOrderId=ANY
     )
 
 def test_place_market_order(mock_order_service):
@@ -40,7 +59,8 @@ def test_place_market_order(mock_order_service):
         symbol="BTCUSDT",
         side=OrderSide.SELL,
         type=OrderType.MARKET,
-        quantity=0.123
+        quantity=0.123,
+        newClientOrderId="my-order-1"
     )
     mock_order_service.place_order(order)
     mock_order_service.client.futures_create_order.assert_called_once_with(
@@ -48,9 +68,21 @@ def test_place_market_order(mock_order_service):
         side='SELL',
         type='MARKET',
         quantity=0.123,
-        reduceOnly=False
+        reduceOnly=False,
+        newClientOrderId='my-order-1'
     )
 
+def test_orders_get_unique_client_order_ids(mock_order_service):
+    order = OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.MARKET, quantity=0.01)
+    mock_order_service.place_order(order)
+    mock_order_service.place_order(order)
+    sent = [c.kwargs["newClientOrderId"] for c in mock_order_service.client.futures_create_order.call_args_list]
+    assert len(set(sent)) == 2 and all(i.startswith("ctb-") for i in sent)
+
+    with pytest.raises(ValueError):
+        OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.MARKET, quantity=0.01,
+                   newClientOrderId="not allowed!")
+
 def test_place_stop_order(mock_order_service):
     order = OrderInput(
         symbol="ETHUSDT",
@@ -70,5 +102,95 @@ def test_place_stop_order(mock_order_service):
         price=2000.0,
         stopPrice=1950.0,
         timeInForce='GTC',
-        reduceOnly=False
+        reduceOnly=False,
+        newClientOrderId=ANY
     )
+
+def test_async_orders_fan_out(mock_order_service):
+    client = AsyncMock()
+    client.futures_create_order.side_effect = lambda **params: {"orderId": params["quantity"], "status": "NEW"}
+    service = AsyncOrderService(client, mock_order_service.symbol_service)
+
+    async def place_all():
+        orders = [
+            OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.MARKET, quantity=0.001 * i)
+            for i in range(1, 6)
+        ]
+        return await asyncio.gather(*(service.place_order(o) for o in orders))
+
+    results = asyncio.run(place_all())
+    assert [r["orderId"] for r in results] == [0.001, 0.002, 0.003, 0.004, 0.005]
+    assert client.futures_create_order.await_count == 5
+
+def test_place_orders_batch_chunks_and_failures(mock_order_service):
+    client = mock_order_service.client
+    client.futures_place_batch_order.side_effect = lambda batch: [
+        {"orderId": i, "status": "NEW"} if p["side"] == "BUY" else {"code": -2019, "msg": "Margin is insufficient."}
+        for i, p in enumerate(batch)
+    ]
+    orders = [
+        OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT, quantity=0.01, price=100 + i)
+        for i in range(6)
+    ]
+    orders.append(OrderInput(symbol="BTCUSDT", side=OrderSide.SELL, type=OrderType.MARKET, quantity=0.01))
+    orders.append(OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.MARKET, quantity=0.0001))
+
+    results = mock_order_service.place_orders_batch(orders)
+
+    # The order below minQty never reaches the exchange, the rest go out as 5 + 2
+    assert [len(call.args[0]) for call in client.futures_place_batch_order.call_args_list] == [5, 2]
+    assert len(results) == 8
+    assert all("orderId" in r for r in results[:6])
+    assert results[6]["code"] == -2019
+    assert "minQty" in results[7]["msg"]
+
+def test_batch_timeout_after_acceptance_records_the_live_orders(mock_order_service, db, monkeypatch):
+    monkeypatch.setattr(settings, "order_retry_backoff", 0)
+    client = BinanceClient.__new__(BinanceClient)
+    client.clock = ServerClock()
+    client.clock.record(0, 0, 0)
+    client.governor = None
+    client.client = MagicMock()
+    client.client.futures_place_batch_order.side_effect = requests.exceptions.ReadTimeout()
+    client.client.futures_get_order.side_effect = lambda **params: {
+        "orderId": 100 + int(params["origClientOrderId"][-1]), "clientOrderId": params["origClientOrderId"],
+        "status": "NEW"}
+    mock_order_service.client = client
+    orders = [OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT, quantity=0.01,
+                         price=100, newClientOrderId=f"ctb-{i}") for i in range(2)]
+
+    results = mock_order_service.place_orders_batch(orders)
+    assert [r["orderId"] for r in results] == [100, 101]
+    assert client.client.futures_place_batch_order.call_count == 1
+    assert [db.get_order_by_client_id(f"ctb-{i}").status for i in range(2)] == ["NEW", "NEW"]
+
+    # Still unknown after every attempt, kept by client order ID instead of marked rejected
+    client.client.futures_get_order.side_effect = requests.exceptions.ReadTimeout()
+    orders = [OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT, quantity=0.01,
+                         price=100, newClientOrderId="ctb-9")]
+    assert mock_order_service.place_orders_batch(orders)[0]["code"] == -1007
+    assert db.get_order_by_client_id("ctb-9").status == "UNKNOWN"
+
+def test_local_rejection_skips_the_exchange(mock_order_service):
+    mock_order_service.symbol_service.get_parsed_filters.return_value = SymbolFilters.from_symbol_info({
+        "symbol": "BTCUSDT",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+            {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+            {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95"},
+        ]
+    })
+    price_cache = PriceCache()
+    price_cache.put("BTCUSDT", 95000.0)
+    mock_order_service.price_cache = price_cache
+    order = OrderInput(symbol="BTCUSDT", side=OrderSide.BUY, type=OrderType.LIMIT, quantity=0.01, price=100000)
+
+    with pytest.raises(OrderValidationError) as excinfo:
+        mock_order_service.place_order(order)
+    assert excinfo.value.code == -4016
+    mock_order_service.client.futures_create_order.assert_not_called()
+
+    price_cache.put("BTCUSDT", 95000.0, updated_at=0)  # stale, left to the exchange
+    mock_order_service._db = MagicMock()
+    mock_order_service.place_order(order)
+    mock_order_service.client.futures_create_order.assert_called_once()
@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from src.bot.services.prices import PriceCache
+
+@pytest.fixture
+def price_cache():
+    cache = PriceCache(ws_url="ws://127.0.0.1:1")
+    cache.start = MagicMock()
+    cache.send = MagicMock(return_value=True)
+    return cache
+
+def test_subscribe_on_first_request(price_cache):
+    assert price_cache.get("btcusdt") is None
+    price_cache.start.assert_called_once()
+    assert price_cache.url() == "ws://127.0.0.1:1/stream?streams=btcusdt@markPrice@1s"
+
+    price_cache.get("BTCUSDT")
+    price_cache.start.assert_called_once()
+
+def test_subscriptions_are_capped(price_cache):
+    price_cache.max_symbols = 2
+    assert price_cache.subscribe("BTCUSDT") and price_cache.subscribe("ETHUSDT")
+    assert not price_cache.subscribe("BNBUSDT")
+    assert price_cache.subscribe("BTCUSDT")
+    assert price_cache.get("BNBUSDT") is None
+    assert price_cache.url() == "ws://127.0.0.1:1/stream?streams=btcusdt@markPrice@1s/ethusdt@markPrice@1s"
+
+def test_stream_updates(price_cache):
+    price_cache.on_message({
+        "stream": "btcusdt@markPrice@1s",
+        "data": {"e": "markPriceUpdate", "E": 1700000000000, "s": "BTCUSDT", "p": "65000.10"},
+    })
+    price_cache.on_message({"e": "bookTicker", "E": 1700000001000, "s": "ETHUSDT", "b": "3000.0", "a": "3001.0"})
+    price_cache.on_message({"result": None, "id": 1})
+
+    assert price_cache.get("BTCUSDT") == (65000.10, 1700000000.0)
+    assert price_cache.get("ETHUSDT") == (3000.5, 1700000001.0)
+
+def test_put_defaults_to_now(price_cache):
+    price_cache.put("BTCUSDT", 1.0)
+    price, updated_at = price_cache.get("BTCUSDT")
+    assert price == 1.0
+    assert time.time() - updated_at < 1
+
+def test_subscribe_during_connect_is_sent_on_open(price_cache):
+    price_cache.get("BTCUSDT")
+    assert price_cache.url().endswith("streams=btcusdt@markPrice@1s")
+    # Requested while connecting, after the URL was built and before the socket is up
+    price_cache._thread = MagicMock(is_alive=MagicMock(return_value=True))
+    price_cache.send.return_value = False
+    price_cache.get("ETHUSDT")
+
+    price_cache.send.reset_mock()
+    price_cache.send.return_value = True
+    asyncio.run(price_cache.on_open(None))
+    price_cache.send.assert_called_once()
+    assert price_cache.send.call_args.args[0]["params"] == ["ethusdt@markPrice@1s"]
+    asyncio.run(price_cache.on_open(None))
+    price_cache.send.assert_called_once()
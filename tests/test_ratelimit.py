@@ -0,0 +1,104 @@
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+from src.bot.ratelimit import (
+    PRIORITY_CANCEL, PRIORITY_ORDER, RateLimitExceeded, RateLimitGovernor, governed, record_response,
+)
+
+LIMITS = [
+    {'rateLimitType': 'REQUEST_WEIGHT', 'interval': 'MINUTE', 'intervalNum': 1, 'limit': 600},
+    {'rateLimitType': 'ORDERS', 'interval': 'SECOND', 'intervalNum': 10, 'limit': 10},
+]
+
+def test_orders_are_delayed_before_the_limit():
+    governor = RateLimitGovernor(LIMITS, headroom=1.0)
+    for _ in range(10):
+        governor.acquire(weight=0, orders=1, timeout=0)
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire(weight=0, orders=1, timeout=0.1)
+    # One order token refills every second
+    start = time.monotonic()
+    governor.acquire(weight=0, orders=1, timeout=2)
+    assert 0.5 < time.monotonic() - start < 1.5
+
+def test_headers_sync_used_weight():
+    governor = RateLimitGovernor(LIMITS, headroom=1.0)
+    governor.update_from_headers({'X-MBX-USED-WEIGHT-1M': '600', 'X-MBX-ORDER-COUNT-10S': '3'})
+    stats = governor.stats()
+    assert stats['weight']['1M']['available'] <= 1
+    assert stats['orders']['10S']['available'] == 7
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire(weight=5, timeout=0.1)
+
+def test_retry_after_pauses_requests():
+    governor = RateLimitGovernor(LIMITS)
+    error = MagicMock(status_code=429, response=MagicMock(headers={'Retry-After': '30'}))
+    governor.observe(error=error)
+    assert governor.stats()['blocked_for'] > 29
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire(timeout=1)
+
+def test_cancels_go_before_new_orders():
+    governor = RateLimitGovernor(LIMITS, headroom=1.0)
+    for _ in range(10):
+        governor.acquire(weight=0, orders=1)
+    admitted = []
+
+    def run(name, priority, orders):
+        governor.acquire(weight=1, orders=orders, priority=priority, timeout=5)
+        admitted.append(name)
+
+    new_order = threading.Thread(target=run, args=('order', PRIORITY_ORDER, 1))
+    new_order.start()
+    time.sleep(0.05)
+    # Cancels need weight but no order tokens, and must not queue behind the order
+    cancel = threading.Thread(target=run, args=('cancel', PRIORITY_CANCEL, 0))
+    cancel.start()
+    cancel.join(1)
+    assert admitted == ['cancel']
+    new_order.join(3)
+    assert admitted == ['cancel', 'order']
+
+def test_governed_reads_response_headers():
+    class Client:
+        def __init__(self):
+            self.governor = RateLimitGovernor(LIMITS, headroom=1.0)
+
+        @governed(weight=5)
+        def call(self):
+            record_response(MagicMock(headers={'x-mbx-used-weight-1m': '100'}))
+            return 'ok'
+
+    client = Client()
+    assert client.call() == 'ok'
+    assert client.governor.stats()['weight']['1M']['available'] == 500
+
+def test_governed_headers_are_per_thread():
+    observed = {}
+    both_sent = threading.Barrier(2)
+
+    class Client:
+        def __init__(self):
+            self.governor = RateLimitGovernor(LIMITS, headroom=1.0)
+            self.governor.observe = lambda response=None, error=None: observed.__setitem__(
+                threading.current_thread().name, response)
+            self.client = MagicMock()
+
+        @governed(weight=1)
+        def call(self, name):
+            response = MagicMock(name=name)
+            record_response(response)
+            self.client.response = response  # what python-binance shares between threads
+            both_sent.wait(1)
+            return response
+
+    client = Client()
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.__setitem__(n, client.call(n)), name=n)
+               for n in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+    assert observed == results
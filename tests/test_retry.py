@@ -0,0 +1,155 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+import requests
+from binance.exceptions import BinanceAPIException
+from src.bot.client import AsyncBinanceClient, BinanceClient
+from src.bot.clock import ServerClock
+from src.bot.config import settings
+from src.bot.retry import is_transient, new_client_order_id
+
+def api_error(code, status=400):
+    return BinanceAPIException(MagicMock(), status, json.dumps({"code": code, "msg": "error"}))
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "order_retry_backoff", 0)
+
+def make_client(create_order, get_order):
+    client = BinanceClient.__new__(BinanceClient)
+    client.clock = ServerClock()
+    client.clock.record(0, 0, 0)
+    client.governor = None
+    client.client = MagicMock()
+    client.client.futures_create_order.side_effect = create_order
+    client.client.futures_get_order.side_effect = get_order
+    return client
+
+def test_client_order_ids():
+    ids = {new_client_order_id() for _ in range(100)}
+    assert len(ids) == 100
+    assert all(len(i) <= 36 and i.startswith("ctb-") for i in ids)
+
+def test_transient_errors():
+    assert is_transient(requests.exceptions.ReadTimeout())
+    assert is_transient(api_error(-1001, 503))
+    assert is_transient(api_error(-1007, 408))
+    assert not is_transient(api_error(-2019))
+    assert not is_transient(ValueError("bad quantity"))
+
+def test_timed_out_order_that_landed_is_not_resent():
+    client = make_client(requests.exceptions.ReadTimeout(),
+                         lambda **params: {"orderId": 7, "clientOrderId": params["origClientOrderId"]})
+    result = client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01,
+                                         newClientOrderId="ctb-abc")
+    assert result == {"orderId": 7, "clientOrderId": "ctb-abc"}
+    assert client.client.futures_create_order.call_count == 1
+    client.client.futures_get_order.assert_called_once_with(symbol="BTCUSDT", origClientOrderId="ctb-abc")
+
+def test_order_missing_after_failure_is_resent_with_same_id():
+    sent = []
+
+    def create_order(**params):
+        sent.append(params["newClientOrderId"])
+        if len(sent) == 1:
+            raise api_error(-1001, 503)
+        return {"orderId": 8}
+
+    client = make_client(create_order, api_error(-2013))
+    assert client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01) == {"orderId": 8}
+    assert len(sent) == 2 and sent[0] == sent[1] and sent[0].startswith("ctb-")
+
+def test_duplicate_on_resend_resolves_to_existing_order():
+    lookups = iter([api_error(-2013), {"orderId": 9}])
+
+    def get_order(**params):
+        result = next(lookups)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    client = make_client([api_error(-1007, 408), api_error(-4116)], get_order)
+    assert client.futures_create_order(symbol="BTCUSDT", newClientOrderId="ctb-x") == {"orderId": 9}
+    assert client.client.futures_create_order.call_count == 2
+
+def test_gives_up_after_configured_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "order_retry_attempts", 2)
+    client = make_client(requests.exceptions.ReadTimeout(), requests.exceptions.ReadTimeout())
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.futures_create_order(symbol="BTCUSDT")
+    assert client.client.futures_create_order.call_count == 1
+    assert client.client.futures_get_order.call_count == 1
+
+def test_rejections_are_not_retried():
+    client = make_client(api_error(-2019), MagicMock())
+    with pytest.raises(BinanceAPIException):
+        client.futures_create_order(symbol="BTCUSDT")
+    assert client.client.futures_get_order.call_count == 0
+
+def make_batch_client(place_batch, get_order):
+    client = make_client(None, get_order)
+    client.client.futures_place_batch_order.side_effect = place_batch
+    return client
+
+def batch(*ids):
+    return [{"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01, "newClientOrderId": i}
+            for i in ids]
+
+def test_timed_out_batch_is_looked_up_and_only_missing_orders_resent():
+    resent = []
+
+    def place_batch(batchOrders):
+        if not resent:
+            resent.append(None)
+            raise requests.exceptions.ReadTimeout()
+        resent.append([o["newClientOrderId"] for o in batchOrders])
+        return [{"orderId": 3, "clientOrderId": "ctb-b"}]
+
+    def get_order(**params):
+        if params["origClientOrderId"] == "ctb-b":
+            raise api_error(-2013)
+        return {"orderId": 1, "clientOrderId": params["origClientOrderId"]}
+
+    client = make_batch_client(place_batch, get_order)
+    results = client.futures_place_batch_order(batch("ctb-a", "ctb-b", "ctb-c"))
+    assert [r["orderId"] for r in results] == [1, 3, 1]
+    assert resent == [None, ["ctb-b"]]
+
+def test_unresolved_batch_orders_are_reported_unknown(monkeypatch):
+    monkeypatch.setattr(settings, "order_retry_attempts", 2)
+    client = make_batch_client(api_error(-1001, 503), requests.exceptions.ReadTimeout())
+    results = client.futures_place_batch_order(batch("ctb-a", "ctb-b"))
+    assert [r["code"] for r in results] == [-1007, -1007]
+    assert client.client.futures_place_batch_order.call_count == 1
+
+def test_batch_rejections_are_not_retried():
+    client = make_batch_client(api_error(-1102), MagicMock())
+    assert [r["code"] for r in client.futures_place_batch_order(batch("ctb-a"))] == [-1102]
+    assert client.client.futures_get_order.call_count == 0
+
+def test_async_timed_out_order_is_looked_up(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    raw = MagicMock()
+    raw.futures_create_order = AsyncMock(side_effect=asyncio.TimeoutError())
+    raw.futures_get_order = AsyncMock(return_value={"orderId": 10})
+    clock = ServerClock()
+    clock.record(0, 0, 0)
+    client = AsyncBinanceClient(raw, clock=clock)
+
+    assert asyncio.run(client.futures_create_order(symbol="BTCUSDT")) == {"orderId": 10}
+    sent_id = raw.futures_create_order.call_args.kwargs["newClientOrderId"]
+    raw.futures_get_order.assert_awaited_once_with(symbol="BTCUSDT", origClientOrderId=sent_id)
+
+def test_async_timed_out_batch_is_looked_up(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    raw = MagicMock()
+    raw.futures_place_batch_order = AsyncMock(side_effect=asyncio.TimeoutError())
+    raw.futures_get_order = AsyncMock(side_effect=lambda **params: {"orderId": 11})
+    clock = ServerClock()
+    clock.record(0, 0, 0)
+    client = AsyncBinanceClient(raw, clock=clock)
+
+    assert asyncio.run(client.futures_place_batch_order(batch("ctb-a"))) == [{"orderId": 11}]
+    raw.futures_place_batch_order.assert_awaited_once()
+    raw.futures_get_order.assert_awaited_once_with(symbol="BTCUSDT", origClientOrderId="ctb-a")
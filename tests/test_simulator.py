@@ -0,0 +1,155 @@
+import pytest
+from unittest.mock import MagicMock
+from binance.exceptions import BinanceAPIException
+from src.bot.client import BinanceClient, create_exchange_client
+from src.bot.config import settings
+from src.bot.models import OrderInput, OrderSide, OrderType
+from src.bot.services.orders import OrderService
+from src.bot.services.symbols import SymbolService
+from src.bot.services.user_stream import UserDataStream
+from src.bot.simulator import SimulatedBinanceClient
+
+@pytest.fixture
+def sim():
+    return SimulatedBinanceClient(prices={"BTCUSDT": 95000})
+
+def limit(sim, side, quantity, price, **extra):
+    return sim.futures_create_order(symbol="BTCUSDT", side=side, type="LIMIT", quantity=quantity,
+                                    price=price, timeInForce=extra.pop("timeInForce", "GTC"), **extra)
+
+def assert_rejected(code, call, *args, **kwargs):
+    with pytest.raises(BinanceAPIException) as excinfo:
+        call(*args, **kwargs)
+    assert excinfo.value.code == code
+
+def test_market_order_fills_at_reference_price(sim):
+    order = sim.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01)
+    assert order["status"] == "FILLED"
+    assert order["avgPrice"] == "95000.0"
+    assert order["executedQty"] == "0.010"
+    assert sim.get_position("BTCUSDT") == pytest.approx(0.01)
+
+def test_resting_orders_match_in_price_time_priority():
+    sim = SimulatedBinanceClient(prices={})
+    first = limit(sim, "SELL", 0.01, 95010)
+    second = limit(sim, "SELL", 0.01, 95010)
+    cheaper = limit(sim, "SELL", 0.01, 95005)
+
+    taker = limit(sim, "BUY", 0.015, 95010)
+    assert taker["status"] == "FILLED"
+    assert taker["avgPrice"] == "95006.7"  # 0.01 @ 95005 then 0.005 @ 95010
+
+    assert sim.futures_get_order(symbol="BTCUSDT", orderId=cheaper["orderId"])["status"] == "FILLED"
+    assert sim.futures_get_order(symbol="BTCUSDT", orderId=first["orderId"])["status"] == "PARTIALLY_FILLED"
+    assert sim.futures_get_order(symbol="BTCUSDT", orderId=second["orderId"])["status"] == "NEW"
+
+def test_time_in_force(sim):
+    assert limit(sim, "BUY", 0.01, 94000, timeInForce="IOC")["status"] == "EXPIRED"
+    assert limit(sim, "BUY", 0.01, 94000, timeInForce="FOK")["status"] == "EXPIRED"
+    assert limit(sim, "BUY", 0.01, 94000)["status"] == "NEW"
+    assert limit(sim, "BUY", 0.01, 95100, timeInForce="FOK")["status"] == "FILLED"
+
+def test_fok_does_not_fill_partially():
+    sim = SimulatedBinanceClient(prices={})
+    maker = limit(sim, "SELL", 0.01, 95000)
+    assert limit(sim, "BUY", 0.02, 95000, timeInForce="FOK")["status"] == "EXPIRED"
+    assert sim.futures_get_order(symbol="BTCUSDT", orderId=maker["orderId"])["executedQty"] == "0.000"
+
+def test_set_price_fills_crossed_orders_and_fires_triggers(sim):
+    resting = limit(sim, "BUY", 0.01, 94000)
+    stop = sim.futures_create_order(symbol="BTCUSDT", side="SELL", type="STOP_MARKET", quantity=0.01,
+                                    stopPrice=93000)
+    take_profit = sim.futures_create_order(symbol="BTCUSDT", side="SELL", type="TAKE_PROFIT", quantity=0.01,
+                                           price=96000, stopPrice=96000)
+
+    touched = sim.set_price("BTCUSDT", 93900)
+    assert [o["orderId"] for o in touched] == [resting["orderId"]]
+    assert touched[0]["avgPrice"] == "94000.0"
+
+    touched = sim.set_price("BTCUSDT", 92950)
+    assert [o["orderId"] for o in touched] == [stop["orderId"]]
+    assert touched[0]["status"] == "FILLED"
+    assert touched[0]["avgPrice"] == "92950.0"
+
+    touched = sim.set_price("BTCUSDT", 96000)
+    assert [o["orderId"] for o in touched] == [take_profit["orderId"]]
+    assert touched[0]["status"] == "FILLED"
+
+def test_stop_that_would_trigger_immediately_is_rejected(sim):
+    assert_rejected(-2021, sim.futures_create_order, symbol="BTCUSDT", side="BUY", type="STOP_MARKET",
+                    quantity=0.01, stopPrice=94000)
+
+def test_filters_are_enforced(sim):
+    assert_rejected(-4014, limit, sim, "BUY", 0.01, 94000.05)
+    assert_rejected(-4023, limit, sim, "BUY", 0.0105, 94000)
+    assert_rejected(-4004, limit, sim, "BUY", 0.0001, 94000)
+    assert_rejected(-4164, limit, sim, "BUY", 0.001, 100)
+    assert_rejected(-1121, sim.futures_create_order, symbol="XYZUSDT", side="BUY", type="MARKET", quantity=1)
+    assert_rejected(-2022, sim.futures_create_order, symbol="BTCUSDT", side="SELL", type="MARKET",
+                    quantity=0.01, reduceOnly=True)
+
+def test_percent_price_depends_on_side():
+    info = {"symbols": [{"symbol": "BTCUSDT", "filters": [
+        {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "1000000", "tickSize": "0.10"},
+        {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+        {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95"},
+    ]}]}
+    sim = SimulatedBinanceClient(exchange_info=info, prices={"BTCUSDT": 95000})
+    assert_rejected(-4016, limit, sim, "BUY", 0.01, 99800)
+    assert_rejected(-4024, limit, sim, "SELL", 0.01, 90200)
+    assert limit(sim, "BUY", 0.01, 90200)["status"] == "NEW"
+    assert limit(sim, "SELL", 0.01, 99800)["status"] == "NEW"
+
+def test_cancel_and_lookup_by_client_order_id(sim):
+    order = limit(sim, "BUY", 0.01, 94000, newClientOrderId="my-order")
+    assert_rejected(-4116, limit, sim, "BUY", 0.01, 94000, newClientOrderId="my-order")
+
+    found = sim.futures_get_order(symbol="BTCUSDT", origClientOrderId="my-order")
+    assert found["orderId"] == order["orderId"]
+    cancelled = sim.futures_cancel_order(symbol="BTCUSDT", orderId=order["orderId"])
+    assert cancelled["status"] == "CANCELED"
+    assert_rejected(-2011, sim.futures_cancel_order, symbol="BTCUSDT", orderId=order["orderId"])
+    assert_rejected(-2013, sim.futures_get_order, symbol="BTCUSDT", orderId=12345)
+
+def test_batch_reports_errors_per_order(sim):
+    results = sim.futures_place_batch_order([
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "0.010"},
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.010", "price": "1.05",
+         "timeInForce": "GTC"},
+    ])
+    assert results[0]["status"] == "FILLED"
+    assert results[1]["code"] == -4014
+
+def test_order_service_on_simulator(tmp_path, monkeypatch):
+    cache_file = tmp_path / "exchange_info.json"
+    monkeypatch.setattr(settings, "exchange_info_cache_file", str(cache_file))
+    sim = SimulatedBinanceClient()
+    service = OrderService(sim, SymbolService(sim))
+    service._db = MagicMock()
+
+    result = service.place_order(OrderInput(symbol="ETHUSDT", side=OrderSide.BUY, type=OrderType.LIMIT,
+                                            quantity=0.5, price=3400))
+    assert result["status"] == "NEW"
+    assert service.cancel_order("ETHUSDT", result["orderId"])["status"] == "CANCELED"
+    assert not cache_file.exists()  # simulated exchange info never lands in the shared cache
+
+def test_create_exchange_client_from_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "exchange_info_cache_file", str(tmp_path / "missing.json"))
+    monkeypatch.setattr(settings, "exchange", "simulated")
+    assert isinstance(create_exchange_client(), SimulatedBinanceClient)
+
+    monkeypatch.setattr(settings, "user_data_stream", True)
+    with pytest.raises(ValueError, match="USER_DATA_STREAM"):
+        create_exchange_client()
+    monkeypatch.setattr(settings, "user_data_stream", False)
+
+    monkeypatch.setattr(settings, "exchange", "kraken")
+    with pytest.raises(ValueError):
+        create_exchange_client()
+
+    monkeypatch.setattr(settings, "exchange", "binance")
+    assert isinstance(create_exchange_client(), BinanceClient)
+
+def test_user_data_stream_is_rejected():
+    with pytest.raises(ValueError, match="no user data stream"):
+        UserDataStream(SimulatedBinanceClient(), db=MagicMock())
@@ -0,0 +1,93 @@
+import json
+import os
+import time
+import pytest
+from decimal import Decimal
+from unittest.mock import MagicMock
+from src.bot.services.symbols import SymbolService
+
+@pytest.fixture
+def exchange_info():
+    return {
+        "symbols": [
+            {
+                "symbol": "BTCUSDT",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "1000000", "tickSize": "0.10"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+                    {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120", "stepSize": "0.001"},
+                    {"filterType": "MIN_NOTIONAL", "notional": "100"},
+                    {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95", "multiplierDecimal": "4"},
+                    {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+                ],
+            },
+            {"symbol": "ETHUSDT", "filters": []},
+        ]
+    }
+
+@pytest.fixture
+def symbol_service(exchange_info, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    client = MagicMock()
+    client.futures_exchange_info.return_value = exchange_info
+    return SymbolService(client)
+
+def test_index_built_once(symbol_service):
+    symbol_service.get_symbol_filters("BTCUSDT")
+    symbol_service.get_parsed_filters("ETHUSDT")
+    symbol_service.client.futures_exchange_info.assert_called_once()
+
+def test_parsed_filters(symbol_service):
+    filters = symbol_service.get_parsed_filters("BTCUSDT")
+    assert filters.price_filter.tick_size == Decimal("0.10")
+    assert filters.lot_size.max_qty == Decimal("1000")
+    assert filters.market_lot_size.max_qty == Decimal("120")
+    assert filters.min_notional.notional == Decimal("100")
+    assert filters.percent_price.multiplier_up == Decimal("1.05")
+    assert filters.max_num_orders.limit == 200
+    assert symbol_service.get_symbol_filters("BTCUSDT")["symbol"] == "BTCUSDT"
+
+def test_unknown_symbol(symbol_service):
+    with pytest.raises(ValueError):
+        symbol_service.get_parsed_filters("DOGEUSDT")
+
+def test_cache_written_atomically(symbol_service, tmp_path):
+    symbol_service.get_parsed_filters("BTCUSDT")
+    assert (tmp_path / "exchange_info.json").exists()
+    assert not list(tmp_path.glob(".exchange_info.*.tmp"))
+    assert not (tmp_path / "exchange_info.json.lock").exists()
+
+def test_unwritable_cache_keeps_fetched_data(exchange_info, tmp_path):
+    client = MagicMock()
+    client.futures_exchange_info.return_value = exchange_info
+    service = SymbolService(client, cache_file=str(tmp_path / "missing" / "exchange_info.json"))
+    assert service.get_parsed_filters("BTCUSDT").lot_size.max_qty == Decimal("1000")
+    service.refresh()
+    assert client.futures_exchange_info.call_count == 2
+    assert not service._is_stale()
+
+def test_stale_cache_refreshed_in_background(exchange_info, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    cache = tmp_path / "exchange_info.json"
+    cache.write_text(json.dumps(exchange_info))
+    os.utime(cache, (time.time() - 7200, time.time() - 7200))
+
+    client = MagicMock()
+    client.futures_exchange_info.return_value = exchange_info
+    service = SymbolService(client, max_age=3600)
+
+    # The stale copy is served immediately while the refresh runs
+    assert service.get_parsed_filters("BTCUSDT").symbol == "BTCUSDT"
+    service._refresh_thread.join(timeout=5)
+    client.futures_exchange_info.assert_called_once()
+    assert time.time() - cache.stat().st_mtime < 60
+
+def test_fresh_copy_from_other_process_is_reused(exchange_info, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    client = MagicMock()
+    service = SymbolService(client, max_age=3600)
+    (tmp_path / "exchange_info.json").write_text(json.dumps(exchange_info))
+
+    service.refresh()
+    client.futures_exchange_info.assert_not_called()
+    assert service.get_parsed_filters("ETHUSDT").symbol == "ETHUSDT"
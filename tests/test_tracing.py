@@ -0,0 +1,77 @@
+import logging
+import time
+import pytest
+from src.bot.tracing import LazyPayload, Tracer, traced
+import src.bot.tracing as tracing
+
+@pytest.fixture
+def spans(monkeypatch):
+    tracer = Tracer(sample_rate=1.0, payload_limit=200)
+    recorded = []
+    tracer.handlers = [recorded.append]
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    return recorded
+
+class Unprintable:
+    def __repr__(self):
+        raise AssertionError("payload was formatted")
+
+def test_span_records_sizes_not_payloads(spans):
+    @traced
+    def fetch(symbol, limit=None):
+        return [Unprintable()] * 1000
+
+    assert len(fetch("BTCUSDT", limit=5)) == 1000
+    span, = spans
+    assert (span.name, span.status, span.args_size, span.result_size) == ("fetch", "ok", 2, 1000)
+    # DEBUG is off, so nothing is sampled
+    assert span.payload is None
+
+def test_errors_recorded_with_code(spans):
+    class ApiError(Exception):
+        code = -2019
+
+    @traced
+    def place():
+        raise ApiError("margin")
+
+    with pytest.raises(ApiError):
+        place()
+    assert (spans[0].status, spans[0].error_code) == ("error", -2019)
+
+def test_payload_is_sampled_and_lazy(spans, caplog):
+    @traced
+    def fetch():
+        return {"symbols": list(range(100000))}
+
+    with caplog.at_level(logging.DEBUG, logger="src.bot.tracing"):
+        fetch()
+    payload = spans[0].payload
+    assert isinstance(payload, LazyPayload)
+    assert len(str(payload)) <= 200
+
+def test_payload_redacts_credentials(spans, caplog):
+    @traced
+    def create_client(api_key, api_secret, params=None):
+        return {"status": "ok"}
+
+    with caplog.at_level(logging.DEBUG, logger="src.bot.tracing"):
+        create_client("key-123", api_secret="secret-456", params={"symbol": "BTCUSDT", "signature": "sig-789"})
+    text = str(spans[0].payload)
+    assert "BTCUSDT" in text and text.count("***") == 3
+    assert not any(secret in text for secret in ("key-123", "secret-456", "sig-789"))
+
+def test_overhead_does_not_grow_with_payload(monkeypatch):
+    tracer = Tracer()
+    tracer.handlers = []
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    big = {"symbols": [{"symbol": str(i)} for i in range(100000)]}
+
+    @traced
+    def call():
+        return big
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        call()
+    assert (time.perf_counter() - start) / 1000 < 0.0005
@@ -0,0 +1,47 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from src.bot.transport import TransportConfig, configure_session, connection_stats, keepalive_socket_options
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+def test_keepalive_socket_options():
+    options = keepalive_socket_options(TransportConfig())
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in options
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) not in keepalive_socket_options(
+        TransportConfig(tcp_keepalive=False))
+
+def test_session_reuses_connections(server):
+    session = requests.Session()
+    adapter = configure_session(session, TransportConfig(pool_maxsize=4))
+    for _ in range(10):
+        assert session.get(f"{server}/fapi/v1/ping", timeout=(1, 1)).status_code == 200
+
+    stats = connection_stats(session)
+    assert stats["requests"] == 10
+    assert stats["connections"] == 1
+    assert stats["reuse_ratio"] == pytest.approx(0.9)
+    assert adapter.poolmanager.connection_pool_kw["socket_options"] == adapter.socket_options
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import pytest
+import websockets
+from unittest.mock import MagicMock
+from src.bot.database import Database
+from src.bot.services.user_stream import UserDataStream
+
+ORDER_TRADE_UPDATE = {
+    "e": "ORDER_TRADE_UPDATE",
+    "E": 1700000000100,
+    "T": 1700000000099,
+    "o": {
+        "s": "BTCUSDT", "c": "ctb-1", "S": "BUY", "o": "LIMIT", "f": "GTC",
+        "q": "0.010", "p": "100", "ap": "100", "sp": "0", "x": "TRADE", "X": "FILLED",
+        "i": 42, "l": "0.010", "z": "0.010", "L": "100", "T": 1700000000099,
+    },
+}
+
+@pytest.fixture
+def fake_stream_server():
+    """Local stand-in for the Binance WebSocket endpoint"""
+    paths = []
+    started = threading.Event()
+    state = {}
+
+    async def handler(ws):
+        paths.append(ws.request.path)
+        await ws.send(json.dumps(ORDER_TRADE_UPDATE))
+        await ws.wait_closed()
+
+    async def serve():
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            state["port"] = server.sockets[0].getsockname()[1]
+            state["stop"] = asyncio.get_running_loop().create_future()
+            started.set()
+            await state["stop"]
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait(5)
+    yield f"ws://127.0.0.1:{state['port']}", paths
+    loop.call_soon_threadsafe(state["stop"].set_result, None)
+    thread.join(5)
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    database.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0},
+                        {"orderId": 42, "status": "NEW"})
+    return database
+
+def test_order_update_applied_from_stream(fake_stream_server, db):
+    url, paths = fake_stream_server
+    client = MagicMock()
+    client.futures_stream_get_listen_key.return_value = "listen-key-1"
+
+    stream = UserDataStream(client, db=db, ws_url=url).start()
+    try:
+        for _ in range(100):
+            if db.get_order_by_id("42").status == "FILLED":
+                break
+            threading.Event().wait(0.05)
+    finally:
+        stream.stop()
+
+    order = db.get_order_by_id("42")
+    assert order.status == "FILLED"
+    assert order.executed_qty == 0.01
+    assert paths == ["/ws/listen-key-1"]
+    assert db.get_activity_logs()[0].action == "order_update"
+
+def test_listen_key_expired_reconnects(db):
+    stream = UserDataStream(MagicMock(), db=db, ws_url="ws://unused")
+    stream.reconnect = MagicMock()
+    stream.on_message({"e": "listenKeyExpired"})
+    stream.reconnect.assert_called_once()
+
+def test_update_before_save_is_recorded_and_merged(tmp_path):
+    db = Database(str(tmp_path / "early.db"))
+    stream = UserDataStream(MagicMock(), db=db, ws_url="ws://unused")
+    stream.handle_order_update(ORDER_TRADE_UPDATE)
+    # place_order's save arrives after the fill, with the older NEW response
+    db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0,
+                   "newClientOrderId": "ctb-1"},
+                  {"orderId": 42, "clientOrderId": "ctb-1", "status": "NEW", "executedQty": "0",
+                   "updateTime": 1700000000050})
+
+    order = db.get_order_by_client_id("ctb-1")
+    assert (order.order_id, order.status, order.executed_qty, order.price) == ("42", "FILLED", 0.01, 100.0)
+    assert db.get_statistics()["total_orders"] == 1
+
+def test_stale_update_is_ignored(db):
+    stream = UserDataStream(MagicMock(), db=db, ws_url="ws://unused")
+    stream.handle_order_update(ORDER_TRADE_UPDATE)
+    older = dict(ORDER_TRADE_UPDATE, o=dict(ORDER_TRADE_UPDATE["o"], X="PARTIALLY_FILLED", z="0.005",
+                                            T=1700000000090))
+    stream.handle_order_update(older)
+    assert db.get_order_by_id("42").status == "FILLED"
+
+def test_updates_are_written_off_the_event_loop(db):
+    threads = []
+    db.apply_order_update = lambda status: threads.append(threading.current_thread().name)
+    stream = UserDataStream(MagicMock(), db=db, ws_url="ws://unused")
+    stream.on_message(ORDER_TRADE_UPDATE)
+    stream._db_worker.submit(lambda: None).result(5)
+    assert threads and threads[0].startswith("user-data-db")
+
+def test_stop_writes_queued_updates_and_releases_the_worker(db):
+    written = []
+    db.apply_order_update = lambda status: (threading.Event().wait(0.05), written.append(status["orderId"]))
+    stream = UserDataStream(MagicMock(), db=db, ws_url="ws://unused")
+    for _ in range(3):
+        stream.on_message(ORDER_TRADE_UPDATE)
+    worker = stream._db_worker
+    stream.stop()
+    assert written == [42, 42, 42]
+    assert worker._shutdown and stream._db_worker is None
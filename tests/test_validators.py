@@ -1,5 +1,9 @@
+import random
+from decimal import ROUND_HALF_EVEN, Decimal
 import pytest
-from src.bot.validators import validate_and_normalize_order_params
+from src.bot import filters as filters_module
+from src.bot.filters import LotSizeFilter, PriceFilter, SymbolFilters
+from src.bot.validators import OrderValidationError, validate_and_normalize_order_params
 
 @pytest.fixture
 def mock_filters():
@@ -20,3 +24,78 @@ def test_quantity_too_low(mock_filters):
     params = {"quantity": 0.0001}
     with pytest.raises(ValueError):
         validate_and_normalize_order_params(params, mock_filters)
+
+def test_prices_snap_to_tick_multiples():
+    filters = {"filters": [
+        {"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+        {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+    ]}
+    params = {"price": 90000.06, "stopPrice": 89999.94, "quantity": 0.0025}
+    result = validate_and_normalize_order_params(params, filters)
+    assert result == {"price": 90000.1, "stopPrice": 89999.9, "quantity": 0.002}
+
+    half_tick = PriceFilter(None, None, Decimal("0.5"))
+    assert (half_tick.scale, half_tick.units) == (10, 5)
+    assert half_tick.normalize(100.26) == 100.5
+
+def test_ties_round_like_decimal():
+    rnd = random.Random(7)
+    for tick in ("0.01", "0.10", "0.001", "0.5", "10"):
+        grid = PriceFilter(None, None, Decimal(tick))
+        for _ in range(2000):
+            count = rnd.randint(0, 10_000_000)
+            value = float((count + Decimal("0.5")) * Decimal(tick))  # exact tie, inexact as a float
+            expected = (Decimal(repr(value)) / Decimal(tick)).to_integral_value(ROUND_HALF_EVEN)
+            assert grid.to_units(value) == expected
+            assert Decimal(repr(grid.normalize(value))) == expected * Decimal(tick)
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_normalize_many_matches_normalize(use_numpy, monkeypatch):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(filters_module, "np", None)
+    grid = LotSizeFilter(Decimal("0.001"), None, Decimal("0.001"))
+    values = [0.0005 * i for i in range(5000)]
+    assert list(grid.normalize_many(values)) == [grid.normalize(v) for v in values]
+
+@pytest.fixture
+def full_filters():
+    return SymbolFilters.from_symbol_info({"symbol": "BTCUSDT", "filters": [
+        {"filterType": "PRICE_FILTER", "minPrice": "556.80", "maxPrice": "4529764", "tickSize": "0.10"},
+        {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000", "stepSize": "0.001"},
+        {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120", "stepSize": "0.001"},
+        {"filterType": "MIN_NOTIONAL", "notional": "100"},
+        {"filterType": "PERCENT_PRICE", "multiplierUp": "1.05", "multiplierDown": "0.95", "multiplierDecimal": "4"},
+        {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+    ]})
+
+@pytest.mark.parametrize("params, kwargs, code", [
+    ({"type": "LIMIT", "price": 500.0, "quantity": 1.0}, {}, -4013),
+    ({"type": "LIMIT", "price": 5000000.0, "quantity": 0.01}, {}, -4002),
+    ({"type": "STOP_MARKET", "stopPrice": 5000000.0, "quantity": 0.01}, {}, -4007),
+    ({"type": "LIMIT", "price": 95000.0, "quantity": 0.0001}, {}, -4004),
+    ({"type": "LIMIT", "price": 95000.0, "quantity": 1001.0}, {}, -4005),
+    ({"type": "MARKET", "quantity": 121.0}, {}, -4005),
+    ({"type": "LIMIT", "price": 95000.0, "quantity": 0.001}, {}, -4164),
+    ({"type": "MARKET", "quantity": 0.001}, {"reference_price": 95000.0}, -4164),
+    ({"type": "LIMIT", "side": "BUY", "price": 99800.0, "quantity": 0.01}, {"reference_price": 95000.0}, -4016),
+    ({"type": "LIMIT", "side": "SELL", "price": 90200.0, "quantity": 0.01}, {"reference_price": 95000.0}, -4024),
+])
+def test_filters_reject_with_exchange_codes(full_filters, params, kwargs, code):
+    with pytest.raises(OrderValidationError) as excinfo:
+        validate_and_normalize_order_params(params, full_filters, **kwargs)
+    assert excinfo.value.code == code
+
+@pytest.mark.parametrize("side, price", [("BUY", 90200.0), ("SELL", 99800.0)])
+def test_percent_price_only_caps_the_crossing_side(full_filters, side, price):
+    params = {"type": "LIMIT", "side": side, "price": price, "quantity": 0.01}
+    assert validate_and_normalize_order_params(params, full_filters, reference_price=95000.0)["price"] == price
+
+def test_checks_needing_market_state_are_skipped_without_it(full_filters):
+    market = validate_and_normalize_order_params({"type": "MARKET", "quantity": 100.0}, full_filters)
+    assert market["quantity"] == 100.0  # notional unknown without a reference price
+    limit = validate_and_normalize_order_params({"type": "LIMIT", "price": 99800.0, "quantity": 0.01}, full_filters)
+    assert limit["price"] == 99800.0
+    reduce_only = {"type": "LIMIT", "price": 95000.0, "quantity": 0.001, "reduceOnly": True}
+    assert validate_and_normalize_order_params(reduce_only, full_filters)["quantity"] == 0.001
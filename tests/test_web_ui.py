@@ -0,0 +1,98 @@
+import json
+from unittest.mock import MagicMock
+import pytest
+from binance.exceptions import BinanceAPIException
+from src import web_ui
+from src.bot.database import Database
+from src.bot.validators import OrderValidationError
+from src.web_ui import app, decode_stream_cursor, stream_events
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+def parse_event(raw):
+    fields = dict(line.split(": ", 1) for line in raw.strip().splitlines())
+    return fields.get("id"), fields["event"], json.loads(fields["data"])
+
+def save_order(db, order_id, status="NEW"):
+    return db.save_order({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 100.0},
+                         {"orderId": order_id, "status": status})
+
+def test_stream_sends_snapshot_then_changes(db):
+    save_order(db, 1)
+    db.log_activity("place_order", "success", symbol="BTCUSDT", order_id=1)
+    events = stream_events(db, poll_interval=1)
+
+    _, event, data = parse_event(next(events))
+    assert event == "snapshot"
+    assert [o["orderId"] for o in data["history"]] == ["1"]
+    assert data["statistics"]["pending_orders"] == 1
+
+    db.update_order_status("1", {"status": "FILLED", "executedQty": "0.01"})
+    event_id, event, data = parse_event(next(events))
+    assert event == "history"
+    assert [(o["orderId"], o["status"]) for o in data] == [("1", "FILLED")]
+
+    _, event, delta = parse_event(next(events))
+    assert event == "statistics"
+    assert delta["filled_orders"] == 1 and delta["pending_orders"] == 0
+    assert "total_orders" not in delta
+
+    db.log_activity("check_status", "success", order_id=1)
+    _, event, data = parse_event(next(events))
+    assert event == "logs"
+    assert [log["action"] for log in data] == ["check_status"]
+
+def test_stream_resumes_from_cursor(db):
+    save_order(db, 1)
+    events = stream_events(db, poll_interval=1)
+    cursor, _, _ = parse_event(next(events))
+
+    save_order(db, 2)
+    db.log_activity("place_order", "success", order_id=2)
+    resumed = stream_events(db, cursor=cursor, poll_interval=1)
+    _, event, data = parse_event(next(resumed))
+    assert event == "history"
+    assert [o["orderId"] for o in data] == ["2"]
+    _, event, data = parse_event(next(resumed))
+    assert event == "logs" and len(data) == 1
+
+def test_stream_rejects_bad_cursor():
+    with pytest.raises(ValueError):
+        decode_stream_cursor("not-a-cursor")
+    response = app.test_client().get("/api/stream?cursor=bogus.1")
+    assert response.status_code == 400
+
+def test_order_errors_carry_codes(monkeypatch):
+    order_service = MagicMock()
+    monkeypatch.setattr(web_ui, "get_services", lambda: (None, None, order_service))
+    payload = {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.001}
+
+    order_service.place_order.side_effect = OrderValidationError(-4164, "Order value 95.00 is below the minimum notional 100.0")
+    response = app.test_client().post("/api/order", json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {"success": False, "code": -4164,
+                                   "error": "Order value 95.00 is below the minimum notional 100.0"}
+
+    order_service.place_order.side_effect = BinanceAPIException(
+        MagicMock(), 400, json.dumps({"code": -2019, "msg": "Margin is insufficient."}))
+    body = app.test_client().post("/api/order", json=payload).get_json()
+    assert body["code"] == -2019 and body["error"].startswith("Insufficient margin")
+
+def test_price_streams_listed_symbols_only(monkeypatch):
+    client, symbol_service, price_cache = MagicMock(), MagicMock(), MagicMock()
+    client.futures_symbol_ticker.return_value = {"price": "1.5"}
+    symbol_service.has_symbol.side_effect = lambda symbol: symbol == "BTCUSDT"
+    price_cache.peek.side_effect = [None, (1.5, 1700000000.0)] * 2
+    monkeypatch.setattr(web_ui, "get_services", lambda: (client, symbol_service, None))
+    monkeypatch.setattr(web_ui, "get_price_cache", lambda: price_cache)
+
+    body = app.test_client().get("/api/price/bogus").get_json()
+    assert body["source"] == "rest"
+    price_cache.subscribe.assert_not_called()
+
+    app.test_client().get("/api/price/btcusdt")
+    price_cache.subscribe.assert_called_once_with("BTCUSDT")